@@ -2,6 +2,7 @@ from flask import Flask, render_template
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from flask_mail import Mail
+from app.read_replicas import RoutingSession, parse_replica_urls
 import os
 from dotenv import load_dotenv
 
@@ -13,7 +14,7 @@ STATIC_DIR = os.path.join(BASE_DIR, 'frontend', 'static')
 env_path = os.path.join(BASE_DIR, 'backend', '.env')
 load_dotenv(env_path)
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 mail = Mail()
 
 
@@ -22,7 +23,10 @@ def _as_bool(value, default=False):
         return default
     return str(value).strip().lower() in {'1', 'true', 'yes', 'y', 'on'}
 
-def create_app():
+def create_app(config=None):
+    """Build the app. ``config`` is an object, class or import path (e.g.
+    ``config.TestingConfig``) whose uppercase attributes override the settings
+    read from the environment; it defaults to the ``APP_CONFIG`` variable."""
     # Initialize Flask with frontend templates and static folders
     app = Flask(__name__, template_folder=TEMPLATES_DIR, static_folder=STATIC_DIR)
     
@@ -41,26 +45,133 @@ def create_app():
     app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
     app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
     app.config['MAIL_DEFAULT_SENDER'] = os.getenv('MAIL_DEFAULT_SENDER') or os.getenv('MAIL_USERNAME')
+    app.config['FAQ_KB_PATH'] = os.getenv('FAQ_KB_PATH')
+    app.config['FAQ_CACHE_SIZE'] = int(os.getenv('FAQ_CACHE_SIZE', 1024))
+    app.config['SUGGESTION_ENGINE'] = os.getenv('SUGGESTION_ENGINE', 'faq')
+    app.config['SUGGESTION_DISPATCH'] = os.getenv('SUGGESTION_DISPATCH', 'thread')
+    app.config['SUGGESTION_WORKERS'] = int(os.getenv('SUGGESTION_WORKERS', 2))
+    app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    app.config['PASSWORD_HASH_CONCURRENCY'] = int(os.getenv('PASSWORD_HASH_CONCURRENCY', 0))
+    app.config['RATE_LIMIT_ENABLED'] = _as_bool(os.getenv('RATE_LIMIT_ENABLED'), True)
+    app.config['RATE_LIMIT_STORE'] = os.getenv('RATE_LIMIT_STORE', 'memory')
+    app.config['FACET_CACHE_SIZE'] = int(os.getenv('FACET_CACHE_SIZE', 512))
+    app.config['CATALOG_SNAPSHOT_ENABLED'] = _as_bool(os.getenv('CATALOG_SNAPSHOT_ENABLED'), False)
+    app.config['COMPARISON_CACHE_SIZE'] = int(os.getenv('COMPARISON_CACHE_SIZE', 2048))
+    app.config['HTML_CACHE_ENABLED'] = _as_bool(os.getenv('HTML_CACHE_ENABLED'), True)
+    app.config['HTML_CACHE_MAX_CHARS'] = int(os.getenv('HTML_CACHE_MAX_CHARS', 32 * 1024 * 1024))
+    app.config['CATALOG_CACHE_TTL_SECONDS'] = float(os.getenv('CATALOG_CACHE_TTL_SECONDS', 300))
+    app.config['CATALOG_VERSION_SYNC_SECONDS'] = float(os.getenv('CATALOG_VERSION_SYNC_SECONDS', 1))
+    app.config['PAGE_SIZE'] = int(os.getenv('PAGE_SIZE', 24))
+    app.config['AUTO_MIGRATE'] = _as_bool(os.getenv('AUTO_MIGRATE'), True)
+    app.config['DATABASE_PROFILE'] = os.getenv('DATABASE_PROFILE', 'auto')
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    app.config['SQLITE_SYNCHRONOUS'] = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    app.config['SQLITE_CACHE_SIZE_KB'] = int(os.getenv('SQLITE_CACHE_SIZE_KB', 20000))
+    app.config['SQLITE_MMAP_SIZE'] = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', 10))
+    app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    app.config['DB_POOL_TIMEOUT'] = int(os.getenv('DB_POOL_TIMEOUT', 30))
+    app.config['DB_POOL_RECYCLE'] = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    app.config['REPLICA_STICKY_SECONDS'] = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
+    app.config['INSTRUMENTATION_ENABLED'] = _as_bool(os.getenv('INSTRUMENTATION_ENABLED'), True)
+    app.config['SERVER_TIMING_ENABLED'] = _as_bool(os.getenv('SERVER_TIMING_ENABLED'), True)
+    app.config['SLOW_QUERY_MS'] = float(os.getenv('SLOW_QUERY_MS', 200))
+    app.config['METRICS_PUBLIC'] = _as_bool(os.getenv('METRICS_PUBLIC'), False)
+    app.config['SESSION_ACCESS_SECONDS'] = int(os.getenv('SESSION_ACCESS_SECONDS', 900))
+    app.config['SESSION_REFRESH_SECONDS'] = int(os.getenv('SESSION_REFRESH_SECONDS', 14 * 86400))
+    app.config['SESSION_CACHE_SIZE'] = int(os.getenv('SESSION_CACHE_SIZE', 10000))
+    app.config['SESSION_REVOCATION_SYNC_SECONDS'] = float(os.getenv('SESSION_REVOCATION_SYNC_SECONDS', 5))
+    app.config['CART_RETENTION_DAYS'] = int(os.getenv('CART_RETENTION_DAYS', 30))
+    app.config['RESERVATION_MINUTES'] = int(os.getenv('RESERVATION_MINUTES', 30))
+    app.config['OUTBOX_MAX_ATTEMPTS'] = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 5))
+    app.config['PROFILING_ENABLED'] = _as_bool(os.getenv('PROFILING_ENABLED'), False)
+    app.config['PROFILE_HISTORY'] = int(os.getenv('PROFILE_HISTORY', 20))
+    app.config['DATABASE_REPLICA_URLS'] = parse_replica_urls(os.getenv('DATABASE_REPLICA_URLS'))
+    config = config or os.getenv('APP_CONFIG')
+    if config:
+        app.config.from_object(config)
     
     # Initialize extensions
+    from app.services.database import configure_database, init_database_engines
+    configure_database(app)
     db.init_app(app)
+    init_database_engines(app, db)
+    from app.read_replicas import init_read_replicas
+    init_read_replicas(app)
+    from app.services.instrumentation import init_instrumentation
+    init_instrumentation(app, db)
     mail.init_app(app)
     CORS(app)
 
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    from app.services.passwords import init_password_hasher
+    from app.services.rate_limit import init_rate_limiter
+    from app.services.sessions import init_sessions
+    init_password_hasher(app)
+    init_rate_limiter(app)
+    init_sessions(app)
+
+    if not os.path.isdir(app.config['UPLOAD_FOLDER']):
+        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
     # Register blueprints
-    from app.routes import products_bp, admin_bp, support_bp
+    from app.routes import products_bp, admin_bp, support_bp, FAQ_KB
     app.register_blueprint(products_bp, url_prefix='/api/products')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
     app.register_blueprint(support_bp, url_prefix='/api/support')
+    from app.routes.cart import cart_bp
+    from app.routes.orders import orders_bp
+    app.register_blueprint(cart_bp, url_prefix='/api/cart')
+    app.register_blueprint(orders_bp, url_prefix='/api/orders')
+
+    from app.services.analytics import init_analytics
+    from app.services.carts import init_carts
+    from app.services.checkout import init_checkout
+    init_analytics(app)
+    init_carts(app)
+    init_checkout(app)
+
+    # Compile the support FAQ index once instead of per request
+    from app.services.faq_matcher import init_faq_matcher
+    init_faq_matcher(app, FAQ_KB)
+
+    from app.services.suggestions import init_suggestions
+    init_suggestions(app)
+
+    from app.services.profiling import init_profiling
+    init_profiling(app)
 
     @app.route('/admin')
     def admin_dashboard():
         return render_template('admin.html')
+
+    @app.route('/healthz')
+    def health_check():
+        return {'status': 'ok'}
+
+    @app.route('/readyz')
+    def readiness_check():
+        from app.services.warmup import warm_app
+        state = warm_app(app)
+        payload = {
+            'status': 'ready' if state['ready'] else 'unavailable',
+            'checks': state['checks'],
+            'warmup_ms': state.get('warmup_ms')
+        }
+        return payload, 200 if state['ready'] else 503
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Bring the schema up to date; a current database costs one version query
+    from app.services.migrations import init_migrations
+    init_migrations(app)
+
+    # In-memory catalog indexes, kept current by catalog change events
+    from app.services.autocomplete import init_product_autocomplete
+    from app.services.catalog_snapshot import init_catalog_snapshot
+    from app.services.comparison import init_comparison
+    init_product_autocomplete(app)
+    init_catalog_snapshot(app)
+    init_comparison(app)
+
+    from app.services.html_cache import init_html_cache
+    init_html_cache(app)
     
     return app
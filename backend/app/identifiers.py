@@ -0,0 +1,79 @@
+import os
+import secrets
+import threading
+import time
+
+# Crockford base32: no I, L, O or U, and sorts in the same order as the numbers it encodes
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+ENCODED_LENGTH = 26
+NODE_BITS = 16
+SEQUENCE_BITS = 64
+
+
+def encode_base32(value, length=ENCODED_LENGTH):
+    characters = []
+    for _ in range(length):
+        value, remainder = divmod(value, 32)
+        characters.append(ALPHABET[remainder])
+    return ''.join(reversed(characters))
+
+
+def decode_base32(text):
+    value = 0
+    for character in text.upper():
+        value = value * 32 + ALPHABET.index(character)
+    return value
+
+
+class IdGenerator:
+    """ULID-style 128-bit ids: 48-bit milliseconds, 16-bit node, 64-bit per-process sequence.
+
+    Ids from one process are strictly increasing, so they append to the right
+    edge of a B-tree index. The sequence starts at a random point every
+    millisecond, so processes that share a node number still don't collide.
+    """
+
+    def __init__(self, node=None):
+        self.lock = threading.Lock()
+        self.node = secrets.randbits(NODE_BITS) if node is None else node % (1 << NODE_BITS)
+        self.last_ms = -1
+        self.sequence = 0
+
+    def reseed(self):
+        """Pick a new random node; used in forked workers so they don't share the parent's."""
+        with self.lock:
+            self.node = secrets.randbits(NODE_BITS)
+            self.last_ms = -1
+
+    def next_int(self):
+        with self.lock:
+            now = time.time_ns() // 1_000_000
+            if now > self.last_ms:
+                self.last_ms = now
+                self.sequence = secrets.randbits(SEQUENCE_BITS - 1)
+            else:
+                # Same millisecond, or the clock stepped back: keep counting from the last id
+                self.sequence += 1
+                if self.sequence >= 1 << SEQUENCE_BITS:
+                    self.last_ms += 1
+                    self.sequence = secrets.randbits(SEQUENCE_BITS - 1)
+            return (self.last_ms << (NODE_BITS + SEQUENCE_BITS)) | (self.node << SEQUENCE_BITS) | self.sequence
+
+    def next_id(self):
+        return encode_base32(self.next_int())
+
+
+default_generator = IdGenerator(int(os.environ['ID_NODE']) if os.getenv('ID_NODE') else None)
+if hasattr(os, 'register_at_fork') and not os.getenv('ID_NODE'):
+    os.register_at_fork(after_in_child=default_generator.reseed)
+
+
+def new_identifier(prefix):
+    """Time-ordered unique identifier such as ``ORD-01JABC...``."""
+    return f'{prefix}-{default_generator.next_id()}'
+
+
+def identifier_timestamp(identifier):
+    """Creation time (epoch seconds) encoded in an identifier from ``new_identifier``."""
+    encoded = identifier.rsplit('-', 1)[-1]
+    return (decode_base32(encoded) >> (NODE_BITS + SEQUENCE_BITS)) / 1000
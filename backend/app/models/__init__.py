@@ -1,6 +1,6 @@
 from datetime import datetime
-import uuid
 from app import db
+from app.identifiers import new_identifier
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -21,6 +21,13 @@ class User(db.Model):
 
 class Product(db.Model):
     __tablename__ = 'products'
+    __table_args__ = (
+        db.Index('ix_products_category_created_at', 'category', 'created_at'),
+        db.Index('ix_products_is_deal_created_at', 'is_deal', 'created_at'),
+        db.Index('ix_products_merchant_created_at', 'merchant', 'created_at'),
+        db.Index('ix_products_created_at', 'created_at'),
+        db.Index('ix_products_rating', 'rating'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False, index=True)
@@ -125,6 +132,9 @@ class Product(db.Model):
 
 class ProductImage(db.Model):
     __tablename__ = 'product_images'
+    __table_args__ = (
+        db.Index('ix_product_images_product_sort', 'product_id', 'sort_order'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False, index=True)
@@ -135,6 +145,9 @@ class ProductImage(db.Model):
 
 class Review(db.Model):
     __tablename__ = 'reviews'
+    __table_args__ = (
+        db.Index('ix_reviews_product_status_created_at', 'product_id', 'moderation_status', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False, index=True)
@@ -148,7 +161,7 @@ class Review(db.Model):
     verified_purchase = db.Column(db.Boolean, default=False)
     moderation_status = db.Column(db.String(20), default='pending', index=True)  # pending, approved, rejected
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     def to_dict(self):
         return {
@@ -168,6 +181,9 @@ class Review(db.Model):
 
 class ReviewHelpfulVote(db.Model):
     __tablename__ = 'review_helpful_votes'
+    __table_args__ = (
+        db.Index('ix_review_helpful_votes_review_voter', 'review_id', 'voter_token'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     review_id = db.Column(db.Integer, db.ForeignKey('reviews.id'), nullable=False, index=True)
@@ -177,14 +193,17 @@ class ReviewHelpfulVote(db.Model):
 
 class SupportTicket(db.Model):
     __tablename__ = 'support_tickets'
+    __table_args__ = (
+        db.Index('ix_support_tickets_status_created_at', 'status', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     ticket_number = db.Column(
-        db.String(20),
+        db.String(40),
         unique=True,
         nullable=False,
         index=True,
-        default=lambda: f"TKT-{uuid.uuid4().hex[:10].upper()}"
+        default=lambda: new_identifier('TKT')
     )
     customer_name = db.Column(db.String(255), nullable=False)
     customer_email = db.Column(db.String(255), nullable=False, index=True)
@@ -194,7 +213,7 @@ class SupportTicket(db.Model):
     status = db.Column(db.String(30), default='open', index=True)  # open/in_progress/resolved/closed
     assistant_suggestion = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     def to_dict(self):
         return {
@@ -216,35 +235,49 @@ class Cart(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.String(255), unique=True, nullable=False, index=True)
+    # Maintained incrementally by the cart service on every item change
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Float, nullable=False, default=0.0)
     items = db.relationship('CartItem', backref='cart', lazy=True, cascade='all, delete-orphan')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     def to_dict(self):
-        total = sum(item.product.price * item.quantity for item in self.items)
         return {
             'id': self.id,
             'items': [item.to_dict() for item in self.items],
-            'total': total,
-            'item_count': sum(item.quantity for item in self.items)
+            'total': round(self.total_amount or 0.0, 2),
+            'item_count': self.item_count or 0
         }
 
 class CartItem(db.Model):
     __tablename__ = 'cart_items'
+    __table_args__ = (
+        db.Index('ix_cart_items_cart_product', 'cart_id', 'product_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     cart_id = db.Column(db.Integer, db.ForeignKey('carts.id'), nullable=False)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
     quantity = db.Column(db.Integer, default=1)
+    # Price the line is counted at in the cart total; refreshed when the product's price changes
+    unit_price = db.Column(db.Float)
     product = db.relationship('Product')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def to_dict(self):
         return {
             'id': self.id,
-            'product': self.product.to_dict(),
+            'product': {
+                'id': self.product.id,
+                'name': self.product.name,
+                'price': self.product.price,
+                'image_url': self.product.image_url,
+                'stock': self.product.stock,
+                'category': self.product.category
+            },
             'quantity': self.quantity,
-            'subtotal': self.product.price * self.quantity
+            'subtotal': round((self.unit_price or 0.0) * self.quantity, 2)
         }
 
 class Order(db.Model):
@@ -256,11 +289,13 @@ class Order(db.Model):
     customer_email = db.Column(db.String(255), nullable=False, index=True)
     customer_phone = db.Column(db.String(20), nullable=False)
     total_amount = db.Column(db.Float, nullable=False)
-    status = db.Column(db.String(50), default='pending')  # pending, confirmed, shipped, delivered
-    payment_status = db.Column(db.String(50), default='awaiting')  # awaiting, completed, failed
+    status = db.Column(db.String(50), default='pending')  # pending, confirmed, shipped, delivered, cancelled, expired
+    payment_status = db.Column(db.String(50), default='awaiting')  # awaiting, manual_pending, completed, failed
+    # Stock stays reserved for unpaid orders until this time; cleared once paid or released
+    reservation_expires_at = db.Column(db.DateTime, index=True)
     items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     def to_dict(self):
         return {
@@ -273,11 +308,15 @@ class Order(db.Model):
             'status': self.status,
             'payment_status': self.payment_status,
             'items': [item.to_dict() for item in self.items],
+            'reservation_expires_at': self.reservation_expires_at.isoformat() if self.reservation_expires_at else None,
             'created_at': self.created_at.isoformat()
         }
 
 class OrderItem(db.Model):
     __tablename__ = 'order_items'
+    __table_args__ = (
+        db.Index('ix_order_items_order_id', 'order_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
@@ -295,3 +334,72 @@ class OrderItem(db.Model):
             'price': self.price,
             'subtotal': self.price * self.quantity
         }
+
+class OutboxMessage(db.Model):
+    """Email written in the same transaction as its order and delivered later by a worker."""
+    __tablename__ = 'outbox_messages'
+    __table_args__ = (
+        db.Index('ix_outbox_messages_status_available', 'status', 'available_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # order_alert, order_confirmation
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.String(255))
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+    order = db.relationship('Order')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'order_id': self.order_id,
+            'status': self.status,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'available_at': self.available_at.isoformat() if self.available_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        }
+
+
+class AnalyticsRollup(db.Model):
+    """One day's aggregate for a metric and dimension, e.g. ('orders', 'confirmed') or ('products', '42')."""
+    __tablename__ = 'analytics_daily_rollups'
+
+    day = db.Column(db.Date, primary_key=True)
+    metric = db.Column(db.String(30), primary_key=True)  # orders, products, categories, reviews, tickets
+    dimension = db.Column(db.String(255), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class AnalyticsCheckpoint(db.Model):
+    """High-water mark of the source rows a rollup job has already folded in."""
+    __tablename__ = 'analytics_checkpoints'
+
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.DateTime, nullable=False)
+
+
+class CatalogVersion(db.Model):
+    """Single-row counter bumped on every catalog write, shared by all workers."""
+    __tablename__ = 'catalog_versions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class RevokedToken(db.Model):
+    """Revoked session, user-wide revocation or spent refresh token, kept until the token would expire."""
+    __tablename__ = 'revoked_tokens'
+
+    token_id = db.Column(db.String(64), primary_key=True)  # session id, user:<id> or refresh token id
+    kind = db.Column(db.String(20), nullable=False)  # session, user, refresh
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
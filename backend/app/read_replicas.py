@@ -0,0 +1,102 @@
+import itertools
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+
+PRIMARY_PIN_COOKIE = 'shophub_primary'
+
+
+def parse_replica_urls(urls):
+    return [url.strip() for url in (urls or '').split(',') if url.strip()]
+
+
+class RoutingSession(Session):
+    """Session that sends SELECTs from replica-enabled requests to a read replica.
+
+    Flushes, DML and anything outside a ``replica_reads`` view use the primary,
+    as does the rest of a request once it has written.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and getattr(clause, 'is_select', False):
+            replica = request_replica()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def request_replica():
+    if not has_request_context() or not g.get('db_replica_reads') or g.get('db_wrote'):
+        return None
+    replica = g.get('db_replica')
+    if replica is None:
+        replicas = current_app.extensions.get('replica_rotation')
+        if replicas is None:
+            return None
+        # One replica per request so every read in it sees the same snapshot
+        replica = g.db_replica = next(replicas)
+    return replica
+
+
+def replica_may_be_stale():
+    """True when this request read from a replica shortly after a catalog write.
+
+    Results derived from such reads should not be cached under the new catalog version.
+    """
+    if not has_request_context() or g.get('db_replica') is None:
+        return False
+    changed_at = current_app.extensions.get('catalog_changed_at')
+    return changed_at is not None and \
+        time.monotonic() - changed_at < current_app.config.get('REPLICA_STICKY_SECONDS', 5)
+
+
+def replica_reads(view):
+    """Allow a read-only view to query a replica, unless this client recently wrote."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not request.cookies.get(PRIMARY_PIN_COOKIE):
+            g.db_replica_reads = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def mark_request_wrote(session, flush_context):
+    if has_request_context():
+        g.db_wrote = True
+
+
+def pin_writer_to_primary(response):
+    """After a write, keep the client's reads on the primary until replicas catch up."""
+    if g.get('db_wrote'):
+        response.set_cookie(
+            PRIMARY_PIN_COOKIE, '1',
+            max_age=current_app.config.get('REPLICA_STICKY_SECONDS', 5),
+            httponly=True, samesite='Lax'
+        )
+    return response
+
+
+def init_read_replicas(app):
+    """Create engines for DATABASE_REPLICA_URLS with the same options as the primary.
+
+    Replicas are kept out of SQLALCHEMY_BINDS so create_all/drop_all never touch them.
+    """
+    from app.services.database import configure_engine
+
+    engines = [
+        configure_engine(
+            create_engine(url, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})),
+            app.extensions.get('database_profile', 'default'),
+            app.config
+        )
+        for url in app.config.get('DATABASE_REPLICA_URLS', [])
+    ]
+    app.extensions['replica_engines'] = engines
+    if not engines:
+        return engines
+    app.extensions['replica_rotation'] = itertools.cycle(engines)
+    app.after_request(pin_writer_to_primary)
+    return engines
@@ -1,16 +1,29 @@
 import os
 import json
 import re
-import mimetypes
-from difflib import SequenceMatcher
 from uuid import uuid4
-from flask import Blueprint, current_app, jsonify, request, url_for
+from flask import Blueprint, Response, current_app, jsonify, request, url_for
 from werkzeug.utils import secure_filename
 from sqlalchemy import or_, func
-from urllib.parse import urlparse, urlsplit
-import requests
 from app import db
 from app.models import Product, ProductImage, Review, ReviewHelpfulVote, Order, OrderItem, SupportTicket
+from app.read_replicas import replica_reads
+from app.services.analytics import analytics_summary
+from app.services.catalog_snapshot import hydrate_products
+from app.services.comparison import cached_comparison, comparison_score, product_score
+from app.services.faq_matcher import init_faq_matcher
+from app.services.facets import cached_facets, facet_counts_for_products, facet_counts_for_query
+from app.services.profiling import MAX_SAMPLING_SECONDS
+from app.services.rate_limit import rate_limited
+from app.services.ticket_search import (
+    TICKET_STATUSES,
+    decode_ticket_cursor,
+    encode_ticket_cursor,
+    ticket_keyset_clause,
+    ticket_search_backend,
+    ticket_search_clause,
+    ticket_status_counts
+)
 
 # Blueprint for products
 products_bp = Blueprint('products', __name__)
@@ -129,6 +142,7 @@ def fuzzy_score(query_text, product):
     if query in haystack:
         return 1.0
 
+    from difflib import SequenceMatcher
     tokens = re.findall(r'[a-z0-9]+', haystack)
     best_ratio = 0.0
     for token in tokens:
@@ -211,25 +225,36 @@ def normalize_text(value):
     return (value or '').strip().lower()
 
 
-def comparison_score(product):
-    price = product.deal_price if product.deal_price is not None else product.price
-    price = price if price is not None else 0
-    rating = product.rating if product.rating is not None else 0
-    review_count = product.review_count if product.review_count is not None else 0
-    discount = 0
+def comparison_row(product, score):
+    current_price = product.deal_price if product.deal_price is not None else product.price
+    discount_pct = None
     if product.original_price and product.deal_price and product.original_price > 0:
-        discount = (product.original_price - product.deal_price) / product.original_price
+        discount_pct = round(((product.original_price - product.deal_price) / product.original_price) * 100, 1)
 
-    # Weighted score to approximate an AI recommendation signal.
-    score = (rating * 16) + (min(review_count, 1000) * 0.03) + (discount * 12) - (price * 0.02)
-    return score
+    return {
+        'id': product.id,
+        'name': product.name,
+        'merchant': product.merchant,
+        'category': product.category,
+        'current_price': current_price,
+        'list_price': product.original_price or product.price,
+        'discount_pct': discount_pct,
+        'rating': product.rating,
+        'review_count': product.review_count,
+        'description': product.description,
+        'stock': product.stock,
+        'affiliate_url': product.affiliate_url,
+        'image_url': product.image_url,
+        'score': round(score, 2)
+    }
 
 
-def build_comparison_summary(products):
+def build_comparison_summary(products, score_map=None):
     if not products:
         return {}
 
-    score_map = {product.id: comparison_score(product) for product in products}
+    if score_map is None:
+        score_map = {product.id: comparison_score(product) for product in products}
     best = max(products, key=lambda item: score_map.get(item.id, 0))
     cheapest = min(products, key=lambda item: ((item.deal_price if item.deal_price is not None else item.price) or 0))
     top_rated = max(products, key=lambda item: (item.rating if item.rating is not None else 0))
@@ -255,359 +280,19 @@ def build_comparison_summary(products):
     }
 
 
-def assistant_reply(user_message):
-    message = normalize_text(user_message)
-    if not message:
-        return None, []
-
-    ranked = []
-    for item in FAQ_KB:
-        score = 0
-        for keyword in item['keywords']:
-            if keyword in message:
-                score += 2
-        score += SequenceMatcher(None, message, item['question'].lower()).ratio()
-        ranked.append((score, item))
-
-    ranked.sort(key=lambda pair: pair[0], reverse=True)
-    top = [item for score, item in ranked if score >= 1.2][:3]
-    if not top:
-        return (
-            'I can help with shipping, tracking, returns, account access, and reviews. '
-            'Please share your issue and we can open a support ticket.',
-            []
-        )
-
-    return top[0]['answer'], [{'id': item['id'], 'question': item['question']} for item in top[1:3]]
-
-
-def extract_meta_value(html, keys):
-    for key in keys:
-        patterns = [
-            rf'<meta[^>]+property=["\']{re.escape(key)}["\'][^>]+content=["\']([^"\']+)["\']',
-            rf'<meta[^>]+name=["\']{re.escape(key)}["\'][^>]+content=["\']([^"\']+)["\']'
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, html, flags=re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
-    return None
-
-
-def infer_merchant_name(url):
-    netloc = urlparse(url).netloc.lower().replace('www.', '')
-    if 'amazon.' in netloc or netloc == 'a.co':
-        return 'Amazon'
-    host = netloc.split(':')[0]
-    return host.split('.')[-2].capitalize() if '.' in host else host.capitalize()
-
-
-def clean_product_title(raw_title, merchant=None):
-    title = (raw_title or '').strip()
-    if not title:
-        return ''
-
-    cleanup_patterns = [
-        r'\s*[\|\-–]\s*amazon\.com.*$',
-        r'^\s*amazon\.com\s*[:\-]\s*',
-        r'\s*[\|\-–]\s*buy now.*$',
-        r'\s*[\|\-–]\s*official site.*$'
-    ]
-    for pattern in cleanup_patterns:
-        title = re.sub(pattern, '', title, flags=re.IGNORECASE)
-
-    title = re.sub(r'\s+', ' ', title).strip(' -|')
-    if merchant and title.lower().startswith(merchant.lower()):
-        title = title.strip()
-    return title
-
-
-def infer_category_from_text(name, description):
-    text = f"{name or ''} {description or ''}".lower()
-    category_map = {
-        'Electronics': ['headphone', 'earbud', 'speaker', 'smartwatch', 'laptop', 'usb', 'charger', 'camera', 'phone', 'tablet', 'electronics'],
-        'Fashion': ['shirt', 'tshirt', 'jeans', 'jacket', 'dress', 'shoe', 'sneaker', 'fashion', 'coat'],
-        'Home': ['lamp', 'kitchen', 'home', 'sofa', 'bed', 'garden', 'tool', 'vacuum', 'furniture', 'decor'],
-        'Books': ['book', 'novel', 'guide', 'handbook', 'paperback', 'hardcover', 'author']
-    }
-
-    best_category = None
-    best_score = 0
-    for category, keywords in category_map.items():
-        score = sum(1 for keyword in keywords if keyword in text)
-        if score > best_score:
-            best_score = score
-            best_category = category
-    return best_category or 'General'
-
-
-def extract_specs_from_text(text):
-    source = (text or '')
-    specs = []
-
-    measurement_matches = re.findall(
-        r'\b\d+(?:\.\d+)?\s?(?:inch|inches|cm|mm|gb|tb|mah|hz|w|oz|lb|lbs)\b',
-        source,
-        flags=re.IGNORECASE
-    )
-    specs.extend(measurement_matches[:6])
-
-    feature_keywords = [
-        'wireless', 'bluetooth', 'noise cancelling', 'waterproof', 'usb-c',
-        'fast charging', 'smart', 'portable', 'lightweight', 'eco-friendly'
-    ]
-    lowered = source.lower()
-    for keyword in feature_keywords:
-        if keyword in lowered:
-            specs.append(keyword.title())
-
-    color_match = re.search(r'\b(black|white|blue|red|green|pink|silver|gold|gray|grey)\b', lowered, flags=re.IGNORECASE)
-    if color_match:
-        specs.append(f"Color: {color_match.group(1).title()}")
-
-    # Preserve order and uniqueness.
-    deduped = []
-    seen = set()
-    for item in specs:
-        normalized = item.strip().lower()
-        if not normalized or normalized in seen:
-            continue
-        seen.add(normalized)
-        deduped.append(item.strip())
-    return deduped[:8]
-
-
-def parse_json_ld_candidates(html):
-    matches = re.findall(
-        r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
-        html,
-        flags=re.IGNORECASE | re.DOTALL
-    )
-    parsed = []
-    for raw in matches:
-        content = raw.strip()
-        if not content:
-            continue
-        try:
-            parsed.append(json.loads(content))
-        except json.JSONDecodeError:
-            continue
-    return parsed
-
-
-def find_in_json_ld(nodes, key):
-    if isinstance(nodes, dict):
-        if key in nodes:
-            return nodes[key]
-        for value in nodes.values():
-            result = find_in_json_ld(value, key)
-            if result is not None:
-                return result
-    elif isinstance(nodes, list):
-        for item in nodes:
-            result = find_in_json_ld(item, key)
-            if result is not None:
-                return result
-    return None
-
-
-def extract_price_value(text):
-    if not text:
-        return None
-    numeric = text.replace(',', '')
-    match = re.search(r'(\d+(?:\.\d{1,2})?)', numeric)
-    return parse_float(match.group(1)) if match else None
-
-
-def pick_first_image_url(value):
-    if isinstance(value, str):
-        return value.strip() or None
-    if isinstance(value, list):
-        for item in value:
-            candidate = pick_first_image_url(item)
-            if candidate:
-                return candidate
-    if isinstance(value, dict):
-        for key in ('url', 'contentUrl', 'thumbnailUrl'):
-            if value.get(key):
-                return str(value.get(key)).strip()
-    return None
-
-
-def infer_extension_from_url_or_type(image_url, content_type):
-    extension = ''
-    if image_url:
-        parsed = urlsplit(image_url)
-        _, extension = os.path.splitext(parsed.path)
-    if extension.lower() in {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.avif', '.bmp'}:
-        return extension.lower()
-
-    if content_type:
-        guessed = mimetypes.guess_extension(content_type.split(';')[0].strip())
-        if guessed:
-            return guessed
-    return '.jpg'
-
-
-def persist_remote_image(image_url, referer_url=None):
-    if not image_url:
-        return None
-
-    try:
-        response = requests.get(
-            image_url,
-            timeout=20,
-            stream=True,
-            headers={
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0 Safari/537.36',
-                'Accept': 'image/avif,image/webp,image/apng,image/*,*/*;q=0.8',
-                'Referer': referer_url or ''
-            }
-        )
-        response.raise_for_status()
-
-        extension = infer_extension_from_url_or_type(image_url, response.headers.get('Content-Type', ''))
-        stored_name = f"imported-{uuid4().hex}{extension}"
-        upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], stored_name)
-
-        with open(upload_path, 'wb') as file_handle:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    file_handle.write(chunk)
-
-        return url_for('static', filename=f'uploads/{stored_name}')
-    except Exception:
-        current_app.logger.warning('Could not persist remote image from URL import', exc_info=True)
-        return image_url
-
-
-def scrape_product_details(url):
-    session = requests.Session()
-    response = session.get(
-        url,
-        timeout=20,
-        allow_redirects=True,
-        headers={
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0 Safari/537.36',
-            'Accept-Language': 'en-US,en;q=0.9'
-        }
-    )
-    response.raise_for_status()
-
-    html = response.text
-    final_url = response.url
-    json_ld_nodes = parse_json_ld_candidates(html)
-
-    title = (
-        extract_meta_value(html, ['og:title', 'twitter:title'])
-        or find_in_json_ld(json_ld_nodes, 'name')
-    )
-    if not title:
-        title_match = re.search(r'<title[^>]*>(.*?)</title>', html, flags=re.IGNORECASE | re.DOTALL)
-        title = title_match.group(1).strip() if title_match else None
+def get_faq_matcher():
+    matcher = current_app.extensions.get('faq_matcher')
+    if matcher is None:
+        matcher = init_faq_matcher(current_app, FAQ_KB)
+    return matcher
 
-    description = (
-        extract_meta_value(html, ['og:description', 'description', 'twitter:description'])
-        or find_in_json_ld(json_ld_nodes, 'description')
-    )
-    image_url = (
-        extract_meta_value(html, ['og:image', 'twitter:image'])
-        or find_in_json_ld(json_ld_nodes, 'image')
-    )
-    image_url = pick_first_image_url(image_url)
 
-    price_text = (
-        extract_meta_value(html, ['product:price:amount', 'og:price:amount', 'price'])
-        or find_in_json_ld(json_ld_nodes, 'price')
-    )
-    rating_value = find_in_json_ld(json_ld_nodes, 'ratingValue')
-    review_count = find_in_json_ld(json_ld_nodes, 'reviewCount')
-    brand_value = find_in_json_ld(json_ld_nodes, 'brand')
-    if isinstance(brand_value, dict):
-        brand_value = brand_value.get('name') or brand_value.get('@id')
-    specs_candidates = []
-    for key in ['model', 'sku', 'mpn', 'material', 'color']:
-        value = find_in_json_ld(json_ld_nodes, key)
-        if isinstance(value, (str, int, float)):
-            specs_candidates.append(f"{key.upper()}: {value}")
-    specs_candidates.extend(extract_specs_from_text(f"{title or ''} {description or ''}"))
-
-    price = extract_price_value(str(price_text)) if price_text else None
-    rating = parse_float(rating_value)
-    reviews = parse_int(review_count)
-
-    return {
-        'final_url': final_url,
-        'name': title,
-        'description': description,
-        'image_url': image_url,
-        'price': price,
-        'rating': rating,
-        'review_count': reviews,
-        'merchant': infer_merchant_name(final_url),
-        'brand': (brand_value or '').strip() if isinstance(brand_value, str) else None,
-        'specs': specs_candidates
-    }
-
-
-def run_ai_import_cleaner(scraped):
-    report = []
-    cleaned = dict(scraped or {})
-
-    cleaned_name = clean_product_title(cleaned.get('name'), cleaned.get('merchant'))
-    if cleaned_name and cleaned_name != cleaned.get('name'):
-        report.append('Title normalized')
-    cleaned['name'] = cleaned_name or cleaned.get('name') or 'Imported Product'
-
-    if not cleaned.get('merchant') and cleaned.get('brand'):
-        cleaned['merchant'] = cleaned.get('brand')
-        report.append('Merchant filled from brand metadata')
-
-    inferred_category = infer_category_from_text(cleaned.get('name'), cleaned.get('description'))
-    cleaned['category'] = inferred_category
-    report.append(f'Category inferred as {inferred_category}')
-
-    specs = cleaned.get('specs') or []
-    if not isinstance(specs, list):
-        specs = []
-    cleaned['specs'] = [str(spec).strip() for spec in specs if str(spec).strip()][:8]
-
-    description = (cleaned.get('description') or '').strip()
-    if not description:
-        description = f"{cleaned['name']} in {cleaned['category']} category."
-        report.append('Description generated because source description was missing')
-
-    if cleaned['specs']:
-        specs_line = f"Key specs: {', '.join(cleaned['specs'][:5])}."
-        if 'key specs:' not in description.lower():
-            description = f"{description}\n\n{specs_line}"
-            report.append('Specs summary added to description')
-
-    cleaned['description'] = description
-
-    if cleaned.get('rating') is not None:
-        cleaned['rating'] = max(0, min(5, cleaned['rating']))
-    if cleaned.get('review_count') is not None:
-        cleaned['review_count'] = max(0, cleaned['review_count'])
-
-    if cleaned.get('price') is None:
-        cleaned['price'] = 0.0
-        report.append('Price missing; set to 0.0 for manual follow-up')
-
-    if not cleaned.get('image_url'):
-        fallback_images = {
-            'Electronics': '/static/images/wireless_headphones.svg',
-            'Fashion': '/static/images/tshirt.svg',
-            'Home': '/static/images/led_desk_lamp.svg',
-            'Books': '/static/images/python_programming_guide.svg',
-            'General': '/static/images/wireless_speaker.svg'
-        }
-        cleaned['image_url'] = fallback_images.get(cleaned['category'], fallback_images['General'])
-        report.append('Image missing; fallback image assigned')
+def assistant_reply(user_message):
+    return get_faq_matcher().reply(user_message)
 
-    return cleaned, report
 
 @admin_bp.route('/login', methods=['POST'])
+@rate_limited('admin_login')
 def admin_login():
     data = request.get_json(silent=True) if request.is_json else request.form.to_dict()
     data = data or {}
@@ -623,7 +308,8 @@ def admin_login():
 
 @support_bp.route('/faqs', methods=['GET'])
 def support_faqs():
-    return jsonify([{'id': item['id'], 'question': item['question'], 'answer': item['answer']} for item in FAQ_KB]), 200
+    entries = get_faq_matcher().entries
+    return jsonify([{'id': item['id'], 'question': item['question'], 'answer': item['answer']} for item in entries]), 200
 
 
 @support_bp.route('/assistant', methods=['POST'])
@@ -642,6 +328,7 @@ def support_assistant():
 
 
 @support_bp.route('/contact', methods=['POST'])
+@rate_limited('support_contact', account_field='email')
 def create_support_ticket():
     data = request.get_json(silent=True) if request.is_json else request.form.to_dict()
     data = data or {}
@@ -661,18 +348,19 @@ def create_support_ticket():
     if not message:
         return jsonify({'error': 'Message is required'}), 400
 
-    assistant_answer, _ = assistant_reply(message)
     ticket = SupportTicket(
         customer_name=name,
         customer_email=email,
         subject=subject,
         message=message,
-        channel=channel,
-        assistant_suggestion=assistant_answer
+        channel=channel
     )
     db.session.add(ticket)
     db.session.commit()
 
+    # Suggestion is computed off the request path and stored on the ticket later.
+    current_app.extensions['suggestion_dispatcher'].submit(ticket.id)
+
     return jsonify({
         'ok': True,
         'message': 'Support ticket created successfully.',
@@ -701,11 +389,31 @@ def admin_support_tickets():
         return auth_error
 
     status = (request.args.get('status') or '').strip().lower()
+    search = (request.args.get('q') or '').strip()
+    cursor = (request.args.get('cursor') or '').strip()
+    limit = request.args.get('limit', type=int) or 50
+    limit = max(1, min(limit, 200))
+
+    search_clause = ticket_search_clause(search, ticket_search_backend())
     query = SupportTicket.query
-    if status in {'open', 'in_progress', 'resolved', 'closed'}:
+    if search_clause is not None:
+        query = query.filter(search_clause)
+    if status in TICKET_STATUSES:
         query = query.filter_by(status=status)
-    tickets = query.order_by(SupportTicket.created_at.desc()).limit(200).all()
-    return jsonify([ticket.to_dict() for ticket in tickets]), 200
+    if cursor:
+        position = decode_ticket_cursor(cursor)
+        if position is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(ticket_keyset_clause(position))
+
+    tickets = query.order_by(SupportTicket.created_at.desc(), SupportTicket.id.desc()).limit(limit + 1).all()
+    has_more = len(tickets) > limit
+    tickets = tickets[:limit]
+    return jsonify({
+        'tickets': [ticket.to_dict() for ticket in tickets],
+        'next_cursor': encode_ticket_cursor(tickets[-1]) if has_more else None,
+        'status_counts': ticket_status_counts(search_clause)
+    }), 200
 
 
 @admin_bp.route('/support/tickets/<int:ticket_id>/status', methods=['POST'])
@@ -720,7 +428,7 @@ def admin_update_ticket_status(ticket_id):
 
     data = request.get_json(silent=True) or {}
     next_status = (data.get('status') or '').strip().lower()
-    if next_status not in {'open', 'in_progress', 'resolved', 'closed'}:
+    if next_status not in TICKET_STATUSES:
         return jsonify({'error': 'Invalid status'}), 400
 
     ticket.status = next_status
@@ -741,6 +449,10 @@ def import_product_from_url():
     if not re.match(r'^https?://', source_url, flags=re.IGNORECASE):
         return jsonify({'error': 'URL must start with http:// or https://'}), 400
 
+    # Imported on first use: requests and friends are slow to load and only needed here
+    import requests
+    from app.services.product_import import persist_remote_image, run_ai_import_cleaner, scrape_product_details
+
     try:
         scraped = scrape_product_details(source_url)
         cleaned, cleaner_report = run_ai_import_cleaner(scraped)
@@ -795,6 +507,7 @@ def import_product_from_url():
     }), 200
 
 @products_bp.route('/', methods=['GET'])
+@replica_reads
 def get_products():
     """Get products with optional filtering/search/sorting"""
     category = request.args.get('category')
@@ -806,6 +519,7 @@ def get_products():
     min_price = request.args.get('min_price', type=float)
     max_price = request.args.get('max_price', type=float)
     min_rating = request.args.get('min_rating', type=float)
+    include_facets = request.args.get('facets') in {'1', 'true', 'yes'}
     query = Product.query
     
     if category:
@@ -839,7 +553,20 @@ def get_products():
         matched_count = query.count()
         search_fallback = matched_count == 0
 
-    if search_fallback:
+    snapshot = current_app.extensions.get('catalog_snapshot')
+    if snapshot is not None and not search:
+        product_ids = snapshot.get().query(
+            category=category,
+            merchant=merchant,
+            deals=deals in {'1', 'true', 'yes'},
+            min_price=min_price,
+            max_price=max_price,
+            min_rating=min_rating,
+            sort=sort,
+            limit=limit
+        )
+        products = hydrate_products(product_ids)
+    elif search_fallback:
         base_query = Product.query
         if category:
             base_query = base_query.filter_by(category=category)
@@ -878,13 +605,25 @@ def get_products():
 
         products = query.all()
 
+    facets = None
+    if include_facets:
+        facet_key = (category, merchant, deals, min_price, max_price, min_rating, search)
+        if search_fallback:
+            facets = cached_facets(current_app, facet_key, lambda: facet_counts_for_products(products))
+        else:
+            facets = cached_facets(current_app, facet_key, lambda: facet_counts_for_query(query))
+
     if limit:
         products = products[:limit]
 
-    return jsonify([product.to_dict() for product in products]), 200
+    payload = [product.to_dict() for product in products]
+    if include_facets:
+        return jsonify({'products': payload, 'facets': facets}), 200
+    return jsonify(payload), 200
 
 
 @products_bp.route('/suggestions', methods=['GET'])
+@replica_reads
 def product_suggestions():
     search = (request.args.get('q') or '').strip()
     limit = request.args.get('limit', type=int) or 8
@@ -892,41 +631,12 @@ def product_suggestions():
     if not search:
         return jsonify([]), 200
 
-    search_like = f"%{search}%"
-    products = Product.query.filter(
-        or_(
-            Product.name.ilike(search_like),
-            Product.category.ilike(search_like),
-            Product.merchant.ilike(search_like)
-        )
-    ).order_by(Product.review_count.desc(), Product.created_at.desc()).limit(limit).all()
-
-    if not products:
-        candidates = Product.query.limit(300).all()
-        scored = [(fuzzy_score(search, product), product) for product in candidates]
-        scored = [item for item in scored if item[0] >= 0.5]
-        scored.sort(key=lambda item: item[0], reverse=True)
-        products = [product for _, product in scored[:limit]]
-
-    suggestions = []
-    seen = set()
-    for product in products:
-        for text in [product.name, product.category]:
-            value = (text or '').strip()
-            key = value.lower()
-            if not value or key in seen:
-                continue
-            seen.add(key)
-            suggestions.append(value)
-            if len(suggestions) >= limit:
-                break
-        if len(suggestions) >= limit:
-            break
-
+    suggestions = current_app.extensions['product_autocomplete'].get().suggest(search, limit)
     return jsonify(suggestions), 200
 
 
 @products_bp.route('/compare', methods=['POST'])
+@replica_reads
 def compare_products():
     data = request.get_json(silent=True) or {}
     product_ids = data.get('product_ids') or []
@@ -946,43 +656,45 @@ def compare_products():
     if len(normalized_ids) > 4:
         return jsonify({'error': 'You can compare up to 4 products at a time'}), 400
 
-    products = Product.query.filter(Product.id.in_(normalized_ids)).all()
-    by_id = {product.id: product for product in products}
-    ordered = [by_id[item_id] for item_id in normalized_ids if item_id in by_id]
-    if len(ordered) < 2:
+    def compute():
+        products = Product.query.filter(Product.id.in_(normalized_ids)).order_by(Product.id.asc()).all()
+        scores = {product.id: product_score(current_app, product) for product in products}
+        return {
+            'rows': {product.id: comparison_row(product, scores[product.id]) for product in products},
+            'summary': build_comparison_summary(products, scores)
+        }
+
+    comparison = cached_comparison(current_app, normalized_ids, compute)
+    matrix = [comparison['rows'][item_id] for item_id in normalized_ids if item_id in comparison['rows']]
+    if len(matrix) < 2:
         return jsonify({'error': 'Selected products not found'}), 404
 
-    matrix = []
-    for product in ordered:
-        current_price = product.deal_price if product.deal_price is not None else product.price
-        discount_pct = None
-        if product.original_price and product.deal_price and product.original_price > 0:
-            discount_pct = round(((product.original_price - product.deal_price) / product.original_price) * 100, 1)
-
-        matrix.append({
-            'id': product.id,
-            'name': product.name,
-            'merchant': product.merchant,
-            'category': product.category,
-            'current_price': current_price,
-            'list_price': product.original_price or product.price,
-            'discount_pct': discount_pct,
-            'rating': product.rating,
-            'review_count': product.review_count,
-            'description': product.description,
-            'stock': product.stock,
-            'affiliate_url': product.affiliate_url,
-            'image_url': product.image_url,
-            'score': round(comparison_score(product), 2)
-        })
-
-    summary = build_comparison_summary(ordered)
     return jsonify({
         'products': matrix,
-        'summary': summary
+        'summary': comparison['summary']
     }), 200
 
+
+@products_bp.route('/best-value', methods=['GET'])
+@replica_reads
+def best_value_products():
+    """Top products by comparison score, optionally within one category."""
+    category = (request.args.get('category') or '').strip() or None
+    limit = request.args.get('limit', type=int) or 10
+    limit = max(1, min(limit, 50))
+
+    ranked = current_app.extensions['product_scores'].get().top(category, limit)
+    products = hydrate_products([product_id for product_id, _ in ranked])
+    scores = dict(ranked)
+    payload = []
+    for product in products:
+        data = product.to_dict()
+        data['score'] = round(scores[product.id], 2)
+        payload.append(data)
+    return jsonify(payload), 200
+
 @products_bp.route('/<int:product_id>', methods=['GET'])
+@replica_reads
 def get_product(product_id):
     """Get single product"""
     product = Product.query.get(product_id)
@@ -992,6 +704,7 @@ def get_product(product_id):
 
 
 @products_bp.route('/<int:product_id>/reviews', methods=['GET'])
+@replica_reads
 def get_product_reviews(product_id):
     product = Product.query.get(product_id)
     if not product:
@@ -1122,6 +835,86 @@ def moderate_review(review_id):
 
     return jsonify({'ok': True, 'review': review.to_dict()}), 200
 
+
+@admin_bp.route('/analytics', methods=['GET'])
+def admin_analytics():
+    auth_error = require_admin_key()
+    if auth_error:
+        return auth_error
+
+    days = request.args.get('days', type=int) or 30
+    return jsonify(analytics_summary(days)), 200
+
+
+def profiling_gate():
+    auth_error = require_admin_key()
+    if auth_error:
+        return auth_error
+    if 'request_profiles' not in current_app.extensions:
+        return jsonify({'error': 'Profiling is disabled'}), 404
+    return None
+
+
+@admin_bp.route('/profiling/requests', methods=['GET'])
+def list_request_profiles():
+    gate_error = profiling_gate()
+    if gate_error:
+        return gate_error
+    return jsonify(current_app.extensions['request_profiles'].list()), 200
+
+
+@admin_bp.route('/profiling/requests/<profile_id>', methods=['GET'])
+def get_request_profile(profile_id):
+    gate_error = profiling_gate()
+    if gate_error:
+        return gate_error
+
+    profile = current_app.extensions['request_profiles'].get(profile_id)
+    if not profile:
+        return jsonify({'error': 'Profile not found'}), 404
+
+    output_format = request.args.get('format', 'json')
+    if output_format == 'collapsed':
+        return Response(profile['collapsed'], mimetype='text/plain')
+    if output_format == 'text':
+        return Response(profile['text'], mimetype='text/plain')
+    return jsonify(profile), 200
+
+
+@admin_bp.route('/profiling/sample', methods=['POST'])
+def start_stack_sampling():
+    gate_error = profiling_gate()
+    if gate_error:
+        return gate_error
+
+    data = request.get_json(silent=True) or {}
+    try:
+        seconds = float(data.get('seconds', 10))
+        interval_ms = float(data.get('interval_ms', 10))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'seconds and interval_ms must be numbers'}), 400
+    if not 0 < seconds <= MAX_SAMPLING_SECONDS:
+        return jsonify({'error': f'seconds must be between 0 and {MAX_SAMPLING_SECONDS}'}), 400
+    if not 1 <= interval_ms <= 1000:
+        return jsonify({'error': 'interval_ms must be between 1 and 1000'}), 400
+
+    sampler = current_app.extensions['stack_sampler']
+    if not sampler.start(seconds, interval_ms / 1000):
+        return jsonify({'error': 'A sampling run is already in progress', 'sampling': sampler.status()}), 409
+    return jsonify({'ok': True, 'sampling': sampler.status()}), 202
+
+
+@admin_bp.route('/profiling/sample', methods=['GET'])
+def stack_sampling_result():
+    gate_error = profiling_gate()
+    if gate_error:
+        return gate_error
+
+    sampler = current_app.extensions['stack_sampler']
+    if request.args.get('format') == 'collapsed':
+        return Response(sampler.collapsed(), mimetype='text/plain')
+    return jsonify(sampler.status()), 200
+
 @products_bp.route('/', methods=['POST'])
 def create_product():
     """Create a new product (admin)"""
@@ -0,0 +1,94 @@
+from flask import Blueprint, jsonify, request
+from app import db
+from app.models import Cart, CartItem, Product
+from app.routes.orders import MAX_LINE_QUANTITY
+from app.services.carts import (
+    add_to_cart,
+    empty_cart_items,
+    find_cart_item,
+    load_cart,
+    remove_cart_item,
+    set_item_quantity
+)
+
+cart_bp = Blueprint('cart', __name__)
+
+
+def requested_quantity(data, default=None):
+    """Positive integer quantity from the request body, or None if invalid."""
+    try:
+        quantity = int(data.get('quantity', default))
+    except (TypeError, ValueError):
+        return None
+    return quantity if 0 < quantity <= MAX_LINE_QUANTITY else None
+
+
+def stock_error(product, quantity):
+    if product.stock is not None and quantity > product.stock:
+        return jsonify({'error': f'Only {product.stock} left in stock', 'product_id': product.id}), 409
+    return None
+
+
+@cart_bp.route('/<string:session_id>', methods=['GET'])
+def get_cart(session_id):
+    return jsonify(load_cart(session_id)), 200
+
+
+@cart_bp.route('/<string:session_id>/add', methods=['POST'])
+def add_cart_item(session_id):
+    data = request.get_json(silent=True) or {}
+    quantity = requested_quantity(data, default=1)
+    if quantity is None:
+        return jsonify({'error': f'Quantity must be between 1 and {MAX_LINE_QUANTITY}'}), 400
+    try:
+        product_id = int(data.get('product_id'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'product_id is required'}), 400
+
+    product = db.session.get(Product, product_id)
+    if not product:
+        return jsonify({'error': 'Product not found'}), 404
+
+    in_cart = db.session.query(CartItem.quantity).join(Cart, Cart.id == CartItem.cart_id).filter(
+        CartItem.product_id == product_id, Cart.session_id == session_id
+    ).scalar() or 0
+    error = stock_error(product, in_cart + quantity)
+    if error:
+        return error
+
+    add_to_cart(session_id, product, quantity)
+    return jsonify(load_cart(session_id)), 200
+
+
+@cart_bp.route('/<string:session_id>/items/<int:item_id>', methods=['PATCH'])
+def update_cart_item(session_id, item_id):
+    item = find_cart_item(session_id, item_id)
+    if not item:
+        return jsonify({'error': 'Cart item not found'}), 404
+
+    quantity = requested_quantity(request.get_json(silent=True) or {})
+    if quantity is None:
+        return jsonify({'error': f'Quantity must be between 1 and {MAX_LINE_QUANTITY}'}), 400
+    error = stock_error(item.product, quantity)
+    if error:
+        return error
+
+    set_item_quantity(item, quantity)
+    return jsonify(load_cart(session_id)), 200
+
+
+@cart_bp.route('/<string:session_id>/remove/<int:item_id>', methods=['DELETE'])
+def delete_cart_item(session_id, item_id):
+    item = find_cart_item(session_id, item_id)
+    if not item:
+        return jsonify({'error': 'Cart item not found'}), 404
+
+    remove_cart_item(item)
+    return jsonify(load_cart(session_id)), 200
+
+
+@cart_bp.route('/<string:session_id>/clear', methods=['DELETE'])
+def clear_cart(session_id):
+    empty_cart_items(session_id)
+    db.session.commit()
+    return jsonify(load_cart(session_id)), 200
@@ -0,0 +1,132 @@
+from flask import Blueprint, jsonify, request
+from app import db
+from app.models import Order
+from app.routes import is_admin_authorized, require_admin_key
+from app.services.checkout import (
+    CheckoutError,
+    cart_quantities,
+    confirm_payment,
+    place_order,
+    release_reservation
+)
+from app.services.rate_limit import rate_limited
+
+orders_bp = Blueprint('orders', __name__)
+
+CUSTOMER_FIELDS = ('customer_name', 'customer_email', 'customer_phone')
+PAYMENT_STATUSES = {'awaiting', 'manual_pending', 'completed', 'failed'}
+# Allowed previous statuses for each admin status change
+STATUS_TRANSITIONS = {
+    'shipped': {'confirmed'},
+    'delivered': {'shipped'},
+}
+MAX_LINE_QUANTITY = 100
+
+
+def parse_order_items(items):
+    """Validate ``[{product_id, quantity}]`` into ``{product_id: quantity}``; returns (quantities, error)."""
+    if not isinstance(items, list):
+        return None, 'Items must be a list'
+    quantities = {}
+    for item in items:
+        try:
+            product_id = int(item.get('product_id'))
+            quantity = int(item.get('quantity', 1))
+        except (AttributeError, TypeError, ValueError):
+            return None, 'Each item needs a numeric product_id and quantity'
+        if quantity <= 0:
+            return None, 'Quantity must be greater than zero'
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+        if quantities[product_id] > MAX_LINE_QUANTITY:
+            return None, f'At most {MAX_LINE_QUANTITY} of a product per order'
+    return quantities, None
+
+
+@orders_bp.route('/', methods=['POST'])
+@rate_limited('checkout', account_field='customer_email')
+def create_order():
+    data = request.get_json(silent=True) or {}
+    customer = {field: (data.get(field) or '').strip() for field in CUSTOMER_FIELDS}
+    customer['customer_email'] = customer['customer_email'].lower()
+
+    if not customer['customer_name']:
+        return jsonify({'error': 'Name is required'}), 400
+    if not customer['customer_email'] or '@' not in customer['customer_email']:
+        return jsonify({'error': 'Valid email is required'}), 400
+    if not customer['customer_phone']:
+        return jsonify({'error': 'Phone is required'}), 400
+
+    session_id = (data.get('session_id') or '').strip() or None
+    if data.get('items') is not None:
+        quantities, error = parse_order_items(data['items'])
+        if error:
+            return jsonify({'error': error}), 400
+        session_id = None
+    elif session_id:
+        quantities = cart_quantities(session_id)
+    else:
+        return jsonify({'error': 'A session_id or items are required'}), 400
+    if not quantities:
+        return jsonify({'error': 'Cart is empty'}), 400
+
+    try:
+        order = place_order(customer, quantities, session_id=session_id)
+    except CheckoutError as error:
+        return jsonify({'error': str(error), 'product_id': error.product_id}), error.status
+
+    return jsonify(order.to_dict()), 201
+
+
+@orders_bp.route('/<string:order_number>', methods=['GET'])
+def get_order(order_number):
+    order = Order.query.filter_by(order_number=order_number).first()
+    if not order:
+        return jsonify({'error': 'Order not found'}), 404
+
+    if not is_admin_authorized():
+        email = (request.args.get('email') or '').strip().lower()
+        if not email or email != (order.customer_email or '').lower():
+            return jsonify({'error': 'Email mismatch for order lookup'}), 403
+
+    return jsonify(order.to_dict()), 200
+
+
+@orders_bp.route('/<int:order_id>/status', methods=['PATCH'])
+def update_order_status(order_id):
+    auth_error = require_admin_key()
+    if auth_error:
+        return auth_error
+
+    order = db.session.get(Order, order_id)
+    if not order:
+        return jsonify({'error': 'Order not found'}), 404
+
+    data = request.get_json(silent=True) or {}
+    next_status = (data.get('status') or '').strip().lower()
+    payment_status = (data.get('payment_status') or '').strip().lower()
+    if payment_status and payment_status not in PAYMENT_STATUSES:
+        return jsonify({'error': 'Invalid payment status'}), 400
+
+    if payment_status == 'completed' or next_status == 'confirmed':
+        if not confirm_payment(order_id):
+            return jsonify({'error': 'Only pending orders can be confirmed'}), 409
+    elif next_status == 'cancelled':
+        if not release_reservation(order_id, 'cancelled'):
+            return jsonify({'error': 'Only pending orders can be cancelled'}), 409
+    elif next_status:
+        if next_status not in STATUS_TRANSITIONS:
+            return jsonify({'error': 'Invalid status'}), 400
+        if order.status not in STATUS_TRANSITIONS[next_status]:
+            return jsonify({'error': f'Cannot move a {order.status} order to {next_status}'}), 409
+        order.status = next_status
+        db.session.commit()
+    elif payment_status:
+        if order.status != 'pending':
+            return jsonify({'error': 'Payment status can only change while the order is pending'}), 409
+        order.payment_status = payment_status
+        db.session.commit()
+    else:
+        return jsonify({'error': 'status or payment_status is required'}), 400
+
+    db.session.refresh(order)
+    return jsonify({'ok': True, 'order': order.to_dict()}), 200
@@ -1,10 +1,8 @@
 from flask_mail import Message
 from app import mail, db
+from app.identifiers import new_identifier
 from app.models import Order
 import os
-from datetime import datetime
-import random
-import string
 
 def send_order_alert_to_admin(order):
     """Send email alert to admin about new order"""
@@ -60,7 +58,5 @@ def send_order_confirmation_to_customer(order):
         return False
 
 def generate_order_number():
-    """Generate unique order number"""
-    timestamp = datetime.utcnow().strftime('%Y%m%d')
-    random_suffix = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-    return f"ORD-{timestamp}-{random_suffix}"
+    """Generate unique, time-ordered order number"""
+    return new_identifier('ORD')
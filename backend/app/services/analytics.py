@@ -0,0 +1,233 @@
+from datetime import date, datetime, timedelta
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import delete, func, select
+from app import db
+from app.models import AnalyticsCheckpoint, AnalyticsRollup, Order, OrderItem, Product, Review, SupportTicket
+from app.services.outbox import run_periodically
+
+CHECKPOINT = 'daily_rollups'
+# Rows committed slightly out of updated_at order are picked up by the next run
+CHECKPOINT_OVERLAP = timedelta(minutes=5)
+# Orders that never turned into sales are left out of product and category figures
+UNSOLD_STATUSES = ('cancelled', 'expired')
+SOURCES = (Order, Review, SupportTicket)
+MAX_WINDOW_DAYS = 366
+TOP_LIMIT = 10
+
+
+def as_date(value):
+    """``date()`` returns a date on PostgreSQL and an ISO string on SQLite."""
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def day_bounds(first_day, last_day):
+    return datetime.combine(first_day, datetime.min.time()), datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+
+
+def aggregate_days(first_day, last_day):
+    """Rollup rows for every day in ``[first_day, last_day]`` (UTC), grouped in SQL."""
+    start, end = day_bounds(first_day, last_day)
+    rows = []
+
+    order_day = func.date(Order.created_at)
+    for day, status, orders, revenue in db.session.execute(
+        select(order_day, Order.status, func.count(Order.id), func.sum(Order.total_amount))
+        .where(Order.created_at >= start, Order.created_at < end)
+        .group_by(order_day, Order.status)
+    ):
+        rows.append({'day': as_date(day), 'metric': 'orders', 'dimension': status or 'pending',
+                     'count': orders, 'quantity': 0, 'amount': revenue or 0.0})
+    units = {}
+    for day, status, quantity in db.session.execute(
+        select(order_day, Order.status, func.sum(OrderItem.quantity))
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .where(Order.created_at >= start, Order.created_at < end)
+        .group_by(order_day, Order.status)
+    ):
+        units[(as_date(day), status or 'pending')] = quantity or 0
+    for row in rows:
+        row['quantity'] = units.get((row['day'], row['dimension']), 0)
+
+    sold = (Order.created_at >= start, Order.created_at < end, Order.status.notin_(UNSOLD_STATUSES))
+    revenue = func.sum(OrderItem.price * OrderItem.quantity)
+    for day, product_id, lines, quantity, amount in db.session.execute(
+        select(order_day, OrderItem.product_id, func.count(OrderItem.id), func.sum(OrderItem.quantity), revenue)
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .where(*sold)
+        .group_by(order_day, OrderItem.product_id)
+    ):
+        rows.append({'day': as_date(day), 'metric': 'products', 'dimension': str(product_id or 0),
+                     'count': lines, 'quantity': quantity or 0, 'amount': amount or 0.0})
+    category = func.coalesce(Product.category, 'Uncategorized')
+    for day, category_name, lines, quantity, amount in db.session.execute(
+        select(order_day, category, func.count(OrderItem.id), func.sum(OrderItem.quantity), revenue)
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+        .where(*sold)
+        .group_by(order_day, category)
+    ):
+        rows.append({'day': as_date(day), 'metric': 'categories', 'dimension': category_name,
+                     'count': lines, 'quantity': quantity or 0, 'amount': amount or 0.0})
+
+    for metric, model, column in (('reviews', Review, Review.moderation_status), ('tickets', SupportTicket, SupportTicket.status)):
+        model_day = func.date(model.created_at)
+        for day, status, count in db.session.execute(
+            select(model_day, column, func.count(model.id))
+            .where(model.created_at >= start, model.created_at < end)
+            .group_by(model_day, column)
+        ):
+            rows.append({'day': as_date(day), 'metric': metric, 'dimension': status or 'unknown',
+                         'count': count, 'quantity': 0, 'amount': 0.0})
+    return rows
+
+
+def rebuild_days(days):
+    """Replace the rollups of ``days`` with fresh aggregates, in one transaction."""
+    if not days:
+        return 0
+    days = set(days)
+    rows = [row for row in aggregate_days(min(days), max(days)) if row['day'] in days]
+    ordered_days = sorted(days)
+    for start in range(0, len(ordered_days), 500):
+        db.session.execute(delete(AnalyticsRollup).where(AnalyticsRollup.day.in_(ordered_days[start:start + 500])))
+    if rows:
+        db.session.execute(AnalyticsRollup.__table__.insert(), rows)
+    return len(rows)
+
+
+def changed_days(since):
+    """Creation days of orders, reviews and tickets written since ``since``."""
+    days = set()
+    for model in SOURCES:
+        model_day = func.date(model.created_at)
+        days.update(as_date(day) for day in db.session.execute(
+            select(model_day).where(model.updated_at >= since).distinct()
+        ).scalars())
+    return days
+
+
+def all_days():
+    first = [db.session.execute(select(func.min(model.created_at))).scalar() for model in SOURCES]
+    first = [value for value in first if value is not None]
+    if not first:
+        return set()
+    first_day = min(first).date()
+    return {first_day + timedelta(days=offset) for offset in range((datetime.utcnow().date() - first_day).days + 1)}
+
+
+def compact_rollups(full=False, now=None):
+    """Fold writes since the last run into the daily rollups. Returns the days rebuilt.
+
+    Only days that own a row written since the checkpoint are recomputed, so a
+    run costs the same whatever the size of the history. The first run (or
+    ``full``) rebuilds everything.
+    """
+    now = now or datetime.utcnow()
+    checkpoint = db.session.get(AnalyticsCheckpoint, CHECKPOINT)
+    try:
+        if full or checkpoint is None:
+            days = all_days()
+            db.session.execute(delete(AnalyticsRollup))
+        else:
+            days = changed_days(checkpoint.value - CHECKPOINT_OVERLAP)
+        rebuild_days(days)
+        if checkpoint is None:
+            db.session.add(AnalyticsCheckpoint(name=CHECKPOINT, value=now))
+        else:
+            checkpoint.value = now
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return sorted(days)
+
+
+def analytics_summary(days=30, today=None):
+    """Dashboard figures for the last ``days`` days, read only from the rollup table."""
+    days = max(1, min(int(days), MAX_WINDOW_DAYS))
+    last_day = today or datetime.utcnow().date()
+    first_day = last_day - timedelta(days=days - 1)
+    in_window = (AnalyticsRollup.day >= first_day, AnalyticsRollup.day <= last_day)
+
+    daily = {first_day + timedelta(days=offset): {'orders': 0, 'revenue': 0.0, 'units': 0} for offset in range(days)}
+    orders_by_status = {}
+    for day, status, count, quantity, amount in db.session.execute(
+        select(AnalyticsRollup.day, AnalyticsRollup.dimension, AnalyticsRollup.count, AnalyticsRollup.quantity,
+               AnalyticsRollup.amount)
+        .where(AnalyticsRollup.metric == 'orders', *in_window)
+    ):
+        totals = orders_by_status.setdefault(status, {'orders': 0, 'revenue': 0.0, 'units': 0})
+        totals['orders'] += count
+        totals['revenue'] += amount
+        totals['units'] += quantity
+        if status not in UNSOLD_STATUSES:
+            entry = daily[as_date(day)]
+            entry['orders'] += count
+            entry['revenue'] += amount
+            entry['units'] += quantity
+
+    def top(metric):
+        return db.session.execute(
+            select(AnalyticsRollup.dimension, func.sum(AnalyticsRollup.quantity), func.sum(AnalyticsRollup.amount))
+            .where(AnalyticsRollup.metric == metric, *in_window)
+            .group_by(AnalyticsRollup.dimension)
+            .order_by(func.sum(AnalyticsRollup.amount).desc())
+            .limit(TOP_LIMIT)
+        ).all()
+
+    def counts(metric):
+        return dict(db.session.execute(
+            select(AnalyticsRollup.dimension, func.sum(AnalyticsRollup.count))
+            .where(AnalyticsRollup.metric == metric, *in_window)
+            .group_by(AnalyticsRollup.dimension)
+        ).all())
+
+    top_products = top('products')
+    product_ids = [int(product_id) for product_id, _, _ in top_products if product_id.isdigit()]
+    names = dict(db.session.execute(select(Product.id, Product.name).where(Product.id.in_(product_ids))).all()) if product_ids else {}
+    checkpoint = db.session.get(AnalyticsCheckpoint, CHECKPOINT)
+
+    return {
+        'from': first_day.isoformat(),
+        'to': last_day.isoformat(),
+        'daily': [
+            {'date': day.isoformat(), 'orders': entry['orders'], 'revenue': round(entry['revenue'], 2), 'units': entry['units']}
+            for day, entry in sorted(daily.items())
+        ],
+        'orders_by_status': {
+            status: {**totals, 'revenue': round(totals['revenue'], 2)} for status, totals in sorted(orders_by_status.items())
+        },
+        'top_products': [
+            {'product_id': int(product_id), 'name': names.get(int(product_id), f'Product #{product_id}'),
+             'units': units or 0, 'revenue': round(amount or 0.0, 2)}
+            for product_id, units, amount in top_products
+        ],
+        'top_categories': [
+            {'category': category, 'units': units or 0, 'revenue': round(amount or 0.0, 2)}
+            for category, units, amount in top('categories')
+        ],
+        'reviews_by_status': counts('reviews'),
+        'tickets_by_status': counts('tickets'),
+        'rolled_up_at': checkpoint.value.isoformat() if checkpoint else None
+    }
+
+
+@click.command('rollup-analytics')
+@click.option('--full', is_flag=True, help='Rebuild every day instead of only the changed ones.')
+@click.option('--every', type=float, default=None, help='Keep running, compacting every N seconds.')
+@with_appcontext
+def rollup_analytics_command(full, every):
+    """Update the daily analytics rollups."""
+    rebuild_all = [full]
+
+    def job():
+        days = compact_rollups(full=rebuild_all.pop() if rebuild_all else False)
+        if days:
+            click.echo(f'Rolled up {len(days)} day(s)')
+
+    run_periodically(job, every)
+
+
+def init_analytics(app):
+    app.cli.add_command(rollup_analytics_command)
@@ -0,0 +1,239 @@
+import gc
+import heapq
+import re
+import threading
+from app import db
+from app.models import Product
+from app.services.catalog_events import CatalogIndex
+
+WORD_START_PATTERN = re.compile(r'(?:^|(?<=[\s\-_/&,.]))\w')
+TOP_K = 20
+MAX_KEY_LENGTH = 24
+
+
+def normalize_term(value):
+    return re.sub(r'\s+', ' ', (value or '').strip().lower())
+
+
+def term_keys(term):
+    """Index the whole term plus every word start, so "headph" finds "Wireless Headphones".
+
+    Keys are capped at MAX_KEY_LENGTH; longer queries are filtered after lookup.
+    """
+    return {term[match.start():match.start() + MAX_KEY_LENGTH] for match in WORD_START_PATTERN.finditer(term)}
+
+
+def max_typos(query):
+    if len(query) >= 8:
+        return 2
+    if len(query) >= 4:
+        return 1
+    return 0
+
+
+class TrieNode:
+    __slots__ = ('children', 'terminal', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.terminal = set()
+        self.top = []
+
+
+class ProductAutocomplete:
+    """Popularity-weighted prefix trie over product names, categories and merchants.
+
+    Every node caches its top-k term ids by weight, so a prefix lookup costs
+    O(len(prefix) + k). A term's weight is the summed popularity of the
+    products that carry it (review count plus one). Updates and lookups hold
+    ``lock``, since updates reshape nodes that lookups walk.
+    """
+
+    def __init__(self, top_k=TOP_K):
+        self.lock = threading.RLock()
+        self.top_k = top_k
+        self.root = TrieNode()
+        self.term_ids = {}
+        self.terms = []
+        self.normalized_terms = []
+        self.term_sources = []
+        self.weights = []
+        self.product_terms = {}
+
+    def rank_key(self, term_id):
+        return (-self.weights[term_id], self.normalized_terms[term_id])
+
+    def _term_id(self, display):
+        key = normalize_term(display)
+        term_id = self.term_ids.get(key)
+        if term_id is None:
+            term_id = len(self.terms)
+            self.term_ids[key] = term_id
+            self.terms.append(display.strip())
+            self.normalized_terms.append(key)
+            self.term_sources.append({})
+            self.weights.append(0)
+        return term_id
+
+    def _path(self, key, create=False):
+        nodes = [self.root]
+        node = self.root
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[char] = TrieNode()
+            node = child
+            nodes.append(node)
+        return nodes
+
+    def _refresh_node(self, node):
+        candidates = set(node.terminal)
+        for child in node.children.values():
+            candidates.update(child.top)
+        top = heapq.nsmallest(self.top_k, candidates, key=self.rank_key)
+        changed = top != node.top
+        node.top = top
+        return changed
+
+    def _refresh_path(self, nodes, term_id):
+        for node in reversed(nodes):
+            # Ancestors only depend on this node's top-k; stop once it is unaffected.
+            if not self._refresh_node(node) and term_id not in node.top:
+                break
+
+    def _index_term(self, term_id, refresh=True):
+        indexed = self.weights[term_id] > 0
+        for key in term_keys(self.normalized_terms[term_id]):
+            nodes = self._path(key, create=indexed)
+            if nodes is None:
+                continue
+            if indexed:
+                nodes[-1].terminal.add(term_id)
+            else:
+                nodes[-1].terminal.discard(term_id)
+            if refresh:
+                self._refresh_path(nodes, term_id)
+
+    def _set_term_weight(self, term_id, product_id, weight):
+        sources = self.term_sources[term_id]
+        previous = sources.pop(product_id, 0)
+        if weight is not None:
+            sources[product_id] = weight
+        self.weights[term_id] += (weight or 0) - previous
+
+    def _product_term_ids(self, name, category, merchant):
+        return {self._term_id(value) for value in (name, category, merchant) if value and value.strip()}
+
+    def add_product(self, product_id, name, category, merchant, review_count):
+        with self.lock:
+            self.remove_product(product_id)
+            term_ids = self._product_term_ids(name, category, merchant)
+            self.product_terms[product_id] = term_ids
+            for term_id in term_ids:
+                self._set_term_weight(term_id, product_id, (review_count or 0) + 1)
+                self._index_term(term_id)
+
+    def remove_product(self, product_id):
+        with self.lock:
+            for term_id in self.product_terms.pop(product_id, ()):
+                self._set_term_weight(term_id, product_id, None)
+                self._index_term(term_id)
+
+    def load(self, rows):
+        """Bulk build from (id, name, category, merchant, review_count) rows."""
+        # The build allocates one node per indexed character; cyclic GC passes
+        # over that many fresh objects dominate build time, and nothing here is cyclic.
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with self.lock:
+                self._load(rows)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def _load(self, rows):
+        for product_id, name, category, merchant, review_count in rows:
+            term_ids = self._product_term_ids(name, category, merchant)
+            self.product_terms[product_id] = term_ids
+            for term_id in term_ids:
+                self._set_term_weight(term_id, product_id, (review_count or 0) + 1)
+        for term_id in range(len(self.terms)):
+            self._index_term(term_id, refresh=False)
+
+        # Post-order pass so each node's top-k is computed once.
+        stack = [(self.root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                self._refresh_node(node)
+                continue
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.children.values())
+
+    def prefix(self, query, limit):
+        query = normalize_term(query)
+        nodes = self._path(query[:MAX_KEY_LENGTH])
+        if nodes is None:
+            return []
+        term_ids = nodes[-1].top
+        if len(query) > MAX_KEY_LENGTH:
+            term_ids = [term_id for term_id in term_ids if query in self.normalized_terms[term_id]]
+        return [self.terms[term_id] for term_id in term_ids[:limit]]
+
+    def fuzzy(self, query, limit, max_distance):
+        """Prefix match allowing ``max_distance`` edits (Levenshtein rows walked over the trie)."""
+        query = normalize_term(query)[:MAX_KEY_LENGTH]
+        matches = set()
+        first_row = list(range(len(query) + 1))
+
+        def walk(node, char, previous_row):
+            row = [previous_row[0] + 1]
+            for index, query_char in enumerate(query, start=1):
+                row.append(min(
+                    row[index - 1] + 1,
+                    previous_row[index] + 1,
+                    previous_row[index - 1] + (query_char != char)
+                ))
+            if row[-1] <= max_distance:
+                matches.update(node.top)
+                return
+            if min(row) > max_distance:
+                return
+            for next_char, child in node.children.items():
+                walk(child, next_char, row)
+
+        for char, child in self.root.children.items():
+            walk(child, char, first_row)
+        return [self.terms[term_id] for term_id in sorted(matches, key=self.rank_key)[:limit]]
+
+    def suggest(self, query, limit=8):
+        with self.lock:
+            results = self.prefix(query, limit)
+            if not results:
+                distance = max_typos(normalize_term(query))
+                if distance:
+                    results = self.fuzzy(query, limit, distance)
+        return results
+
+
+def build_product_autocomplete():
+    index = ProductAutocomplete()
+    index.load(db.session.query(
+        Product.id, Product.name, Product.category, Product.merchant, Product.review_count
+    ).all())
+    return index
+
+
+def apply_product_changes(index, upserted, deleted_ids):
+    for product_id in deleted_ids:
+        index.remove_product(product_id)
+    for product_id, row in upserted.items():
+        index.add_product(product_id, row['name'], row['category'], row['merchant'], row['review_count'])
+
+
+def init_product_autocomplete(app):
+    """Keep the trie in ``app.extensions['product_autocomplete']``; read it through ``.get()``."""
+    app.extensions['product_autocomplete'] = CatalogIndex(app, build_product_autocomplete, apply_product_changes)
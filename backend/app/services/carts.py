@@ -0,0 +1,226 @@
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, inspect, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import Cart, CartItem, Product
+from app.services.outbox import run_periodically
+
+
+def empty_cart():
+    return {'id': None, 'items': [], 'total': 0.0, 'item_count': 0}
+
+
+def load_cart(session_id):
+    """The cart as returned by the API: lines, slim product fields and running totals, in one query.
+
+    Lines whose product price changed since they were added are shown at the
+    current price, and lines whose product is gone are left out, with the
+    totals recomputed to match. Nothing is written; the mutating endpoints
+    persist the new prices through ``reprice_cart``.
+    """
+    rows = db.session.execute(
+        select(
+            Cart.id.label('cart_id'), Cart.item_count, Cart.total_amount,
+            CartItem.id, CartItem.quantity, CartItem.unit_price,
+            Product.id.label('product_id'), Product.name, Product.price,
+            Product.image_url, Product.stock, Product.category
+        )
+        .select_from(Cart)
+        .outerjoin(CartItem, CartItem.cart_id == Cart.id)
+        .outerjoin(Product, Product.id == CartItem.product_id)
+        .where(Cart.session_id == session_id)
+        .order_by(CartItem.id)
+    ).all()
+    if not rows:
+        return empty_cart()
+
+    stored_lines = [row for row in rows if row.id is not None]
+    lines = [row for row in stored_lines if row.product_id is not None]
+    if any(row.product_id is None or row.price != row.unit_price for row in stored_lines):
+        total = sum(row.price * row.quantity for row in lines)
+        item_count = sum(row.quantity for row in lines)
+    else:
+        total = rows[0].total_amount or 0.0
+        item_count = rows[0].item_count or 0
+
+    return {
+        'id': rows[0].cart_id,
+        'items': [
+            {
+                'id': row.id,
+                'product': {
+                    'id': row.product_id,
+                    'name': row.name,
+                    'price': row.price,
+                    'image_url': row.image_url,
+                    'stock': row.stock,
+                    'category': row.category
+                },
+                'quantity': row.quantity,
+                'subtotal': round(row.price * row.quantity, 2)
+            }
+            for row in lines
+        ],
+        'total': round(total, 2) if lines else 0.0,
+        'item_count': item_count
+    }
+
+
+def reprice_cart(cart_id):
+    """Persist current prices on the cart's stale lines, in the caller's transaction."""
+    stale = db.session.execute(
+        select(
+            CartItem.id, CartItem.quantity, CartItem.unit_price,
+            Product.id.label('product_id'), Product.price
+        )
+        .outerjoin(Product, Product.id == CartItem.product_id)
+        .where(
+            CartItem.cart_id == cart_id,
+            or_(Product.id.is_(None), CartItem.unit_price.is_(None), Product.price != CartItem.unit_price)
+        )
+    ).all()
+    if stale:
+        reprice_lines(cart_id, stale)
+
+
+def reprice_lines(cart_id, rows):
+    """Bring stale lines to the current product price, dropping lines whose product is gone."""
+    quantity_delta = 0
+    amount_delta = 0.0
+    for row in rows:
+        previous = (row.unit_price or 0.0) * row.quantity
+        if row.product_id is None:
+            db.session.execute(delete(CartItem).where(CartItem.id == row.id))
+            quantity_delta -= row.quantity
+            amount_delta -= previous
+        else:
+            db.session.execute(update(CartItem).where(CartItem.id == row.id).values(unit_price=row.price))
+            amount_delta += row.price * row.quantity - previous
+    adjust_totals(cart_id, quantity_delta, amount_delta)
+
+
+def adjust_totals(cart_id, quantity_delta, amount_delta):
+    """Apply a change to the cart's running totals in SQL, so concurrent updates add up."""
+    db.session.execute(
+        update(Cart)
+        .where(Cart.id == cart_id)
+        .values(
+            item_count=Cart.item_count + quantity_delta,
+            total_amount=Cart.total_amount + amount_delta,
+            updated_at=datetime.utcnow()
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def get_or_create_cart(session_id):
+    cart = Cart.query.filter_by(session_id=session_id).first()
+    if cart:
+        return cart
+    cart = Cart(session_id=session_id)
+    db.session.add(cart)
+    try:
+        db.session.flush()
+    except IntegrityError:
+        # Another request created the cart first
+        db.session.rollback()
+        cart = Cart.query.filter_by(session_id=session_id).one()
+    return cart
+
+
+def find_cart_item(session_id, item_id):
+    return (
+        CartItem.query
+        .join(Cart, Cart.id == CartItem.cart_id)
+        .filter(CartItem.id == item_id, Cart.session_id == session_id)
+        .first()
+    )
+
+
+def add_to_cart(session_id, product, quantity):
+    cart = get_or_create_cart(session_id)
+    reprice_cart(cart.id)
+    item = CartItem.query.filter_by(cart_id=cart.id, product_id=product.id).first()
+    if item:
+        # Reprice the existing line along with the added quantity
+        amount_delta = product.price * (item.quantity + quantity) - (item.unit_price or 0.0) * item.quantity
+        item.quantity += quantity
+        item.unit_price = product.price
+    else:
+        amount_delta = product.price * quantity
+        db.session.add(CartItem(cart_id=cart.id, product_id=product.id, quantity=quantity, unit_price=product.price))
+    adjust_totals(cart.id, quantity, amount_delta)
+    db.session.commit()
+
+
+def set_item_quantity(item, quantity):
+    reprice_cart(item.cart_id)
+    delta = quantity - item.quantity
+    item.quantity = quantity
+    adjust_totals(item.cart_id, delta, delta * (item.unit_price or 0.0))
+    db.session.commit()
+
+
+def remove_cart_item(item):
+    reprice_cart(item.cart_id)
+    # Repricing already dropped the line if its product is gone
+    if not inspect(item).was_deleted:
+        adjust_totals(item.cart_id, -item.quantity, -item.quantity * (item.unit_price or 0.0))
+        db.session.delete(item)
+    db.session.commit()
+
+
+def empty_cart_items(session_id):
+    """Delete every line of a cart and zero its totals, in the caller's transaction."""
+    cart_ids = select(Cart.id).where(Cart.session_id == session_id)
+    db.session.execute(
+        delete(CartItem).where(CartItem.cart_id.in_(cart_ids)).execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(Cart)
+        .where(Cart.session_id == session_id)
+        .values(item_count=0, total_amount=0.0, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def purge_abandoned_carts(now=None, batch_size=1000):
+    """Delete carts untouched for CART_RETENTION_DAYS, in batches. Returns the number purged."""
+    cutoff = (now or datetime.utcnow()) - timedelta(days=current_app.config.get('CART_RETENTION_DAYS', 30))
+    purged = 0
+    while True:
+        cart_ids = db.session.execute(
+            select(Cart.id).where(Cart.updated_at < cutoff).order_by(Cart.id).limit(batch_size)
+        ).scalars().all()
+        if not cart_ids:
+            break
+        db.session.execute(
+            delete(CartItem).where(CartItem.cart_id.in_(cart_ids)).execution_options(synchronize_session=False)
+        )
+        db.session.execute(delete(Cart).where(Cart.id.in_(cart_ids)).execution_options(synchronize_session=False))
+        db.session.commit()
+        purged += len(cart_ids)
+        if len(cart_ids) < batch_size:
+            break
+    return purged
+
+
+@click.command('purge-carts')
+@click.option('--batch-size', type=int, default=1000, help='Carts to delete per transaction.')
+@click.option('--every', type=float, default=None, help='Keep running, purging every N seconds.')
+@with_appcontext
+def purge_carts_command(batch_size, every):
+    """Delete abandoned carts older than CART_RETENTION_DAYS."""
+    def job():
+        purged = purge_abandoned_carts(batch_size=batch_size)
+        if purged:
+            click.echo(f'Purged {purged} abandoned cart(s)')
+
+    run_periodically(job, every)
+
+
+def init_carts(app):
+    app.cli.add_command(purge_carts_command)
@@ -0,0 +1,183 @@
+import threading
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import event, select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from app import db
+from app.models import CatalogVersion, Product, ProductImage
+
+PENDING_KEY = 'catalog_changes'
+
+catalog_versions = CatalogVersion.__table__
+
+
+def product_row(product):
+    return {column.key: getattr(product, column.key) for column in Product.__table__.columns}
+
+
+def on_catalog_change(app, listener):
+    """Register ``listener(upserted_rows, deleted_ids, version)`` to run after catalog writes commit.
+
+    ``upserted_rows`` maps product id to a dict of column values and ``version``
+    is the shared catalog version the write committed as (None if unknown).
+    """
+    app.extensions.setdefault('catalog_listeners', []).append(listener)
+
+
+def read_shared_catalog_version():
+    try:
+        with db.engine.connect() as connection:
+            return connection.execute(select(CatalogVersion.version).where(CatalogVersion.id == 1)).scalar() or 0
+    except DBAPIError:
+        return 0
+
+
+def catalog_version(app=None):
+    """Monotonic counter bumped on every committed catalog write by any worker.
+
+    Writes made by this worker are seen at once; the shared ``catalog_versions``
+    row is re-read at most every ``CATALOG_VERSION_SYNC_SECONDS``.
+    """
+    app = app or current_app
+    now = time.monotonic()
+    synced_at = app.extensions.get('catalog_version_synced_at')
+    if synced_at is None or now - synced_at >= app.config.get('CATALOG_VERSION_SYNC_SECONDS', 1):
+        shared = read_shared_catalog_version()
+        app.extensions['catalog_version'] = max(app.extensions.get('catalog_version', 0), shared)
+        app.extensions['catalog_version_synced_at'] = now
+    return app.extensions.get('catalog_version', 0)
+
+
+class CatalogIndex:
+    """An in-process index over the catalog, kept in step with the shared catalog version.
+
+    ``build()`` loads a new index from the database and ``apply_changes(index,
+    upserted_rows, deleted_ids)`` patches it with writes this worker commits.
+    Writes committed by other workers, or in the master before a fork, only
+    move the shared version, so ``get()`` rebuilds the index once that version
+    passes the one it was built or last patched at. Rebuilds swap in a new
+    index; while one runs, other threads keep reading the previous one.
+    """
+
+    def __init__(self, app, build, apply_changes):
+        self.app = app
+        self.build = build
+        self.apply_changes = apply_changes
+        self.lock = threading.Lock()
+        self.index = None
+        self.version = 0
+        with self.lock:
+            self._rebuild()
+        on_catalog_change(app, self.publish)
+
+    def _rebuild(self):
+        with self.app.app_context():
+            # Read the version first so writes committed during the build trigger another rebuild
+            version = read_shared_catalog_version()
+            self.index = self.build()
+        self.version = version
+
+    def is_stale(self):
+        return self.version < catalog_version(self.app)
+
+    def get(self):
+        if self.is_stale() and self.lock.acquire(blocking=False):
+            try:
+                if self.is_stale():
+                    self._rebuild()
+            finally:
+                self.lock.release()
+        return self.index
+
+    def publish(self, upserted, deleted_ids, version):
+        if not self.lock.acquire(blocking=False):
+            # A rebuild is running; if it missed this write, get() sees the index is behind
+            return
+        try:
+            self.apply_changes(self.index, upserted, deleted_ids)
+            # Writes from other workers may have landed in between; only a gapless step keeps it current
+            if version == self.version + 1:
+                self.version = version
+        finally:
+            self.lock.release()
+
+
+def stage_catalog_changes(session, upserted=None, deleted=(), touched=()):
+    """Queue catalog changes on ``session`` to be published when it commits.
+
+    The ORM events below stage flushed changes themselves; Core ``UPDATE``
+    statements (such as stock reservations) bypass them, so their callers stage
+    the refreshed rows before committing.
+    """
+    pending = session.info.setdefault(PENDING_KEY, {'upserted': {}, 'deleted': set(), 'touched': set()})
+    pending['upserted'].update(upserted or {})
+    pending['deleted'].update(deleted)
+    pending['touched'].update(touched)
+
+
+@event.listens_for(Session, 'after_flush')
+def collect_catalog_changes(session, flush_context):
+    upserted = {}
+    deleted = set()
+    touched = set()
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Product) and (obj in session.new or session.is_modified(obj)):
+            upserted[obj.id] = product_row(obj)
+        elif isinstance(obj, ProductImage):
+            touched.add(obj.product_id)
+    for obj in session.deleted:
+        if isinstance(obj, Product):
+            deleted.add(obj.id)
+        elif isinstance(obj, ProductImage):
+            touched.add(obj.product_id)
+
+    if upserted or deleted or touched:
+        stage_catalog_changes(session, upserted, deleted, touched)
+
+
+@event.listens_for(Session, 'before_commit')
+def bump_shared_catalog_version(session):
+    """Bump the shared catalog version inside the transaction that changes the catalog.
+
+    The new version commits or rolls back together with the write, and no
+    second connection is opened per commit.
+    """
+    session.flush()
+    pending = session.info.get(PENDING_KEY)
+    if not pending or 'version' in pending:
+        return
+    pending['version'] = session.execute(
+        update(catalog_versions)
+        .where(catalog_versions.c.id == 1)
+        .values(version=catalog_versions.c.version + 1)
+        .returning(catalog_versions.c.version)
+    ).scalar()
+
+
+@event.listens_for(Session, 'after_commit')
+def dispatch_catalog_changes(session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if not pending or not has_app_context():
+        return
+
+    app = current_app._get_current_object()
+    upserted = {key: row for key, row in pending['upserted'].items() if key not in pending['deleted']}
+    publish_catalog_changes(app, upserted, pending['deleted'], pending.get('version'))
+
+
+def publish_catalog_changes(app, upserted, deleted=frozenset(), version=None):
+    """Record a committed catalog ``version`` in this worker and notify listeners."""
+    local = app.extensions.get('catalog_version', 0)
+    app.extensions['catalog_version'] = local + 1 if version is None else max(local, version)
+    app.extensions['catalog_changed_at'] = time.monotonic()
+    for listener in app.extensions.get('catalog_listeners', []):
+        try:
+            listener(upserted, deleted, version)
+        except Exception:
+            app.logger.exception('Catalog change listener failed')
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_catalog_changes(session):
+    session.info.pop(PENDING_KEY, None)
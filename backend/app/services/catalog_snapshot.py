@@ -0,0 +1,269 @@
+import math
+import threading
+from array import array
+from functools import lru_cache
+from app import db
+from app.models import Product
+from app.services.catalog_events import CatalogIndex
+
+NAN = float('nan')
+HYDRATE_BATCH_SIZE = 500
+
+# column name -> array typecode; NaN / -1 encode SQL NULL
+NUMERIC_COLUMNS = {
+    'id': 'q',
+    'price': 'd',
+    'rating': 'd',
+    'review_count': 'q',
+    'is_deal': 'b',
+    'deal_price': 'd',
+    'original_price': 'd',
+    'created_at': 'd',
+    'category': 'q',
+    'merchant': 'q',
+}
+NUMPY_DTYPES = {'q': 'int64', 'd': 'float64', 'b': 'int8'}
+
+
+@lru_cache(maxsize=None)
+def load_numpy():
+    """NumPy, or None when it isn't installed. Imported only once a snapshot is
+    built, so apps that leave the snapshot off never pay for it."""
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover - numpy is optional
+        return None
+    return numpy
+
+
+def as_float(value):
+    return NAN if value is None else float(value)
+
+
+def is_missing(value):
+    return value != value
+
+
+class CatalogSnapshot:
+    """Read-optimized columnar copy of the filter/sort fields of ``products``.
+
+    Columns are ``array.array`` buffers so rows can be appended and swap-removed
+    in place on catalog writes; with NumPy installed, queries run as vectorized
+    masks and argsort over zero-copy views of those buffers. Only the ids of
+    the requested page are returned, for the caller to hydrate.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.columns = {name: array(typecode) for name, typecode in NUMERIC_COLUMNS.items()}
+        self.names = []
+        self.positions = {}
+        self.codes = {'category': {}, 'merchant': {}}
+
+    def __len__(self):
+        return len(self.names)
+
+    def _code(self, field, value):
+        if not value:
+            return -1
+        codes = self.codes[field]
+        if value not in codes:
+            codes[value] = len(codes)
+        return codes[value]
+
+    def _encode(self, row):
+        created_at = row.get('created_at')
+        review_count = row.get('review_count')
+        return {
+            'id': row['id'],
+            'price': as_float(row.get('price')),
+            'rating': as_float(row.get('rating')),
+            'review_count': -1 if review_count is None else int(review_count),
+            'is_deal': 1 if row.get('is_deal') else 0,
+            'deal_price': as_float(row.get('deal_price')),
+            'original_price': as_float(row.get('original_price')),
+            'created_at': created_at.timestamp() if created_at else NAN,
+            'category': self._code('category', row.get('category')),
+            'merchant': self._code('merchant', row.get('merchant')),
+        }
+
+    def upsert(self, row):
+        values = self._encode(row)
+        with self.lock:
+            position = self.positions.get(row['id'])
+            if position is None:
+                self.positions[row['id']] = len(self.names)
+                for name, column in self.columns.items():
+                    column.append(values[name])
+                self.names.append(row.get('name') or '')
+            else:
+                for name, column in self.columns.items():
+                    column[position] = values[name]
+                self.names[position] = row.get('name') or ''
+
+    def remove(self, product_id):
+        with self.lock:
+            position = self.positions.pop(product_id, None)
+            if position is None:
+                return
+            last = len(self.names) - 1
+            if position != last:
+                moved_id = self.columns['id'][last]
+                for column in self.columns.values():
+                    column[position] = column[last]
+                self.names[position] = self.names[last]
+                self.positions[moved_id] = position
+            for column in self.columns.values():
+                column.pop()
+            self.names.pop()
+
+    def query(self, category=None, merchant=None, deals=False, min_price=None, max_price=None,
+              min_rating=None, sort='newest', limit=None):
+        """Return product ids matching the filters, in the same order as the SQL path."""
+        with self.lock:
+            category_code = self.codes['category'].get(category, -2) if category else None
+            merchant_code = self.codes['merchant'].get(merchant, -2) if merchant else None
+            np = load_numpy()
+            if np is not None:
+                return self._query_numpy(np, category_code, merchant_code, deals, min_price, max_price,
+                                         min_rating, sort, limit)
+            return self._query_python(category_code, merchant_code, deals, min_price, max_price,
+                                      min_rating, sort, limit)
+
+    def _query_numpy(self, np, category_code, merchant_code, deals, min_price, max_price, min_rating, sort, limit):
+        columns = {
+            name: np.frombuffer(column, dtype=NUMPY_DTYPES[column.typecode]) if len(column) else
+            np.empty(0, dtype=NUMPY_DTYPES[column.typecode])
+            for name, column in self.columns.items()
+        }
+        mask = np.ones(len(self.names), dtype=bool)
+        if category_code is not None:
+            mask &= columns['category'] == category_code
+        if merchant_code is not None:
+            mask &= columns['merchant'] == merchant_code
+        if deals:
+            mask &= columns['is_deal'] == 1
+        with np.errstate(invalid='ignore'):
+            if min_price is not None:
+                mask &= columns['price'] >= min_price
+            if max_price is not None:
+                mask &= columns['price'] <= max_price
+            if min_rating is not None:
+                mask &= columns['rating'] >= min_rating
+
+        positions = np.flatnonzero(mask)
+        if sort == 'name_asc':
+            names = [self.names[position] for position in positions]
+            order = sorted(range(len(names)), key=names.__getitem__)
+            positions = positions[order] if len(order) else positions
+        else:
+            key = self._numpy_sort_key(np, columns, positions, sort)
+            if limit and limit < len(positions):
+                # Partial selection of the page, then a stable sort of just that page.
+                candidates = np.argpartition(key, limit - 1)[:limit]
+                positions = positions[candidates[np.argsort(key[candidates], kind='stable')]]
+            else:
+                positions = positions[np.argsort(key, kind='stable')]
+
+        if limit:
+            positions = positions[:limit]
+        return columns['id'][positions].tolist()
+
+    def _numpy_sort_key(self, np, columns, positions, sort):
+        """Ascending float key; NULLs map to +/-inf so they sort where SQLite puts them."""
+        if sort == 'price_asc':
+            values = columns['price'][positions]
+            return np.where(np.isnan(values), -np.inf, values)
+        if sort == 'price_desc':
+            values = columns['price'][positions]
+        elif sort == 'rating_desc':
+            values = columns['rating'][positions]
+        elif sort == 'popular_desc':
+            values = columns['review_count'][positions].astype('float64')
+            values[values < 0] = np.nan
+        elif sort == 'deals_desc':
+            values = columns['original_price'][positions] - columns['deal_price'][positions]
+        else:
+            values = columns['created_at'][positions]
+        return np.where(np.isnan(values), np.inf, -values)
+
+    def _query_python(self, category_code, merchant_code, deals, min_price, max_price, min_rating, sort, limit):
+        columns = self.columns
+        price = columns['price']
+        rating = columns['rating']
+        positions = [
+            position for position in range(len(self.names))
+            if (category_code is None or columns['category'][position] == category_code)
+            and (merchant_code is None or columns['merchant'][position] == merchant_code)
+            and (not deals or columns['is_deal'][position])
+            and (min_price is None or price[position] >= min_price)
+            and (max_price is None or price[position] <= max_price)
+            and (min_rating is None or rating[position] >= min_rating)
+        ]
+
+        def nulls_last_desc(column):
+            def key(position):
+                value = column[position]
+                missing = is_missing(value) or (column.typecode == 'q' and value < 0)
+                return (missing, 0 if missing else -value)
+            return key
+
+        if sort == 'price_asc':
+            positions.sort(key=lambda position: (not is_missing(price[position]), 0 if is_missing(price[position]) else price[position]))
+        elif sort == 'price_desc':
+            positions.sort(key=nulls_last_desc(price))
+        elif sort == 'name_asc':
+            positions.sort(key=self.names.__getitem__)
+        elif sort == 'rating_desc':
+            positions.sort(key=nulls_last_desc(rating))
+        elif sort == 'popular_desc':
+            positions.sort(key=nulls_last_desc(columns['review_count']))
+        elif sort == 'deals_desc':
+            savings = array('d', (
+                columns['original_price'][position] - columns['deal_price'][position]
+                if not math.isnan(columns['original_price'][position]) and not math.isnan(columns['deal_price'][position])
+                else NAN
+                for position in range(len(self.names))
+            ))
+            positions.sort(key=nulls_last_desc(savings))
+        else:
+            positions.sort(key=nulls_last_desc(columns['created_at']))
+
+        if limit:
+            positions = positions[:limit]
+        return [columns['id'][position] for position in positions]
+
+
+def build_catalog_snapshot():
+    snapshot = CatalogSnapshot()
+    fields = ['id', 'name', 'price', 'rating', 'review_count', 'is_deal', 'deal_price',
+              'original_price', 'created_at', 'category', 'merchant']
+    for row in db.session.query(*[getattr(Product, field) for field in fields]).yield_per(5000):
+        snapshot.upsert(dict(zip(fields, row)))
+    return snapshot
+
+
+def hydrate_products(product_ids):
+    """Load ORM rows for ``product_ids`` in one query, preserving the given order."""
+    by_id = {}
+    for start in range(0, len(product_ids), HYDRATE_BATCH_SIZE):
+        batch = product_ids[start:start + HYDRATE_BATCH_SIZE]
+        by_id.update((product.id, product) for product in Product.query.filter(Product.id.in_(batch)).all())
+    return [by_id[product_id] for product_id in product_ids if product_id in by_id]
+
+
+def apply_snapshot_changes(snapshot, upserted, deleted_ids):
+    for product_id in deleted_ids:
+        snapshot.remove(product_id)
+    for row in upserted.values():
+        snapshot.upsert(row)
+
+
+def init_catalog_snapshot(app):
+    """Keep the snapshot in ``app.extensions['catalog_snapshot']``; read it through ``.get()``."""
+    if not app.config.get('CATALOG_SNAPSHOT_ENABLED'):
+        return None
+
+    load_numpy()
+    index = app.extensions['catalog_snapshot'] = CatalogIndex(app, build_catalog_snapshot, apply_snapshot_changes)
+    return index
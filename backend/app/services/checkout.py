@@ -0,0 +1,203 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select, update
+from app import db
+from app.models import Cart, CartItem, Order, OrderItem, Product
+from app.services import generate_order_number
+from app.services.carts import empty_cart_items
+from app.services.catalog_events import stage_catalog_changes
+from app.services.outbox import deliver_outbox_command, enqueue_order_emails, run_periodically
+
+products = Product.__table__
+orders = Order.__table__
+
+
+class CheckoutError(Exception):
+    """A checkout that cannot go ahead; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400, product_id=None):
+        super().__init__(message)
+        self.status = status
+        self.product_id = product_id
+
+
+def reserve_stock(quantities):
+    """Take ``{product_id: quantity}`` out of stock inside the current transaction.
+
+    Each row is decremented by a conditional ``UPDATE ... WHERE stock >= quantity``
+    so concurrent buyers can never oversell, and rows are updated in id order so
+    two multi-item checkouts cannot deadlock. Returns the updated product rows.
+    """
+    rows = {}
+    for product_id in sorted(quantities):
+        quantity = quantities[product_id]
+        row = db.session.execute(
+            update(products)
+            .where(products.c.id == product_id, products.c.stock >= quantity)
+            .values(stock=products.c.stock - quantity)
+            .returning(*products.columns)
+        ).mappings().first()
+        if row is None:
+            available = db.session.execute(select(products.c.stock).where(products.c.id == product_id)).first()
+            if available is None:
+                raise CheckoutError('Product not found', 404, product_id)
+            raise CheckoutError(f'Only {available.stock or 0} left in stock', 409, product_id)
+        rows[product_id] = dict(row)
+    return rows
+
+
+def release_stock(quantities):
+    """Return ``{product_id: quantity}`` to stock inside the current transaction."""
+    rows = {}
+    for product_id in sorted(quantities):
+        row = db.session.execute(
+            update(products)
+            .where(products.c.id == product_id)
+            .values(stock=products.c.stock + quantities[product_id])
+            .returning(*products.columns)
+        ).mappings().first()
+        if row is not None:
+            rows[product_id] = dict(row)
+    return rows
+
+
+def stage_availability_changes(rows, quantities=None):
+    """Refresh catalog caches, on commit, for products that just sold out or came back into stock.
+
+    Stock counts in cached listings are otherwise left to age, so a flash sale
+    does not invalidate every cached page on every order.
+    """
+    if quantities is None:
+        changed = {product_id: row for product_id, row in rows.items() if row['stock'] == 0}
+    else:
+        changed = {product_id: row for product_id, row in rows.items() if row['stock'] == quantities[product_id]}
+    if changed:
+        stage_catalog_changes(db.session, changed)
+
+
+def cart_quantities(session_id):
+    """Quantities per product in a cart, in one grouped query."""
+    rows = db.session.execute(
+        select(CartItem.product_id, db.func.sum(CartItem.quantity))
+        .join(Cart, Cart.id == CartItem.cart_id)
+        .where(Cart.session_id == session_id)
+        .group_by(CartItem.product_id)
+    ).all()
+    return {product_id: int(quantity or 0) for product_id, quantity in rows if quantity}
+
+
+def place_order(customer, quantities, session_id=None):
+    """Reserve stock and create the order, its items and its outbox emails in one transaction.
+
+    ``customer`` holds customer_name, customer_email and customer_phone. When
+    ``session_id`` is given the cart is emptied in the same transaction.
+    """
+    reservation_minutes = current_app.config.get('RESERVATION_MINUTES', 30)
+    try:
+        rows = reserve_stock(quantities)
+        order = Order(
+            order_number=generate_order_number(),
+            customer_name=customer['customer_name'],
+            customer_email=customer['customer_email'],
+            customer_phone=customer['customer_phone'],
+            total_amount=round(sum(rows[product_id]['price'] * quantity for product_id, quantity in quantities.items()), 2),
+            reservation_expires_at=datetime.utcnow() + timedelta(minutes=reservation_minutes)
+        )
+        for product_id in sorted(quantities):
+            order.items.append(OrderItem(
+                product_id=product_id,
+                product_name=rows[product_id]['name'],
+                quantity=quantities[product_id],
+                price=rows[product_id]['price']
+            ))
+        db.session.add(order)
+        db.session.flush()
+        enqueue_order_emails(order)
+        if session_id:
+            empty_cart_items(session_id)
+        stage_availability_changes(rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return order
+
+
+def confirm_payment(order_id):
+    """Mark a pending order paid and keep its stock. Returns False if it is no longer pending."""
+    confirmed = db.session.execute(
+        update(orders)
+        .where(orders.c.id == order_id, orders.c.status == 'pending')
+        .values(status='confirmed', payment_status='completed', reservation_expires_at=None)
+    ).rowcount
+    db.session.commit()
+    return bool(confirmed)
+
+
+def release_reservation(order_id, status, now=None):
+    """Move a pending order to ``status`` (cancelled or expired) and put its stock back.
+
+    The status change is conditional, so a payment confirmation racing an expiry
+    leaves exactly one winner. Returns True if this call released the order.
+    """
+    conditions = [orders.c.id == order_id, orders.c.status == 'pending']
+    if status == 'expired':
+        conditions += [orders.c.payment_status == 'awaiting', orders.c.reservation_expires_at <= (now or datetime.utcnow())]
+    try:
+        released = db.session.execute(
+            update(orders).where(*conditions).values(status=status, reservation_expires_at=None)
+        ).rowcount
+        if not released:
+            db.session.rollback()
+            return False
+        quantities = defaultdict(int)
+        for product_id, quantity in db.session.execute(
+            select(OrderItem.product_id, OrderItem.quantity).where(OrderItem.order_id == order_id)
+        ):
+            if product_id is not None:
+                quantities[product_id] += quantity
+        rows = release_stock(quantities)
+        stage_availability_changes(rows, quantities)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return True
+
+
+def expire_reservations(now=None, limit=500):
+    """Release stock held by unpaid orders past their reservation. Returns the number expired."""
+    now = now or datetime.utcnow()
+    due_ids = db.session.execute(
+        select(orders.c.id)
+        .where(
+            orders.c.status == 'pending',
+            orders.c.payment_status == 'awaiting',
+            orders.c.reservation_expires_at <= now
+        )
+        .order_by(orders.c.reservation_expires_at)
+        .limit(limit)
+    ).scalars().all()
+    db.session.commit()
+    return sum(1 for order_id in due_ids if release_reservation(order_id, 'expired', now))
+
+
+@click.command('expire-reservations')
+@click.option('--every', type=float, default=None, help='Keep running, checking every N seconds.')
+@with_appcontext
+def expire_reservations_command(every):
+    """Return stock held by unpaid orders whose reservation has run out."""
+    def job():
+        expired = expire_reservations()
+        if expired:
+            click.echo(f'Expired {expired} reservation(s)')
+
+    run_periodically(job, every)
+
+
+def init_checkout(app):
+    app.cli.add_command(expire_reservations_command)
+    app.cli.add_command(deliver_outbox_command)
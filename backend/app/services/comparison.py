@@ -0,0 +1,141 @@
+import bisect
+import threading
+from app import db
+from app.models import Product
+from app.read_replicas import replica_may_be_stale
+from app.services.cache import LRUCache
+from app.services.catalog_events import CatalogIndex, catalog_version
+
+SCORE_FIELDS = ('id', 'category', 'price', 'deal_price', 'original_price', 'rating', 'review_count')
+
+
+def score_values(price, deal_price, original_price, rating, review_count):
+    price = deal_price if deal_price is not None else price
+    price = price if price is not None else 0
+    rating = rating if rating is not None else 0
+    review_count = review_count if review_count is not None else 0
+    discount = 0
+    if original_price and deal_price and original_price > 0:
+        discount = (original_price - deal_price) / original_price
+
+    # Weighted score to approximate an AI recommendation signal.
+    score = (rating * 16) + (min(review_count, 1000) * 0.03) + (discount * 12) - (price * 0.02)
+    return score
+
+
+def comparison_score(product):
+    return score_values(product.price, product.deal_price, product.original_price,
+                        product.rating, product.review_count)
+
+
+def row_score(row):
+    return score_values(row.get('price'), row.get('deal_price'), row.get('original_price'),
+                        row.get('rating'), row.get('review_count'))
+
+
+class ProductScoreIndex:
+    """Precomputed comparison scores, with per-category rankings kept sorted.
+
+    Rankings are lists of ``(-score, product_id)`` maintained with bisect, so
+    the top-N of a category is a slice rather than a scan.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.scores = {}
+        self.categories = {}
+        self.rankings = {None: []}
+
+    def _insert(self, product_id, category, score):
+        entry = (-score, product_id)
+        bisect.insort(self.rankings[None], entry)
+        bisect.insort(self.rankings.setdefault(category, []), entry)
+        self.scores[product_id] = score
+        self.categories[product_id] = category
+
+    def _delete(self, product_id):
+        if product_id not in self.scores:
+            return
+        entry = (-self.scores.pop(product_id), product_id)
+        category = self.categories.pop(product_id)
+        for key in (None, category):
+            ranking = self.rankings[key]
+            position = bisect.bisect_left(ranking, entry)
+            if position < len(ranking) and ranking[position] == entry:
+                ranking.pop(position)
+
+    def upsert(self, row):
+        with self.lock:
+            self._delete(row['id'])
+            self._insert(row['id'], row.get('category'), row_score(row))
+
+    def remove(self, product_id):
+        with self.lock:
+            self._delete(product_id)
+
+    def load(self, rows):
+        with self.lock:
+            for row in rows:
+                self.scores[row['id']] = row_score(row)
+                self.categories[row['id']] = row.get('category')
+            for product_id, score in self.scores.items():
+                self.rankings[None].append((-score, product_id))
+                self.rankings.setdefault(self.categories[product_id], []).append((-score, product_id))
+            for ranking in self.rankings.values():
+                ranking.sort()
+
+    def score(self, product_id):
+        return self.scores.get(product_id)
+
+    def top(self, category=None, limit=10):
+        with self.lock:
+            return [(product_id, -negative_score) for negative_score, product_id in self.rankings.get(category, [])[:limit]]
+
+
+def build_score_index():
+    index = ProductScoreIndex()
+    index.load(
+        dict(zip(SCORE_FIELDS, row))
+        for row in db.session.query(*[getattr(Product, field) for field in SCORE_FIELDS]).yield_per(5000)
+    )
+    return index
+
+
+def product_score(app, product):
+    """Stored score for ``product``, falling back to computing it."""
+    score = app.extensions['product_scores'].get().score(product.id)
+    return comparison_score(product) if score is None else score
+
+
+def cached_comparison(app, product_ids, compute):
+    """Memoize a comparison on the id set and catalog version; order is applied by the caller.
+
+    Results are only cached once the score index has caught up with that version.
+    """
+    version = catalog_version(app)
+    cache = app.extensions['comparison_cache']
+    key = (version, tuple(sorted(product_ids)))
+    result = cache.get(key)
+    if result is None:
+        scores = app.extensions['product_scores']
+        scores.get()
+        result = compute()
+        if scores.version >= version and not replica_may_be_stale():
+            cache.set(key, result)
+    return result
+
+
+def apply_score_changes(index, upserted, deleted_ids):
+    for product_id in deleted_ids:
+        index.remove(product_id)
+    for row in upserted.values():
+        index.upsert(row)
+
+
+def init_comparison(app):
+    """Keep the score index in ``app.extensions['product_scores']``; read it through ``.get()``."""
+    index = app.extensions['product_scores'] = CatalogIndex(app, build_score_index, apply_score_changes)
+    app.extensions['comparison_cache'] = LRUCache(
+        app.config.get('COMPARISON_CACHE_SIZE', 2048), ttl=app.config.get('CATALOG_CACHE_TTL_SECONDS', 300)
+    )
+    return index
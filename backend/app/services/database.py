@@ -0,0 +1,82 @@
+from sqlalchemy import event
+
+DATABASE_PROFILES = ('auto', 'sqlite', 'postgresql', 'default')
+
+
+def resolve_database_profile(uri, requested='auto'):
+    """Pick the engine tuning profile; ``auto`` follows the database URL's dialect."""
+    requested = (requested or 'auto').lower()
+    if requested not in DATABASE_PROFILES:
+        raise ValueError(f'Unknown DATABASE_PROFILE {requested!r}; expected one of {", ".join(DATABASE_PROFILES)}')
+    if requested != 'auto':
+        return requested
+    if uri.startswith('sqlite'):
+        return 'sqlite'
+    if uri.startswith(('postgresql', 'postgres')):
+        return 'postgresql'
+    return 'default'
+
+
+def sqlite_pragmas(config):
+    """Per-connection pragmas: WAL lets readers run alongside the single writer,
+    and busy_timeout makes writers queue instead of failing with "database is locked"."""
+    return [
+        ('journal_mode', 'WAL'),
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('busy_timeout', int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))),
+        ('cache_size', -int(config.get('SQLITE_CACHE_SIZE_KB', 20000))),
+        ('mmap_size', int(config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))),
+        ('temp_store', 'MEMORY'),
+    ]
+
+
+def engine_options(profile, config):
+    """SQLAlchemy ``create_engine`` keyword arguments for ``profile``."""
+    if profile == 'postgresql':
+        return {
+            'pool_size': int(config.get('DB_POOL_SIZE', 10)),
+            'max_overflow': int(config.get('DB_MAX_OVERFLOW', 20)),
+            'pool_timeout': int(config.get('DB_POOL_TIMEOUT', 30)),
+            'pool_recycle': int(config.get('DB_POOL_RECYCLE', 1800)),
+            'pool_pre_ping': True,
+        }
+    if profile == 'sqlite':
+        # busy_timeout is set as a pragma; the driver-level timeout would otherwise cap it at 5s
+        return {'connect_args': {'timeout': int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000)) / 1000}}
+    return {}
+
+
+def configure_engine(engine, profile, config):
+    """Attach per-connection setup for ``profile`` to ``engine``."""
+    if profile != 'sqlite' or engine.dialect.name != 'sqlite':
+        return engine
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(engine, 'connect')
+    def apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+    return engine
+
+
+def configure_database(app):
+    """Resolve the profile and merge its engine options; call before ``db.init_app``."""
+    profile = resolve_database_profile(app.config['SQLALCHEMY_DATABASE_URI'], app.config.get('DATABASE_PROFILE'))
+    options = engine_options(profile, app.config)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    app.extensions['database_profile'] = profile
+    return profile
+
+
+def init_database_engines(app, db):
+    """Install connection hooks on every engine Flask-SQLAlchemy created for ``app``."""
+    profile = app.extensions['database_profile']
+    with app.app_context():
+        for engine in db.engines.values():
+            configure_engine(engine, profile, app.config)
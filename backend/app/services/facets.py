@@ -0,0 +1,120 @@
+from sqlalchemy import case, func
+from app.models import Product
+from app.read_replicas import replica_may_be_stale
+from app.services.cache import LRUCache
+from app.services.catalog_events import catalog_version
+
+# (label, lower bound inclusive, upper bound exclusive)
+PRICE_BUCKETS = [
+    ('0-25', 0, 25),
+    ('25-50', 25, 50),
+    ('50-100', 50, 100),
+    ('100-200', 100, 200),
+    ('200+', 200, None),
+]
+RATING_THRESHOLDS = [4, 3, 2, 1]
+
+
+def price_bucket_label(price):
+    if price is None:
+        return None
+    for label, lower, upper in PRICE_BUCKETS:
+        if price >= lower and (upper is None or price < upper):
+            return label
+    return None
+
+
+def rating_floor(rating):
+    if rating is None:
+        return 0
+    for threshold in RATING_THRESHOLDS:
+        if rating >= threshold:
+            return threshold
+    return 0
+
+
+def empty_facets():
+    return {
+        'category': {},
+        'merchant': {},
+        'price': {label: 0 for label, _, _ in PRICE_BUCKETS},
+        'rating': {f'{threshold}+': 0 for threshold in RATING_THRESHOLDS},
+        'deals': 0,
+        'total': 0
+    }
+
+
+def fold_facet_rows(rows):
+    """Roll (category, merchant, price_bucket, rating_floor, is_deal, count) rows into facet counts."""
+    facets = empty_facets()
+    for category, merchant, price_label, floor, is_deal, count in rows:
+        facets['total'] += count
+        if category:
+            facets['category'][category] = facets['category'].get(category, 0) + count
+        if merchant:
+            facets['merchant'][merchant] = facets['merchant'].get(merchant, 0) + count
+        if price_label:
+            facets['price'][price_label] += count
+        for threshold in RATING_THRESHOLDS:
+            if floor and floor >= threshold:
+                facets['rating'][f'{threshold}+'] += count
+        if is_deal:
+            facets['deals'] += count
+    return facets
+
+
+def facet_counts_for_query(query):
+    """Facet counts for every product matched by ``query`` in one grouped statement."""
+    price_bucket = case(
+        *[
+            ((Product.price >= lower) & (Product.price < upper), label) if upper is not None
+            else (Product.price >= lower, label)
+            for label, lower, upper in PRICE_BUCKETS
+        ],
+        else_=None
+    )
+    floor = case(
+        *[(Product.rating >= threshold, threshold) for threshold in RATING_THRESHOLDS],
+        else_=0
+    )
+    rows = query.order_by(None).with_entities(
+        Product.category,
+        Product.merchant,
+        price_bucket,
+        floor,
+        Product.is_deal,
+        func.count(Product.id)
+    ).group_by(
+        Product.category, Product.merchant, price_bucket, floor, Product.is_deal
+    ).all()
+    return fold_facet_rows(rows)
+
+
+def facet_counts_for_products(products):
+    """Facet counts for an already materialized product list (e.g. fuzzy search results)."""
+    return fold_facet_rows(
+        (product.category, product.merchant, price_bucket_label(product.price),
+         rating_floor(product.rating), product.is_deal, 1)
+        for product in products
+    )
+
+
+def get_facet_cache(app):
+    cache = app.extensions.get('facet_cache')
+    if cache is None:
+        cache = app.extensions['facet_cache'] = LRUCache(
+            app.config.get('FACET_CACHE_SIZE', 512), ttl=app.config.get('CATALOG_CACHE_TTL_SECONDS', 300)
+        )
+    return cache
+
+
+def cached_facets(app, key, compute):
+    """Memoize facet counts per filter key; the catalog version in the key invalidates on writes."""
+    cache = get_facet_cache(app)
+    cache_key = (catalog_version(app), key)
+    facets = cache.get(cache_key)
+    if facets is None:
+        facets = compute()
+        if not replica_may_be_stale():
+            cache.set(cache_key, facets)
+    return facets
@@ -0,0 +1,175 @@
+import json
+import math
+import re
+from collections import deque
+from functools import lru_cache
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+FALLBACK_ANSWER = (
+    'I can help with shipping, tracking, returns, account access, and reviews. '
+    'Please share your issue and we can open a support ticket.'
+)
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+
+def load_faq_entries(path=None, default=None):
+    """Load FAQ entries from a JSON file, falling back to the built-in list."""
+    if not path:
+        return list(default or [])
+
+    with open(path, 'r', encoding='utf-8') as file_handle:
+        entries = json.load(file_handle)
+
+    if not isinstance(entries, list):
+        raise ValueError(f'FAQ knowledge base at {path} must be a JSON array')
+
+    loaded = []
+    for item in entries:
+        if not isinstance(item, dict) or not item.get('id') or not item.get('question') or not item.get('answer'):
+            raise ValueError(f'FAQ entry is missing id/question/answer: {item!r}')
+        loaded.append({
+            'id': str(item['id']),
+            'question': str(item['question']),
+            'answer': str(item['answer']),
+            'keywords': [str(keyword).strip().lower() for keyword in item.get('keywords') or [] if str(keyword).strip()]
+        })
+    return loaded
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton reporting which keywords occur in a text."""
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        self.keywords = list(keywords)
+
+        for keyword_id, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][char] = next_state
+                state = next_state
+            self.output[state].append(keyword_id)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                candidate = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = candidate if candidate != next_state else 0
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def find(self, text):
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            if self.output[state]:
+                found.update(self.output[state])
+        return found
+
+
+class FaqMatcher:
+    """Precompiled FAQ index: keyword automaton plus a TF-IDF token index over questions."""
+
+    keyword_weight = 2
+    min_score = 1.2
+
+    def __init__(self, entries, cache_size=1024):
+        self.entries = list(entries)
+
+        keyword_ids = {}
+        self.keyword_entries = []
+        for entry_index, item in enumerate(self.entries):
+            for keyword in item.get('keywords') or []:
+                keyword = keyword.lower()
+                if keyword not in keyword_ids:
+                    keyword_ids[keyword] = len(self.keyword_entries)
+                    self.keyword_entries.append([])
+                self.keyword_entries[keyword_ids[keyword]].append(entry_index)
+        self.automaton = KeywordAutomaton(keyword_ids)
+
+        document_tokens = [tokenize(item['question']) for item in self.entries]
+        document_frequency = {}
+        for tokens in document_tokens:
+            for token in set(tokens):
+                document_frequency[token] = document_frequency.get(token, 0) + 1
+
+        total = len(self.entries) or 1
+        self.idf = {
+            token: math.log((1 + total) / (1 + frequency)) + 1
+            for token, frequency in document_frequency.items()
+        }
+        self.postings = {}
+        for entry_index, tokens in enumerate(document_tokens):
+            weights = self._weigh(tokens)
+            norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+            for token, weight in weights.items():
+                self.postings.setdefault(token, []).append((entry_index, weight / norm))
+
+        self._cached_reply = lru_cache(maxsize=cache_size)(self._reply)
+
+    def _weigh(self, tokens):
+        counts = {}
+        for token in tokens:
+            if token in self.idf:
+                counts[token] = counts.get(token, 0) + 1
+        return {token: count * self.idf[token] for token, count in counts.items()}
+
+    def score(self, message):
+        """Return {entry_index: score} for entries with any keyword or token overlap."""
+        scores = {}
+        for keyword_id in self.automaton.find(message):
+            for entry_index in self.keyword_entries[keyword_id]:
+                scores[entry_index] = scores.get(entry_index, 0) + self.keyword_weight
+
+        weights = self._weigh(tokenize(message))
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        if norm:
+            for token, weight in weights.items():
+                for entry_index, entry_weight in self.postings[token]:
+                    scores[entry_index] = scores.get(entry_index, 0) + (weight / norm) * entry_weight
+        return scores
+
+    def _reply(self, message):
+        scores = self.score(message)
+        ranked = sorted(
+            (index for index, value in scores.items() if value >= self.min_score),
+            key=lambda index: (-scores[index], index)
+        )[:3]
+        if not ranked:
+            return FALLBACK_ANSWER, ()
+
+        top = [self.entries[index] for index in ranked]
+        return top[0]['answer'], tuple((item['id'], item['question']) for item in top[1:3])
+
+    def reply(self, user_message):
+        message = (user_message or '').strip().lower()
+        if not message:
+            return None, []
+        answer, suggestions = self._cached_reply(message)
+        return answer, [{'id': item_id, 'question': question} for item_id, question in suggestions]
+
+
+def init_faq_matcher(app, default_entries):
+    entries = load_faq_entries(app.config.get('FAQ_KB_PATH'), default=default_entries)
+    matcher = FaqMatcher(entries, cache_size=app.config.get('FAQ_CACHE_SIZE', 1024))
+    app.extensions['faq_matcher'] = matcher
+    return matcher
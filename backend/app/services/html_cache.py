@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from app.read_replicas import replica_may_be_stale
+from app.services.catalog_events import catalog_version
+
+
+class HtmlCache:
+    """LRU of rendered HTML strings, bounded by total characters held.
+
+    With ``ttl`` set, entries also expire that many seconds after being stored.
+    """
+
+    def __init__(self, max_chars=32 * 1024 * 1024, ttl=None):
+        self.max_chars = max_chars
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            html, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self.entries[key]
+                self.size -= len(html)
+                return None
+            self.entries.move_to_end(key)
+            return html
+
+    def set(self, key, html):
+        if len(html) > self.max_chars:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous[0])
+            self.entries[key] = (html, expires_at)
+            self.size += len(html)
+            while self.size > self.max_chars:
+                _, (evicted, _) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+def _cached(key, render):
+    if not current_app.config.get('HTML_CACHE_ENABLED', True):
+        return render()
+    cache = current_app.extensions['html_cache']
+    html = cache.get(key)
+    if html is None:
+        html = render()
+        if not replica_may_be_stale():
+            cache.set(key, html)
+    return html
+
+
+def cached_page(key, render):
+    """Whole-page cache, invalidated by any catalog write."""
+    return _cached(('page', catalog_version()) + tuple(key), render)
+
+
+def cached_fragment(name, product_id, render):
+    """Per-product fragment cache, invalidated by any catalog write from any worker."""
+    return _cached(('fragment', name, product_id, catalog_version()), render)
+
+
+def init_html_cache(app):
+    cache = HtmlCache(app.config.get('HTML_CACHE_MAX_CHARS', 32 * 1024 * 1024),
+                      ttl=app.config.get('CATALOG_CACHE_TTL_SECONDS', 300))
+    app.extensions['html_cache'] = cache
+    return cache
@@ -0,0 +1,166 @@
+import bisect
+import threading
+import time
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Mapper
+
+# Upper bounds in seconds, Prometheus defaults
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_QUERY_STATEMENT_LIMIT = 500
+
+
+class Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(DURATION_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(DURATION_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class RequestMetrics:
+    """Per-endpoint request counters and duration histograms, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.request_seconds = {}
+        self.db_seconds = {}
+        self.statements = {}
+        self.rows = {}
+
+    def record(self, endpoint, method, status, wall, stats):
+        key = (endpoint, method)
+        with self.lock:
+            status_key = (endpoint, method, str(status))
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+            self.request_seconds.setdefault(key, Histogram()).observe(wall)
+            self.db_seconds.setdefault(key, Histogram()).observe(stats['db_time'])
+            self.statements[key] = self.statements.get(key, 0) + stats['statements']
+            self.rows[key] = self.rows.get(key, 0) + stats['rows']
+
+    @staticmethod
+    def _labels(endpoint, method, **extra):
+        labels = {'endpoint': endpoint, 'method': method, **extra}
+        return ','.join(f'{name}="{value}"' for name, value in labels.items())
+
+    def _histogram_lines(self, name, histograms):
+        lines = [f'# TYPE {name} histogram']
+        for (endpoint, method), histogram in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS + ('+Inf',), histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{self._labels(endpoint, method, le=bound)}}} {cumulative}')
+            lines.append(f'{name}_sum{{{self._labels(endpoint, method)}}} {histogram.total:.6f}')
+            lines.append(f'{name}_count{{{self._labels(endpoint, method)}}} {histogram.count}')
+        return lines
+
+    def render(self):
+        with self.lock:
+            lines = ['# TYPE shophub_requests_total counter']
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f'shophub_requests_total{{{self._labels(endpoint, method, status=status)}}} {count}')
+            lines += self._histogram_lines('shophub_request_duration_seconds', self.request_seconds)
+            lines += self._histogram_lines('shophub_db_duration_seconds', self.db_seconds)
+            lines.append('# TYPE shophub_sql_statements_total counter')
+            for (endpoint, method), count in sorted(self.statements.items()):
+                lines.append(f'shophub_sql_statements_total{{{self._labels(endpoint, method)}}} {count}')
+            lines.append('# TYPE shophub_sql_rows_total counter')
+            for (endpoint, method), count in sorted(self.rows.items()):
+                lines.append(f'shophub_sql_rows_total{{{self._labels(endpoint, method)}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def request_stats():
+    if not has_request_context():
+        return None
+    return g.get('request_stats')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    stats = request_stats()
+    if stats is not None:
+        stats['db_time'] += elapsed
+        stats['statements'] += 1
+        if cursor.rowcount and cursor.rowcount > 0:
+            stats['rows'] += cursor.rowcount
+
+    threshold = current_app.config.get('SLOW_QUERY_MS', 200) if has_request_context() else None
+    if threshold is not None and elapsed * 1000 >= threshold:
+        current_app.logger.warning(
+            'Slow query (%.1fms) in %s: %s',
+            elapsed * 1000, request.endpoint or request.path, statement[:SLOW_QUERY_STATEMENT_LIMIT]
+        )
+
+
+def _on_cursor_error(context):
+    if context.connection is not None and context.connection.info.get('query_started'):
+        context.connection.info['query_started'].pop()
+
+
+@event.listens_for(Mapper, 'load')
+def _count_loaded_row(target, context):
+    # SELECT cursors report no rowcount, so fetched rows are counted as ORM loads
+    stats = request_stats()
+    if stats is not None:
+        stats['rows'] += 1
+
+
+def start_request_timer():
+    g.request_stats = {'started': time.perf_counter(), 'db_time': 0.0, 'statements': 0, 'rows': 0}
+
+
+def finish_request_timer(response):
+    stats = request_stats()
+    if stats is None:
+        return response
+    wall = time.perf_counter() - stats['started']
+    endpoint = request.endpoint or 'unmatched'
+    current_app.extensions['request_metrics'].record(endpoint, request.method, response.status_code, wall, stats)
+
+    if current_app.config.get('SERVER_TIMING_ENABLED', True):
+        response.headers.add('Server-Timing', f'app;dur={wall * 1000:.1f}')
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={stats["db_time"] * 1000:.1f};desc="{stats["statements"]} queries, {stats["rows"]} rows"'
+        )
+    return response
+
+
+def metrics_view():
+    """Prometheus scrape endpoint; needs the admin key unless METRICS_PUBLIC is set."""
+    if not current_app.config.get('METRICS_PUBLIC', False):
+        from app.routes import require_admin_key
+        denied = require_admin_key()
+        if denied is not None:
+            return denied
+    return Response(current_app.extensions['request_metrics'].render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_instrumentation(app, db):
+    if not app.config.get('INSTRUMENTATION_ENABLED', True):
+        return None
+
+    metrics = RequestMetrics()
+    app.extensions['request_metrics'] = metrics
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines + app.extensions.get('replica_engines', []):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _on_cursor_error)
+    app.before_request(start_request_timer)
+    app.after_request(finish_request_timer)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    return metrics
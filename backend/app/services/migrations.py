@@ -0,0 +1,233 @@
+from collections import namedtuple
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.exc import DBAPIError
+from app import db
+from app.models import AnalyticsCheckpoint, AnalyticsRollup, CatalogVersion, OutboxMessage, RevokedToken
+from app.services.ticket_search import create_ticket_search_index
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent deploys migrate one at a time
+MIGRATION_LOCK_KEY = 5_171_023
+
+Migration = namedtuple('Migration', ['version', 'description', 'apply'])
+MIGRATIONS = []
+
+schema_migrations = db.Table(
+    'schema_migrations',
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('description', db.String(255), nullable=False),
+    db.Column('applied_at', db.DateTime, nullable=False),
+)
+
+
+def migration(version, description):
+    """Register ``apply(connection)`` as schema migration ``version``.
+
+    Version 1 creates the current model tables, so later migrations also run
+    against fresh databases where their change already exists and must be
+    idempotent (``IF NOT EXISTS`` / ``checkfirst``).
+    """
+    def decorator(apply):
+        MIGRATIONS.append(Migration(version, description, apply))
+        MIGRATIONS.sort(key=lambda entry: entry.version)
+        return apply
+    return decorator
+
+
+def create_indexes(connection, *names):
+    """Create the named model indexes if missing.
+
+    Migrations name the indexes they own instead of looping over the live
+    metadata, which would also pick up indexes on columns added by later
+    migrations.
+    """
+    indexes = {index.name: index for table in db.metadata.tables.values() for index in table.indexes}
+    for name in names:
+        indexes[name].create(connection, checkfirst=True)
+
+
+def latest_schema_version():
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+@migration(1, 'Baseline tables')
+def create_baseline_tables(connection):
+    db.metadata.create_all(connection)
+
+
+@migration(2, 'User address and country columns')
+def add_user_address_columns(connection):
+    existing_columns = {column['name'] for column in inspect(connection).get_columns('users')}
+    columns = {
+        'address_line1': 'VARCHAR(255)',
+        'address_line2': 'VARCHAR(255)',
+        'city': 'VARCHAR(100)',
+        'state': 'VARCHAR(2)',
+        'zip_code': 'VARCHAR(10)',
+        'country_code': "VARCHAR(2) NOT NULL DEFAULT 'US'",
+    }
+    for column_name, column_type in columns.items():
+        if column_name not in existing_columns:
+            connection.execute(text(f'ALTER TABLE users ADD COLUMN {column_name} {column_type}'))
+
+
+@migration(3, 'Support ticket full-text search')
+def add_ticket_search_index(connection):
+    create_ticket_search_index(connection)
+
+
+@migration(4, 'Composite indexes for catalog, review, cart and order queries')
+def add_hot_query_indexes(connection):
+    create_indexes(
+        connection,
+        'ix_users_email', 'ix_users_created_at',
+        'ix_products_name', 'ix_products_category', 'ix_products_category_created_at',
+        'ix_products_is_deal_created_at', 'ix_products_merchant_created_at', 'ix_products_created_at',
+        'ix_products_rating',
+        'ix_product_images_product_id', 'ix_product_images_product_sort',
+        'ix_reviews_product_id', 'ix_reviews_reviewer_email', 'ix_reviews_moderation_status',
+        'ix_reviews_created_at', 'ix_reviews_product_status_created_at',
+        'ix_review_helpful_votes_review_id', 'ix_review_helpful_votes_voter_token',
+        'ix_review_helpful_votes_review_voter',
+        'ix_support_tickets_ticket_number', 'ix_support_tickets_customer_email', 'ix_support_tickets_status',
+        'ix_support_tickets_created_at', 'ix_support_tickets_status_created_at',
+        'ix_carts_session_id', 'ix_cart_items_cart_product',
+        'ix_orders_order_number', 'ix_orders_customer_email', 'ix_orders_created_at', 'ix_order_items_order_id',
+    )
+
+
+@migration(5, 'Order stock reservations and email outbox')
+def add_checkout_tables(connection):
+    existing_columns = {column['name'] for column in inspect(connection).get_columns('orders')}
+    if 'reservation_expires_at' not in existing_columns:
+        column_type = db.DateTime().compile(dialect=connection.dialect)
+        connection.execute(text(f'ALTER TABLE orders ADD COLUMN reservation_expires_at {column_type}'))
+    create_indexes(connection, 'ix_orders_reservation_expires_at')
+    OutboxMessage.__table__.create(connection, checkfirst=True)
+    for index in OutboxMessage.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+
+@migration(6, 'Cart running totals and line prices')
+def add_cart_totals(connection):
+    existing_columns = {column['name'] for column in inspect(connection).get_columns('carts')}
+    if 'item_count' not in existing_columns:
+        connection.execute(text('ALTER TABLE carts ADD COLUMN item_count INTEGER NOT NULL DEFAULT 0'))
+    if 'total_amount' not in existing_columns:
+        connection.execute(text('ALTER TABLE carts ADD COLUMN total_amount FLOAT NOT NULL DEFAULT 0'))
+    if 'unit_price' not in {column['name'] for column in inspect(connection).get_columns('cart_items')}:
+        connection.execute(text('ALTER TABLE cart_items ADD COLUMN unit_price FLOAT'))
+    # updated_at drives cart purging
+    create_indexes(connection, 'ix_carts_updated_at')
+
+    connection.execute(text(
+        'UPDATE cart_items SET unit_price = '
+        '(SELECT products.price FROM products WHERE products.id = cart_items.product_id) '
+        'WHERE unit_price IS NULL'
+    ))
+    connection.execute(text(
+        'UPDATE carts SET '
+        'item_count = (SELECT COALESCE(SUM(quantity), 0) FROM cart_items WHERE cart_items.cart_id = carts.id), '
+        'total_amount = (SELECT COALESCE(SUM(quantity * unit_price), 0) FROM cart_items WHERE cart_items.cart_id = carts.id)'
+    ))
+
+
+@migration(7, 'Room for time-ordered ticket numbers')
+def widen_ticket_numbers(connection):
+    # SQLite does not enforce VARCHAR lengths
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text('ALTER TABLE support_tickets ALTER COLUMN ticket_number TYPE VARCHAR(40)'))
+
+
+@migration(8, 'Analytics rollup tables')
+def add_analytics_rollups(connection):
+    for model in (AnalyticsRollup, AnalyticsCheckpoint):
+        model.__table__.create(connection, checkfirst=True)
+    # updated_at drives incremental rollups
+    create_indexes(connection, 'ix_orders_updated_at', 'ix_reviews_updated_at', 'ix_support_tickets_updated_at')
+
+
+@migration(9, 'Session token revocation list')
+def add_revoked_tokens(connection):
+    RevokedToken.__table__.create(connection, checkfirst=True)
+    for index in RevokedToken.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+
+@migration(10, 'Shared catalog version')
+def add_catalog_version(connection):
+    CatalogVersion.__table__.create(connection, checkfirst=True)
+    if connection.execute(select(CatalogVersion.id)).first() is None:
+        connection.execute(CatalogVersion.__table__.insert().values(id=1, version=0))
+
+
+def current_schema_version(engine):
+    """Highest applied migration, or 0 for a database that was never migrated."""
+    try:
+        with engine.connect() as connection:
+            return connection.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+    except DBAPIError:
+        return 0
+
+
+def migrate(engine, target=None):
+    """Apply pending migrations up to ``target`` in one transaction. Returns the versions applied."""
+    target = latest_schema_version() if target is None else target
+    applied = []
+    with engine.begin() as connection:
+        if connection.dialect.name == 'postgresql':
+            connection.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': MIGRATION_LOCK_KEY})
+        schema_migrations.create(connection, checkfirst=True)
+        current = connection.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+        for entry in MIGRATIONS:
+            if current < entry.version <= target:
+                entry.apply(connection)
+                connection.execute(schema_migrations.insert().values(
+                    version=entry.version,
+                    description=entry.description,
+                    applied_at=datetime.utcnow()
+                ))
+                applied.append(entry.version)
+    return applied
+
+
+@click.command('migrate-db')
+@click.option('--target', type=int, default=None, help='Stop at this schema version.')
+@with_appcontext
+def migrate_db_command(target):
+    """Apply pending schema migrations."""
+    applied = migrate(db.engine, target)
+    current_app.extensions['schema_version'] = current_schema_version(db.engine)
+    if applied:
+        click.echo(f'Applied migrations: {", ".join(str(version) for version in applied)}')
+    click.echo(f'Schema version: {current_app.extensions["schema_version"]}')
+
+
+@click.command('schema-version')
+@with_appcontext
+def schema_version_command():
+    """Show the applied and latest schema versions."""
+    click.echo(f'Applied: {current_schema_version(db.engine)}, latest: {latest_schema_version()}')
+
+
+def init_migrations(app):
+    """Check the schema version once at startup and apply pending migrations if allowed."""
+    app.cli.add_command(migrate_db_command)
+    app.cli.add_command(schema_version_command)
+
+    with app.app_context():
+        version = current_schema_version(db.engine)
+        if version < latest_schema_version():
+            if app.config.get('AUTO_MIGRATE', True):
+                migrate(db.engine)
+                version = latest_schema_version()
+            else:
+                app.logger.warning(
+                    'Database schema is at version %s, latest is %s; run "flask migrate-db"',
+                    version, latest_schema_version()
+                )
+    app.extensions['schema_version'] = version
+    return version
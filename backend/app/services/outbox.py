@@ -0,0 +1,107 @@
+import os
+import time
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select, update
+from app import db
+from app.models import OutboxMessage
+from app.services import send_order_alert_to_admin, send_order_confirmation_to_customer
+
+SENDERS = {
+    'order_alert': send_order_alert_to_admin,
+    'order_confirmation': send_order_confirmation_to_customer,
+}
+# A claimed message whose worker died becomes due again after this long
+SENDING_LEASE_SECONDS = 300
+RETRY_BACKOFF_SECONDS = 60
+
+
+def enqueue_order_emails(order):
+    """Queue the order's emails in the caller's transaction; they are sent after it commits."""
+    kinds = ['order_confirmation']
+    if os.getenv('ADMIN_EMAIL'):
+        kinds.append('order_alert')
+    for kind in kinds:
+        db.session.add(OutboxMessage(kind=kind, order_id=order.id))
+
+
+def deliver_outbox(limit=50):
+    """Send due outbox messages. Returns counts of sent, retried and failed messages."""
+    table = OutboxMessage.__table__
+    now = datetime.utcnow()
+    due_ids = db.session.execute(
+        select(table.c.id)
+        .where(table.c.status.in_(('pending', 'sending')), table.c.available_at <= now)
+        .order_by(table.c.id)
+        .limit(limit)
+    ).scalars().all()
+    db.session.commit()
+
+    max_attempts = current_app.config.get('OUTBOX_MAX_ATTEMPTS', 5)
+    results = {'sent': 0, 'retried': 0, 'failed': 0}
+    for message_id in due_ids:
+        # Claiming pushes available_at forward, so a concurrent worker's claim matches no row
+        claimed = db.session.execute(
+            update(table)
+            .where(table.c.id == message_id, table.c.status.in_(('pending', 'sending')), table.c.available_at <= now)
+            .values(
+                status='sending',
+                attempts=table.c.attempts + 1,
+                available_at=now + timedelta(seconds=SENDING_LEASE_SECONDS)
+            )
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            continue
+
+        message = db.session.get(OutboxMessage, message_id)
+        sender = SENDERS.get(message.kind)
+        try:
+            sent = sender is not None and message.order is not None and sender(message.order)
+        except Exception as error:
+            current_app.logger.exception('Outbox message %s failed', message_id)
+            sent = False
+            message.last_error = str(error)[:255]
+
+        if sent:
+            message.status = 'sent'
+            message.sent_at = datetime.utcnow()
+            message.last_error = None
+            results['sent'] += 1
+        elif message.attempts >= max_attempts:
+            message.status = 'failed'
+            message.last_error = message.last_error or 'Send failed'
+            results['failed'] += 1
+        else:
+            message.status = 'pending'
+            message.last_error = message.last_error or 'Send failed'
+            message.available_at = datetime.utcnow() + timedelta(seconds=RETRY_BACKOFF_SECONDS * 2 ** (message.attempts - 1))
+            results['retried'] += 1
+        db.session.commit()
+    return results
+
+
+def run_periodically(job, every):
+    """Run ``job`` once, or forever every ``every`` seconds when it is set."""
+    while True:
+        job()
+        if not every:
+            return
+        db.session.remove()
+        time.sleep(every)
+
+
+@click.command('deliver-outbox')
+@click.option('--limit', type=int, default=50, help='Messages to send per batch.')
+@click.option('--every', type=float, default=None, help='Keep running, polling every N seconds.')
+@with_appcontext
+def deliver_outbox_command(limit, every):
+    """Send queued order emails."""
+    def job():
+        results = deliver_outbox(limit)
+        if any(results.values()):
+            click.echo(f"Outbox: {results['sent']} sent, {results['retried']} retried, {results['failed']} failed")
+
+    run_periodically(job, every)
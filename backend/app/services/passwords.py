@@ -0,0 +1,75 @@
+import threading
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+
+
+def hash_method_of(password_hash):
+    """Return the method prefix (e.g. ``pbkdf2:sha256:600000``) of a werkzeug hash."""
+    return (password_hash or '').split('$', 1)[0]
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords with a configurable werkzeug method.
+
+    At most PASSWORD_HASH_CONCURRENCY hashes run at once, so a burst of logins
+    cannot spend every core on key derivation; the rest wait on a semaphore.
+    Hashing stays on the request thread, which blocks on the result anyway.
+    Set PASSWORD_HASH_CONCURRENCY=0 for no limit.
+    """
+
+    def __init__(self, method=DEFAULT_PASSWORD_HASH_METHOD, concurrency=0):
+        self.method = method
+        self._method_prefix = None
+        self.slots = threading.BoundedSemaphore(concurrency) if concurrency else None
+
+    def _call(self, function, *args):
+        if self.slots is None:
+            return function(*args)
+        with self.slots:
+            return function(*args)
+
+    def hash(self, password):
+        return self._call(generate_password_hash, password, self.method)
+
+    @property
+    def method_prefix(self):
+        # Normalize shorthand such as "scrypt" to the full stored prefix, once.
+        if self._method_prefix is None:
+            self._method_prefix = hash_method_of(self.hash('calibration'))
+        return self._method_prefix
+
+    def needs_rehash(self, password_hash):
+        return hash_method_of(password_hash) != self.method_prefix
+
+    def verify(self, password_hash, password):
+        if not password_hash:
+            return False
+        return self._call(check_password_hash, password_hash, password)
+
+
+def init_password_hasher(app):
+    hasher = PasswordHasher(
+        method=app.config.get('PASSWORD_HASH_METHOD') or DEFAULT_PASSWORD_HASH_METHOD,
+        concurrency=app.config.get('PASSWORD_HASH_CONCURRENCY', 0)
+    )
+    app.extensions['password_hasher'] = hasher
+    return hasher
+
+
+def hash_password(password):
+    return current_app.extensions['password_hasher'].hash(password)
+
+
+def verify_password(user, password):
+    """Check a user's password, upgrading the stored hash if its method is outdated.
+
+    The caller commits the session; the new hash is only assigned on success.
+    """
+    hasher = current_app.extensions['password_hasher']
+    if not hasher.verify(user.password_hash, password):
+        return False
+    if hasher.needs_rehash(user.password_hash):
+        user.password_hash = hasher.hash(password)
+    return True
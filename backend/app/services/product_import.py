@@ -0,0 +1,336 @@
+import json
+import mimetypes
+import os
+import re
+from urllib.parse import urlparse, urlsplit
+from uuid import uuid4
+import requests
+from flask import current_app, url_for
+from app.routes import parse_float, parse_int
+
+
+def extract_meta_value(html, keys):
+    for key in keys:
+        patterns = [
+            rf'<meta[^>]+property=["\']{re.escape(key)}["\'][^>]+content=["\']([^"\']+)["\']',
+            rf'<meta[^>]+name=["\']{re.escape(key)}["\'][^>]+content=["\']([^"\']+)["\']'
+        ]
+        for pattern in patterns:
+            match = re.search(pattern, html, flags=re.IGNORECASE)
+            if match:
+                return match.group(1).strip()
+    return None
+
+
+def infer_merchant_name(url):
+    netloc = urlparse(url).netloc.lower().replace('www.', '')
+    if 'amazon.' in netloc or netloc == 'a.co':
+        return 'Amazon'
+    host = netloc.split(':')[0]
+    return host.split('.')[-2].capitalize() if '.' in host else host.capitalize()
+
+
+def clean_product_title(raw_title, merchant=None):
+    title = (raw_title or '').strip()
+    if not title:
+        return ''
+
+    cleanup_patterns = [
+        r'\s*[\|\-–]\s*amazon\.com.*$',
+        r'^\s*amazon\.com\s*[:\-]\s*',
+        r'\s*[\|\-–]\s*buy now.*$',
+        r'\s*[\|\-–]\s*official site.*$'
+    ]
+    for pattern in cleanup_patterns:
+        title = re.sub(pattern, '', title, flags=re.IGNORECASE)
+
+    title = re.sub(r'\s+', ' ', title).strip(' -|')
+    if merchant and title.lower().startswith(merchant.lower()):
+        title = title.strip()
+    return title
+
+
+def infer_category_from_text(name, description):
+    text = f"{name or ''} {description or ''}".lower()
+    category_map = {
+        'Electronics': ['headphone', 'earbud', 'speaker', 'smartwatch', 'laptop', 'usb', 'charger', 'camera', 'phone', 'tablet', 'electronics'],
+        'Fashion': ['shirt', 'tshirt', 'jeans', 'jacket', 'dress', 'shoe', 'sneaker', 'fashion', 'coat'],
+        'Home': ['lamp', 'kitchen', 'home', 'sofa', 'bed', 'garden', 'tool', 'vacuum', 'furniture', 'decor'],
+        'Books': ['book', 'novel', 'guide', 'handbook', 'paperback', 'hardcover', 'author']
+    }
+
+    best_category = None
+    best_score = 0
+    for category, keywords in category_map.items():
+        score = sum(1 for keyword in keywords if keyword in text)
+        if score > best_score:
+            best_score = score
+            best_category = category
+    return best_category or 'General'
+
+
+def extract_specs_from_text(text):
+    source = (text or '')
+    specs = []
+
+    measurement_matches = re.findall(
+        r'\b\d+(?:\.\d+)?\s?(?:inch|inches|cm|mm|gb|tb|mah|hz|w|oz|lb|lbs)\b',
+        source,
+        flags=re.IGNORECASE
+    )
+    specs.extend(measurement_matches[:6])
+
+    feature_keywords = [
+        'wireless', 'bluetooth', 'noise cancelling', 'waterproof', 'usb-c',
+        'fast charging', 'smart', 'portable', 'lightweight', 'eco-friendly'
+    ]
+    lowered = source.lower()
+    for keyword in feature_keywords:
+        if keyword in lowered:
+            specs.append(keyword.title())
+
+    color_match = re.search(r'\b(black|white|blue|red|green|pink|silver|gold|gray|grey)\b', lowered, flags=re.IGNORECASE)
+    if color_match:
+        specs.append(f"Color: {color_match.group(1).title()}")
+
+    # Preserve order and uniqueness.
+    deduped = []
+    seen = set()
+    for item in specs:
+        normalized = item.strip().lower()
+        if not normalized or normalized in seen:
+            continue
+        seen.add(normalized)
+        deduped.append(item.strip())
+    return deduped[:8]
+
+
+def parse_json_ld_candidates(html):
+    matches = re.findall(
+        r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+        html,
+        flags=re.IGNORECASE | re.DOTALL
+    )
+    parsed = []
+    for raw in matches:
+        content = raw.strip()
+        if not content:
+            continue
+        try:
+            parsed.append(json.loads(content))
+        except json.JSONDecodeError:
+            continue
+    return parsed
+
+
+def find_in_json_ld(nodes, key):
+    if isinstance(nodes, dict):
+        if key in nodes:
+            return nodes[key]
+        for value in nodes.values():
+            result = find_in_json_ld(value, key)
+            if result is not None:
+                return result
+    elif isinstance(nodes, list):
+        for item in nodes:
+            result = find_in_json_ld(item, key)
+            if result is not None:
+                return result
+    return None
+
+
+def extract_price_value(text):
+    if not text:
+        return None
+    numeric = text.replace(',', '')
+    match = re.search(r'(\d+(?:\.\d{1,2})?)', numeric)
+    return parse_float(match.group(1)) if match else None
+
+
+def pick_first_image_url(value):
+    if isinstance(value, str):
+        return value.strip() or None
+    if isinstance(value, list):
+        for item in value:
+            candidate = pick_first_image_url(item)
+            if candidate:
+                return candidate
+    if isinstance(value, dict):
+        for key in ('url', 'contentUrl', 'thumbnailUrl'):
+            if value.get(key):
+                return str(value.get(key)).strip()
+    return None
+
+
+def infer_extension_from_url_or_type(image_url, content_type):
+    extension = ''
+    if image_url:
+        parsed = urlsplit(image_url)
+        _, extension = os.path.splitext(parsed.path)
+    if extension.lower() in {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.avif', '.bmp'}:
+        return extension.lower()
+
+    if content_type:
+        guessed = mimetypes.guess_extension(content_type.split(';')[0].strip())
+        if guessed:
+            return guessed
+    return '.jpg'
+
+
+def persist_remote_image(image_url, referer_url=None):
+    if not image_url:
+        return None
+
+    try:
+        response = requests.get(
+            image_url,
+            timeout=20,
+            stream=True,
+            headers={
+                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0 Safari/537.36',
+                'Accept': 'image/avif,image/webp,image/apng,image/*,*/*;q=0.8',
+                'Referer': referer_url or ''
+            }
+        )
+        response.raise_for_status()
+
+        extension = infer_extension_from_url_or_type(image_url, response.headers.get('Content-Type', ''))
+        stored_name = f"imported-{uuid4().hex}{extension}"
+        upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], stored_name)
+
+        with open(upload_path, 'wb') as file_handle:
+            for chunk in response.iter_content(chunk_size=8192):
+                if chunk:
+                    file_handle.write(chunk)
+
+        return url_for('static', filename=f'uploads/{stored_name}')
+    except Exception:
+        current_app.logger.warning('Could not persist remote image from URL import', exc_info=True)
+        return image_url
+
+
+def scrape_product_details(url):
+    session = requests.Session()
+    response = session.get(
+        url,
+        timeout=20,
+        allow_redirects=True,
+        headers={
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0 Safari/537.36',
+            'Accept-Language': 'en-US,en;q=0.9'
+        }
+    )
+    response.raise_for_status()
+
+    html = response.text
+    final_url = response.url
+    json_ld_nodes = parse_json_ld_candidates(html)
+
+    title = (
+        extract_meta_value(html, ['og:title', 'twitter:title'])
+        or find_in_json_ld(json_ld_nodes, 'name')
+    )
+    if not title:
+        title_match = re.search(r'<title[^>]*>(.*?)</title>', html, flags=re.IGNORECASE | re.DOTALL)
+        title = title_match.group(1).strip() if title_match else None
+
+    description = (
+        extract_meta_value(html, ['og:description', 'description', 'twitter:description'])
+        or find_in_json_ld(json_ld_nodes, 'description')
+    )
+    image_url = (
+        extract_meta_value(html, ['og:image', 'twitter:image'])
+        or find_in_json_ld(json_ld_nodes, 'image')
+    )
+    image_url = pick_first_image_url(image_url)
+
+    price_text = (
+        extract_meta_value(html, ['product:price:amount', 'og:price:amount', 'price'])
+        or find_in_json_ld(json_ld_nodes, 'price')
+    )
+    rating_value = find_in_json_ld(json_ld_nodes, 'ratingValue')
+    review_count = find_in_json_ld(json_ld_nodes, 'reviewCount')
+    brand_value = find_in_json_ld(json_ld_nodes, 'brand')
+    if isinstance(brand_value, dict):
+        brand_value = brand_value.get('name') or brand_value.get('@id')
+    specs_candidates = []
+    for key in ['model', 'sku', 'mpn', 'material', 'color']:
+        value = find_in_json_ld(json_ld_nodes, key)
+        if isinstance(value, (str, int, float)):
+            specs_candidates.append(f"{key.upper()}: {value}")
+    specs_candidates.extend(extract_specs_from_text(f"{title or ''} {description or ''}"))
+
+    price = extract_price_value(str(price_text)) if price_text else None
+    rating = parse_float(rating_value)
+    reviews = parse_int(review_count)
+
+    return {
+        'final_url': final_url,
+        'name': title,
+        'description': description,
+        'image_url': image_url,
+        'price': price,
+        'rating': rating,
+        'review_count': reviews,
+        'merchant': infer_merchant_name(final_url),
+        'brand': (brand_value or '').strip() if isinstance(brand_value, str) else None,
+        'specs': specs_candidates
+    }
+
+
+def run_ai_import_cleaner(scraped):
+    report = []
+    cleaned = dict(scraped or {})
+
+    cleaned_name = clean_product_title(cleaned.get('name'), cleaned.get('merchant'))
+    if cleaned_name and cleaned_name != cleaned.get('name'):
+        report.append('Title normalized')
+    cleaned['name'] = cleaned_name or cleaned.get('name') or 'Imported Product'
+
+    if not cleaned.get('merchant') and cleaned.get('brand'):
+        cleaned['merchant'] = cleaned.get('brand')
+        report.append('Merchant filled from brand metadata')
+
+    inferred_category = infer_category_from_text(cleaned.get('name'), cleaned.get('description'))
+    cleaned['category'] = inferred_category
+    report.append(f'Category inferred as {inferred_category}')
+
+    specs = cleaned.get('specs') or []
+    if not isinstance(specs, list):
+        specs = []
+    cleaned['specs'] = [str(spec).strip() for spec in specs if str(spec).strip()][:8]
+
+    description = (cleaned.get('description') or '').strip()
+    if not description:
+        description = f"{cleaned['name']} in {cleaned['category']} category."
+        report.append('Description generated because source description was missing')
+
+    if cleaned['specs']:
+        specs_line = f"Key specs: {', '.join(cleaned['specs'][:5])}."
+        if 'key specs:' not in description.lower():
+            description = f"{description}\n\n{specs_line}"
+            report.append('Specs summary added to description')
+
+    cleaned['description'] = description
+
+    if cleaned.get('rating') is not None:
+        cleaned['rating'] = max(0, min(5, cleaned['rating']))
+    if cleaned.get('review_count') is not None:
+        cleaned['review_count'] = max(0, cleaned['review_count'])
+
+    if cleaned.get('price') is None:
+        cleaned['price'] = 0.0
+        report.append('Price missing; set to 0.0 for manual follow-up')
+
+    if not cleaned.get('image_url'):
+        fallback_images = {
+            'Electronics': '/static/images/wireless_headphones.svg',
+            'Fashion': '/static/images/tshirt.svg',
+            'Home': '/static/images/led_desk_lamp.svg',
+            'Books': '/static/images/python_programming_guide.svg',
+            'General': '/static/images/wireless_speaker.svg'
+        }
+        cleaned['image_url'] = fallback_images.get(cleaned['category'], fallback_images['General'])
+        report.append('Image missing; fallback image assigned')
+
+    return cleaned, report
@@ -0,0 +1,230 @@
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+from uuid import uuid4
+from flask import current_app, g, request
+
+PROFILE_HEADER = 'X-Profile'
+MAX_STACK_DEPTH = 128
+# Subtrees below this share of the profiled time are folded into their root frame; the path count
+# is exponential in the call graph's depth otherwise
+MIN_STACK_FRACTION = 0.0005
+MAX_SAMPLING_SECONDS = 60
+
+
+def frame_label(filename, line, name):
+    return f'{name} ({filename}:{line})'
+
+
+def collapse_pstats(stats):
+    """Approximate collapsed stacks ("a;b;c microseconds") from cProfile's caller graph.
+
+    cProfile records caller/callee pairs rather than whole stacks, so each
+    callee's time is split across its callers in proportion to the time spent
+    under each of them. Small subtrees are reported as one stack ending at
+    their root, so the totals still add up.
+    """
+    callees = defaultdict(dict)
+    for function, (_, _, _, _, callers) in stats.items():
+        for caller, (_, _, _, caller_cumulative) in callers.items():
+            callees[caller][function] = caller_cumulative
+
+    collapsed = Counter()
+    min_time = sum(entry[2] for entry in stats.values()) * MIN_STACK_FRACTION
+
+    def walk(function, path, scale):
+        _, _, own_time, cumulative, _ = stats[function]
+        path = path + (frame_label(*function),)
+        if own_time * scale > 0:
+            collapsed[';'.join(path)] += own_time * scale * 1e6
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for callee, time_under_caller in callees[function].items():
+            callee_cumulative = stats[callee][3]
+            if callee_cumulative <= 0 or frame_label(*callee) in path:
+                continue
+            if scale * time_under_caller < min_time:
+                collapsed[';'.join(path + (frame_label(*callee),))] += scale * time_under_caller * 1e6
+                continue
+            walk(callee, path, scale * time_under_caller / callee_cumulative)
+
+    for function, (_, _, _, _, callers) in stats.items():
+        if not callers:
+            walk(function, (), 1.0)
+    return format_collapsed(collapsed)
+
+
+def format_collapsed(counter):
+    return '\n'.join(f'{stack} {int(round(value))}' for stack, value in counter.most_common() if round(value) > 0) + '\n'
+
+
+class RequestProfiles:
+    """Bounded store of per-request cProfile results, newest last."""
+
+    def __init__(self, limit=20):
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.profiles = OrderedDict()
+        # cProfile hooks the interpreter, so only one request is profiled at a time
+        self.active = threading.Lock()
+
+    def add(self, profile_id, summary):
+        with self.lock:
+            self.profiles[profile_id] = summary
+            while len(self.profiles) > self.limit:
+                self.profiles.popitem(last=False)
+
+    def get(self, profile_id):
+        with self.lock:
+            return self.profiles.get(profile_id)
+
+    def list(self):
+        with self.lock:
+            return [
+                {key: value for key, value in summary.items() if key not in {'collapsed', 'text'}}
+                for summary in reversed(self.profiles.values())
+            ]
+
+
+class StackSampler:
+    """Samples the Python stacks of threads that are serving requests and aggregates them."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.request_threads = set()
+        self.samples = Counter()
+        self.sample_count = 0
+        self.thread = None
+        self.started_at = None
+        self.finished_at = None
+        self.seconds = 0
+        self.interval = 0
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, seconds, interval):
+        with self.lock:
+            if self.running:
+                return False
+            self.samples = Counter()
+            self.sample_count = 0
+            self.seconds = seconds
+            self.interval = interval
+            self.started_at = time.time()
+            self.finished_at = None
+            self.thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+            self.thread.start()
+            return True
+
+    def _run(self):
+        deadline = time.perf_counter() + self.seconds
+        own_ident = threading.get_ident()
+        while time.perf_counter() < deadline:
+            frames = sys._current_frames()
+            stacks = []
+            for ident in list(self.request_threads):
+                frame = frames.get(ident)
+                if frame is None or ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(frame_label(code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                stacks.append(';'.join(reversed(stack)))
+            with self.lock:
+                self.samples.update(stacks)
+                self.sample_count += 1
+            time.sleep(self.interval)
+        self.finished_at = time.time()
+
+    def status(self):
+        with self.lock:
+            return {
+                'running': self.running,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'seconds': self.seconds,
+                'interval_ms': round(self.interval * 1000, 2),
+                'ticks': self.sample_count,
+                'stack_samples': sum(self.samples.values()),
+            }
+
+    def collapsed(self):
+        with self.lock:
+            return format_collapsed(self.samples)
+
+
+def start_request_profile():
+    profiles = current_app.extensions['request_profiles']
+    sampler = current_app.extensions['stack_sampler']
+    if sampler.running:
+        sampler.request_threads.add(threading.get_ident())
+        g.sampled_thread = True
+
+    if not request.headers.get(PROFILE_HEADER):
+        return None
+    from app.routes import require_admin_key
+    if require_admin_key() is not None:
+        return None
+    if not profiles.active.acquire(blocking=False):
+        g.profile_busy = True
+        return None
+    g.profiler = cProfile.Profile()
+    g.profiler.enable()
+    return None
+
+
+def finish_request_profile(response):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        current_app.extensions['request_profiles'].active.release()
+        profile_id = uuid4().hex[:12]
+        stats = pstats.Stats(profiler)
+        text = io.StringIO()
+        stats.stream = text
+        stats.sort_stats('cumulative').print_stats(40)
+        current_app.extensions['request_profiles'].add(profile_id, {
+            'id': profile_id,
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'total_ms': round(stats.total_tt * 1000, 2),
+            'created_at': time.time(),
+            'collapsed': collapse_pstats(stats.stats),
+            'text': text.getvalue(),
+        })
+        response.headers['X-Profile-Id'] = profile_id
+    elif g.pop('profile_busy', False):
+        response.headers['X-Profile-Id'] = 'busy'
+    return response
+
+
+def release_request_profile(exception=None):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        # The request failed before after_request ran
+        profiler.disable()
+        current_app.extensions['request_profiles'].active.release()
+    if g.pop('sampled_thread', False):
+        current_app.extensions['stack_sampler'].request_threads.discard(threading.get_ident())
+
+
+def init_profiling(app):
+    """Register the profiling hooks; nothing is installed unless PROFILING_ENABLED is set."""
+    if not app.config.get('PROFILING_ENABLED'):
+        return None
+    app.extensions['request_profiles'] = RequestProfiles(app.config.get('PROFILE_HISTORY', 20))
+    app.extensions['stack_sampler'] = StackSampler()
+    app.before_request(start_request_profile)
+    app.after_request(finish_request_profile)
+    app.teardown_request(release_request_profile)
+    return app.extensions['request_profiles']
@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, jsonify, request
+
+# (requests refilled per second, burst capacity) per scope
+DEFAULT_RATE_LIMITS = {
+    'login': {'ip': (10 / 60, 20), 'account': (5 / 60, 5)},
+    'forgot_password': {'ip': (5 / 60, 10), 'account': (3 / 3600, 3)},
+    'admin_login': {'ip': (5 / 60, 5)},
+    'support_contact': {'ip': (10 / 3600, 10), 'account': (5 / 3600, 5)},
+    'checkout': {'ip': (30 / 60, 30), 'account': (10 / 60, 10)},
+}
+
+
+def refill(state, rate, capacity, now):
+    tokens, updated_at = state if state else (capacity, now)
+    return min(capacity, tokens + (now - updated_at) * rate), now
+
+
+class MemoryRateLimitStore:
+    """In-process token buckets.
+
+    Buckets are immutable ``(tokens, updated_at, full_at)`` tuples swapped into
+    a dict, so the hot path takes no lock; two racing requests on one key can at
+    worst both be admitted on the last token, which is acceptable for throttling.
+
+    ``full_at`` is when the bucket will have refilled completely under its own
+    rate; from then on it carries no state worth keeping. Once more than
+    ``max_keys`` buckets exist, such buckets are dropped at most every
+    ``prune_every`` calls, so the scan costs O(1) per request amortized.
+    Between scans, and when a scan frees too little (slow scopes take up to an
+    hour to refill), the least recently used buckets are evicted whether full
+    or not, so ``max_keys`` is a hard cap.
+    """
+
+    def __init__(self, max_keys=100000, prune_every=None):
+        self.buckets = OrderedDict()
+        self.max_keys = max_keys
+        self.prune_every = prune_every or max(1, max_keys // 10)
+        self.calls_since_prune = 0
+
+    def consume(self, key, rate, capacity, cost=1, now=None):
+        now = time.monotonic() if now is None else now
+        state = self.buckets.get(key)
+        tokens, updated_at = refill(state[:2] if state else None, rate, capacity, now)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self.buckets[key] = (tokens, updated_at, updated_at + (capacity - tokens) / rate)
+        try:
+            self.buckets.move_to_end(key)
+        except KeyError:
+            # Evicted by a racing request in between
+            pass
+        self.calls_since_prune += 1
+        if len(self.buckets) > self.max_keys:
+            if self.calls_since_prune >= self.prune_every:
+                self.prune(now)
+            self.evict(len(self.buckets) - self.max_keys)
+        return allowed, 0 if allowed else (cost - tokens) / rate
+
+    def evict(self, count):
+        """Drop the ``count`` least recently used buckets, full or not."""
+        for _ in range(count):
+            try:
+                self.buckets.popitem(last=False)
+            except KeyError:
+                break
+
+    def prune(self, now=None):
+        """Drop buckets that have refilled completely."""
+        now = time.monotonic() if now is None else now
+        self.calls_since_prune = 0
+        for key, state in list(self.buckets.items()):
+            if state[2] <= now and self.buckets.get(key) is state:
+                self.buckets.pop(key, None)
+
+
+class LocalSharedClient:
+    """Local stand-in for a shared key-value backend (e.g. Redis WATCH/MULTI)."""
+
+    def __init__(self):
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        entry = self.values.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def compare_and_set(self, key, expected, value, ttl):
+        with self.lock:
+            if self.get(key) != expected:
+                return False
+            self.values[key] = (value, time.monotonic() + ttl)
+            return True
+
+
+class SharedRateLimitStore:
+    """Token buckets kept in a shared backend so every worker sees the same counts.
+
+    The client needs ``get(key)`` and ``compare_and_set(key, expected, value, ttl)``.
+    """
+
+    def __init__(self, client, prefix='ratelimit:', max_attempts=5):
+        self.client = client
+        self.prefix = prefix
+        self.max_attempts = max_attempts
+
+    def consume(self, key, rate, capacity, cost=1, now=None):
+        key = f'{self.prefix}{key}'
+        ttl = capacity / rate
+        for _ in range(self.max_attempts):
+            current_time = time.monotonic() if now is None else now
+            previous = self.client.get(key)
+            tokens, updated_at = refill(previous, rate, capacity, current_time)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            if self.client.compare_and_set(key, previous, (tokens, updated_at), ttl):
+                return allowed, 0 if allowed else (cost - tokens) / rate
+        # Heavy contention on one key is itself a sign of abuse.
+        return False, 1 / rate
+
+
+class RateLimiter:
+    def __init__(self, store, limits=None, enabled=True):
+        self.store = store
+        self.limits = limits or DEFAULT_RATE_LIMITS
+        self.enabled = enabled
+
+    def check(self, name, account=None):
+        """Consume one token from each applicable bucket; return seconds to wait or 0.
+
+        Scopes are checked in order and the first denial stops the check, so a
+        request refused per IP does not also drain the account's bucket.
+        """
+        if not self.enabled:
+            return 0
+        scopes = self.limits.get(name, {})
+        checks = [('ip', request.remote_addr or 'unknown')]
+        if account:
+            checks.append(('account', account))
+        for scope, identity in checks:
+            if scope not in scopes:
+                continue
+            rate, capacity = scopes[scope]
+            allowed, wait = self.store.consume(f'{name}:{scope}:{identity}', rate, capacity)
+            if not allowed:
+                return wait
+        return 0
+
+
+def rate_limited(name, account_field=None):
+    """Reject over-limit requests with 429 before the view touches the DB or hashes."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            limiter = current_app.extensions.get('rate_limiter')
+            if limiter is not None and limiter.enabled:
+                account = None
+                if account_field:
+                    data = request.get_json(silent=True) if request.is_json else request.form
+                    account = ((data or {}).get(account_field) or '').strip().lower()[:255] or None
+                retry_after = limiter.check(name, account)
+                if retry_after:
+                    response = jsonify({'error': 'Too many requests. Please try again later.'})
+                    response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+                    return response, 429
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def init_rate_limiter(app, store=None):
+    if store is None:
+        backend = app.config.get('RATE_LIMIT_STORE', 'memory')
+        store = SharedRateLimitStore(LocalSharedClient()) if backend == 'local-shared' else MemoryRateLimitStore()
+    limiter = RateLimiter(
+        store,
+        limits=app.config.get('RATE_LIMITS'),
+        enabled=app.config.get('RATE_LIMIT_ENABLED', True)
+    )
+    app.extensions['rate_limiter'] = limiter
+    return limiter
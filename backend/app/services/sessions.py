@@ -0,0 +1,228 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, g, jsonify, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import RevokedToken, User
+
+SessionUser = namedtuple('SessionUser', ['id', 'name', 'email', 'session_id'])
+# Revocations committed by another worker just before a sync are still picked up
+SYNC_OVERLAP = timedelta(seconds=5)
+EPOCH = datetime(1970, 1, 1)
+
+
+def epoch_seconds(moment):
+    return (moment - EPOCH).total_seconds()
+
+
+class SessionTokens:
+    """Issues and verifies signed access/refresh tokens without a per-request database lookup.
+
+    Access tokens carry the user's id, name and email. Verified tokens are kept
+    in a bounded LRU so repeat requests skip the HMAC check. Revoked sessions
+    and users live in memory and are re-read from ``revoked_tokens`` at most
+    every ``sync_seconds``; entries are dropped once every token they cover
+    has expired.
+
+    Tokens carry an ``iat`` claim with sub-second precision, so a revocation
+    applies to tokens issued up to that instant but not to ones issued after.
+    """
+
+    def __init__(self, secret_key, access_seconds=900, refresh_seconds=14 * 86400, cache_size=10000, sync_seconds=5):
+        self.access_serializer = URLSafeTimedSerializer(secret_key, salt='session-access')
+        self.refresh_serializer = URLSafeTimedSerializer(secret_key, salt='session-refresh')
+        self.access_seconds = access_seconds
+        self.refresh_seconds = refresh_seconds
+        self.cache_size = cache_size
+        self.sync_seconds = sync_seconds
+        self.lock = threading.Lock()
+        self.verified = OrderedDict()
+        # session id -> expires_at, user id -> (revoked_at, expires_at); epoch seconds
+        self.revoked_sessions = {}
+        self.revoked_users = {}
+        self.synced_at = None
+        self.sync_marker = None
+
+    def issue(self, user, session_id=None):
+        session_id = session_id or secrets.token_urlsafe(16)
+        issued_at = time.time()
+        access_token = self.access_serializer.dumps({
+            'uid': user.id, 'name': user.name, 'email': user.email, 'sid': session_id, 'iat': issued_at
+        })
+        refresh_token = self.refresh_serializer.dumps({
+            'uid': user.id, 'sid': session_id, 'jti': secrets.token_urlsafe(16), 'iat': issued_at
+        })
+        return {
+            'access_token': access_token,
+            'refresh_token': refresh_token,
+            'token_type': 'Bearer',
+            'expires_in': self.access_seconds
+        }
+
+    def verify(self, token):
+        """The SessionUser for a valid access token, or None."""
+        with self.lock:
+            entry = self.verified.get(token)
+            if entry is not None:
+                self.verified.move_to_end(token)
+        if entry is None:
+            try:
+                claims, signed_at = self.access_serializer.loads(token, max_age=self.access_seconds, return_timestamp=True)
+            except BadSignature:
+                return None
+            issued_at = claims.get('iat', signed_at.timestamp())
+            entry = (SessionUser(claims['uid'], claims['name'], claims['email'], claims['sid']), issued_at,
+                     issued_at + self.access_seconds)
+            with self.lock:
+                self.verified[token] = entry
+                while len(self.verified) > self.cache_size:
+                    self.verified.popitem(last=False)
+
+        user, issued_at, expires_at = entry
+        if time.time() >= expires_at:
+            with self.lock:
+                self.verified.pop(token, None)
+            return None
+        if self.is_revoked(user.session_id, user.id, issued_at):
+            return None
+        return user
+
+    def is_revoked(self, session_id, user_id, issued_at):
+        revoked_user = self.revoked_users.get(user_id)
+        return session_id in self.revoked_sessions or (revoked_user is not None and issued_at <= revoked_user[0])
+
+    def sync_revocations(self, force=False):
+        """Load revocations written by any worker since the last sync."""
+        now = time.monotonic()
+        if not force and self.synced_at is not None and now - self.synced_at < self.sync_seconds:
+            return
+        query = select(RevokedToken.token_id, RevokedToken.kind, RevokedToken.revoked_at, RevokedToken.expires_at).where(
+            RevokedToken.kind.in_(('session', 'user')), RevokedToken.expires_at > datetime.utcnow()
+        )
+        if self.sync_marker is not None:
+            query = query.where(RevokedToken.revoked_at >= self.sync_marker - SYNC_OVERLAP)
+        rows = db.session.execute(query).all()
+        for token_id, kind, revoked_at, expires_at in rows:
+            self._remember(token_id, kind, revoked_at, expires_at)
+            if self.sync_marker is None or revoked_at > self.sync_marker:
+                self.sync_marker = revoked_at
+        self._prune(time.time())
+        self.synced_at = now
+
+    def _remember(self, token_id, kind, revoked_at, expires_at):
+        expires = epoch_seconds(expires_at)
+        with self.lock:
+            if kind == 'session':
+                self.revoked_sessions[token_id] = expires
+            elif kind == 'user':
+                user_id = int(token_id.split(':', 1)[1])
+                previous = self.revoked_users.get(user_id, (0, 0))
+                self.revoked_users[user_id] = (max(previous[0], epoch_seconds(revoked_at)), max(previous[1], expires))
+
+    def _prune(self, now):
+        """Forget revocations whose tokens have all expired."""
+        with self.lock:
+            self.revoked_sessions = {
+                session_id: expires for session_id, expires in self.revoked_sessions.items() if expires > now
+            }
+            self.revoked_users = {
+                user_id: entry for user_id, entry in self.revoked_users.items() if entry[1] > now
+            }
+
+    def _record(self, token_id, kind, lifetime):
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=lifetime)
+        db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at < now))
+        db.session.merge(RevokedToken(token_id=token_id, kind=kind, revoked_at=now, expires_at=expires_at))
+        db.session.commit()
+        self._remember(token_id, kind, now, expires_at)
+
+    def revoke_session(self, session_id):
+        """Log one session out everywhere; its access and refresh tokens stop working."""
+        self._record(session_id, 'session', self.refresh_seconds)
+
+    def revoke_user(self, user_id):
+        """Invalidate every token issued to the user so far, e.g. after a password reset."""
+        self._record(f'user:{user_id}', 'user', self.refresh_seconds)
+
+    def rotate(self, refresh_token):
+        """Swap a refresh token for a new token pair. Returns None if it is invalid or already used.
+
+        Each refresh token works once. Presenting a spent one means it leaked, so
+        the whole session is revoked.
+        """
+        try:
+            claims, signed_at = self.refresh_serializer.loads(
+                refresh_token, max_age=self.refresh_seconds, return_timestamp=True
+            )
+        except BadSignature:
+            return None
+        self.sync_revocations(force=True)
+        if self.is_revoked(claims['sid'], claims['uid'], claims.get('iat', signed_at.timestamp())):
+            return None
+
+        db.session.add(RevokedToken(
+            token_id=claims['jti'], kind='refresh',
+            expires_at=datetime.utcnow() + timedelta(seconds=self.refresh_seconds)
+        ))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            current_app.logger.warning('Refresh token reused; revoking session %s', claims['sid'])
+            self.revoke_session(claims['sid'])
+            return None
+
+        user = db.session.get(User, claims['uid'])
+        if user is None:
+            return None
+        return self.issue(user, session_id=claims['sid'])
+
+
+def session_tokens():
+    return current_app.extensions['session_tokens']
+
+
+def bearer_token():
+    scheme, _, token = (request.headers.get('Authorization') or '').partition(' ')
+    return token.strip() if scheme.lower() == 'bearer' else ''
+
+
+def current_session_user():
+    """The user behind the request's bearer token, or None. Cached on ``g`` for the request."""
+    if 'current_user' not in g:
+        token = bearer_token()
+        tokens = session_tokens()
+        if token:
+            tokens.sync_revocations()
+        g.current_user = tokens.verify(token) if token else None
+    return g.current_user
+
+
+def login_required(view):
+    """Reject requests without a valid access token; the user is in ``g.current_user``."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if current_session_user() is None:
+            return jsonify({'error': 'Authentication required'}), 401
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def init_sessions(app):
+    tokens = SessionTokens(
+        app.config['SECRET_KEY'],
+        access_seconds=app.config.get('SESSION_ACCESS_SECONDS', 900),
+        refresh_seconds=app.config.get('SESSION_REFRESH_SECONDS', 14 * 86400),
+        cache_size=app.config.get('SESSION_CACHE_SIZE', 10000),
+        sync_seconds=app.config.get('SESSION_REVOCATION_SYNC_SECONDS', 5)
+    )
+    app.extensions['session_tokens'] = tokens
+    return tokens
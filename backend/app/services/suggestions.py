@@ -0,0 +1,122 @@
+from concurrent.futures import ThreadPoolExecutor
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app import db
+from app.models import SupportTicket
+
+
+class SuggestionEngine:
+    """Interface for engines that draft an assistant reply for a support ticket."""
+
+    name = 'base'
+
+    def suggest(self, subject, message):
+        raise NotImplementedError
+
+    def suggest_many(self, tickets):
+        return [self.suggest(subject, message) for subject, message in tickets]
+
+
+class FaqSuggestionEngine(SuggestionEngine):
+    """Local, deterministic engine backed by the compiled FAQ matcher."""
+
+    name = 'faq'
+
+    def __init__(self, app):
+        self.app = app
+
+    def suggest(self, subject, message):
+        answer, _ = self.app.extensions['faq_matcher'].reply(message)
+        return answer
+
+
+SUGGESTION_ENGINES = {
+    'faq': FaqSuggestionEngine
+}
+
+
+def register_suggestion_engine(name, factory):
+    """Register an engine factory taking the Flask app, selectable via SUGGESTION_ENGINE."""
+    SUGGESTION_ENGINES[name] = factory
+
+
+def fill_ticket_suggestions(engine, tickets):
+    """Compute and store suggestions for tickets that do not have one yet."""
+    suggestions = engine.suggest_many([(ticket.subject, ticket.message) for ticket in tickets])
+    updated = 0
+    for ticket, suggestion in zip(tickets, suggestions):
+        updated += SupportTicket.query.filter(
+            SupportTicket.id == ticket.id,
+            SupportTicket.assistant_suggestion.is_(None)
+        ).update({'assistant_suggestion': suggestion}, synchronize_session=False)
+    db.session.commit()
+    return updated
+
+
+class SuggestionDispatcher:
+    """Runs suggestion engines off the request path.
+
+    SUGGESTION_DISPATCH selects ``thread`` (background pool, default) or
+    ``inline`` (compute before returning, used by tests).
+    """
+
+    def __init__(self, app, engine):
+        self.app = app
+        self.engine = engine
+        self.executor = None
+
+    def submit(self, ticket_id):
+        if self.app.config.get('SUGGESTION_DISPATCH', 'thread') == 'inline':
+            self._run(ticket_id)
+            return
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.app.config.get('SUGGESTION_WORKERS', 2),
+                thread_name_prefix='ticket-suggestions'
+            )
+        self.executor.submit(self._run, ticket_id)
+
+    def _run(self, ticket_id):
+        with self.app.app_context():
+            try:
+                ticket = db.session.get(SupportTicket, ticket_id)
+                if ticket is not None and ticket.assistant_suggestion is None:
+                    fill_ticket_suggestions(self.engine, [ticket])
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception(f'Assistant suggestion failed for ticket {ticket_id}')
+            finally:
+                db.session.remove()
+
+
+@click.command('backfill-suggestions')
+@click.option('--batch-size', default=200, show_default=True, help='Tickets processed per commit.')
+@with_appcontext
+def backfill_suggestions_command(batch_size):
+    """Fill assistant suggestions for tickets that are missing one."""
+    engine = current_app.extensions['suggestion_dispatcher'].engine
+    last_id = 0
+    total = 0
+    while True:
+        tickets = SupportTicket.query.filter(
+            SupportTicket.assistant_suggestion.is_(None),
+            SupportTicket.id > last_id
+        ).order_by(SupportTicket.id.asc()).limit(batch_size).all()
+        if not tickets:
+            break
+        last_id = tickets[-1].id
+        total += fill_ticket_suggestions(engine, tickets)
+        db.session.expunge_all()
+    click.echo(f'Backfilled suggestions for {total} tickets.')
+
+
+def init_suggestions(app):
+    engine_name = app.config.get('SUGGESTION_ENGINE') or 'faq'
+    if engine_name not in SUGGESTION_ENGINES:
+        raise ValueError(f'Unknown suggestion engine: {engine_name}')
+    dispatcher = SuggestionDispatcher(app, SUGGESTION_ENGINES[engine_name](app))
+    app.extensions['suggestion_dispatcher'] = dispatcher
+    app.cli.add_command(backfill_suggestions_command)
+    return dispatcher
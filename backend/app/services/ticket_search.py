@@ -0,0 +1,134 @@
+import base64
+import re
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import and_, or_, func, text
+from app import db
+from app.models import SupportTicket
+
+TICKET_STATUSES = ('open', 'in_progress', 'resolved', 'closed')
+SEARCH_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+SQLITE_FTS_STATEMENTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS support_tickets_fts USING fts5("
+    "subject, message, customer_email, content='support_tickets', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS support_tickets_fts_ai AFTER INSERT ON support_tickets BEGIN "
+    "INSERT INTO support_tickets_fts(rowid, subject, message, customer_email) "
+    "VALUES (new.id, new.subject, new.message, new.customer_email); END",
+    "CREATE TRIGGER IF NOT EXISTS support_tickets_fts_ad AFTER DELETE ON support_tickets BEGIN "
+    "INSERT INTO support_tickets_fts(support_tickets_fts, rowid, subject, message, customer_email) "
+    "VALUES ('delete', old.id, old.subject, old.message, old.customer_email); END",
+    "CREATE TRIGGER IF NOT EXISTS support_tickets_fts_au AFTER UPDATE OF subject, message, customer_email "
+    "ON support_tickets BEGIN "
+    "INSERT INTO support_tickets_fts(support_tickets_fts, rowid, subject, message, customer_email) "
+    "VALUES ('delete', old.id, old.subject, old.message, old.customer_email); "
+    "INSERT INTO support_tickets_fts(rowid, subject, message, customer_email) "
+    "VALUES (new.id, new.subject, new.message, new.customer_email); END",
+]
+
+POSTGRES_SEARCH_DOCUMENT = (
+    "to_tsvector('simple', coalesce(subject, '') || ' ' || coalesce(message, '') "
+    "|| ' ' || coalesce(customer_email, ''))"
+)
+
+
+def create_ticket_search_index(connection):
+    """Create the full-text index over tickets (run by the schema migrations)."""
+    if connection.dialect.name == 'sqlite':
+        has_trigger = connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'support_tickets_fts_ai'"
+        )).first()
+        try:
+            with connection.begin_nested():
+                for statement in SQLITE_FTS_STATEMENTS:
+                    connection.execute(text(statement))
+                if not has_trigger:
+                    connection.execute(text(
+                        "INSERT INTO support_tickets_fts(support_tickets_fts) VALUES ('rebuild')"
+                    ))
+        except Exception:
+            current_app.logger.warning('SQLite FTS5 unavailable; ticket search falls back to LIKE')
+    elif connection.dialect.name == 'postgresql':
+        connection.execute(text(
+            'CREATE INDEX IF NOT EXISTS ix_support_tickets_search '
+            f'ON support_tickets USING gin ({POSTGRES_SEARCH_DOCUMENT})'
+        ))
+
+
+def detect_ticket_search_backend(connection):
+    if connection.dialect.name == 'postgresql':
+        return 'tsvector'
+    if connection.dialect.name == 'sqlite' and connection.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'support_tickets_fts_ai'"
+    )).first():
+        return 'fts5'
+    return 'like'
+
+
+def ticket_search_backend(app=None):
+    """Search backend in use ('fts5', 'tsvector' or 'like'), detected on first use."""
+    app = app or current_app
+    backend = app.extensions.get('ticket_search_backend')
+    if backend is None:
+        with db.engine.connect() as connection:
+            backend = app.extensions['ticket_search_backend'] = detect_ticket_search_backend(connection)
+    return backend
+
+
+def ticket_search_clause(search, backend):
+    tokens = SEARCH_TOKEN_PATTERN.findall((search or '').lower())
+    if not tokens:
+        return None
+
+    if backend == 'fts5':
+        match_expression = ' '.join(f'"{token}"*' for token in tokens)
+        return SupportTicket.id.in_(
+            text('SELECT rowid FROM support_tickets_fts WHERE support_tickets_fts MATCH :ticket_search')
+            .bindparams(ticket_search=match_expression)
+        )
+
+    if backend == 'tsvector':
+        return text(f"{POSTGRES_SEARCH_DOCUMENT} @@ plainto_tsquery('simple', :ticket_search)").bindparams(
+            ticket_search=' '.join(tokens)
+        )
+
+    return and_(*[
+        or_(
+            SupportTicket.subject.ilike(f'%{token}%'),
+            SupportTicket.message.ilike(f'%{token}%'),
+            SupportTicket.customer_email.ilike(f'%{token}%')
+        )
+        for token in tokens
+    ])
+
+
+def encode_ticket_cursor(ticket):
+    raw = f'{ticket.created_at.isoformat()}|{ticket.id}'
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_ticket_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, ticket_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(ticket_id)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def ticket_keyset_clause(cursor):
+    created_at, ticket_id = cursor
+    return or_(
+        SupportTicket.created_at < created_at,
+        and_(SupportTicket.created_at == created_at, SupportTicket.id < ticket_id)
+    )
+
+
+def ticket_status_counts(search_clause=None):
+    query = db.session.query(SupportTicket.status, func.count(SupportTicket.id))
+    if search_clause is not None:
+        query = query.filter(search_clause)
+    counts = {status: 0 for status in TICKET_STATUSES}
+    for status, count in query.group_by(SupportTicket.status).all():
+        counts[status or 'open'] = counts.get(status or 'open', 0) + count
+    return counts
@@ -0,0 +1,75 @@
+import threading
+import time
+from sqlalchemy import text
+from app import db
+from app.services.ticket_search import ticket_search_backend
+
+# Storefront pages rendered once so the page cache is hot before traffic arrives
+WARM_PATHS = ('/', '/deals', '/reviews')
+
+
+def _warm_database(app):
+    db.session.execute(text('SELECT 1'))
+    return ticket_search_backend(app)
+
+
+def _warm_templates(app):
+    templates = [name for name in app.jinja_env.list_templates() if name.endswith('.html')]
+    for name in templates:
+        app.jinja_env.get_template(name)
+    return len(templates)
+
+
+def _warm_indexes(app):
+    app.extensions['faq_matcher'].reply('shipping')
+    warmed = []
+    for name in ('product_autocomplete', 'catalog_snapshot', 'product_scores'):
+        index = app.extensions.get(name)
+        if index is not None:
+            # Rebuilds indexes inherited from the master if the catalog changed since
+            index.get()
+            warmed.append(name)
+    app.extensions['product_autocomplete'].get().suggest('a')
+    return sorted(warmed)
+
+
+def _warm_pages(app):
+    client = app.test_client()
+    return {path: client.get(path).status_code for path in WARM_PATHS}
+
+
+WARM_STEPS = (
+    ('database', _warm_database),
+    ('templates', _warm_templates),
+    ('indexes', _warm_indexes),
+    ('pages', _warm_pages),
+)
+
+
+def readiness_state(app):
+    return app.extensions.setdefault('readiness', {'ready': False, 'checks': {}, 'lock': threading.Lock()})
+
+
+def warm_app(app):
+    """Run the warm-up steps once per process; later calls return the recorded result."""
+    state = readiness_state(app)
+    with state['lock']:
+        if state['ready']:
+            return state
+        started = time.perf_counter()
+        checks = {}
+        ready = True
+        with app.app_context():
+            for name, step in WARM_STEPS:
+                try:
+                    checks[name] = {'ok': True, 'detail': step(app)}
+                except Exception as error:
+                    app.logger.exception('Warm-up step %s failed', name)
+                    checks[name] = {'ok': False, 'detail': str(error)}
+                    ready = False
+                finally:
+                    db.session.remove()
+        state['checks'] = checks
+        state['ready'] = ready
+        state['warmup_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return state
@@ -0,0 +1,118 @@
+"""
+Synthetic catalog generator for benchmarks.
+Fills a database with products, images, reviews and support tickets whose
+shapes (categories, merchants, price and rating spread, deal ratio) follow the
+seed catalog, deterministically for a given seed.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+CATEGORIES = ['Electronics', 'Fashion', 'Home', 'Books', 'Garden', 'Toys', 'Sports', 'Beauty']
+MERCHANTS = ['Amazon', 'Walmart', 'Target', 'BestBuy', 'Etsy']
+ADJECTIVES = ['Wireless', 'Portable', 'Smart', 'Compact', 'Premium', 'Organic', 'Ergonomic', 'Vintage', 'Classic', 'Ultra']
+NOUNS = {
+    'Electronics': ['Headphones', 'Speaker', 'Charger', 'Keyboard', 'Monitor', 'Camera'],
+    'Fashion': ['Jacket', 'Sneakers', 'Backpack', 'Watch', 'Sunglasses', 'Scarf'],
+    'Home': ['Desk Lamp', 'Blender', 'Kettle', 'Pillow', 'Air Purifier', 'Coffee Maker'],
+    'Books': ['Cookbook', 'Python Guide', 'Novel', 'Atlas', 'Sketchbook', 'Planner'],
+    'Garden': ['Hose', 'Planter', 'Pruner', 'Bird Feeder', 'Solar Light', 'Rake'],
+    'Toys': ['Puzzle', 'Building Set', 'Drone', 'Board Game', 'Plush Bear', 'RC Car'],
+    'Sports': ['Yoga Mat', 'Dumbbells', 'Water Bottle', 'Tennis Racket', 'Bike Helmet', 'Jump Rope'],
+    'Beauty': ['Face Serum', 'Hair Dryer', 'Lip Balm', 'Perfume', 'Brush Set', 'Sunscreen'],
+}
+REVIEW_PHRASES = ['Works great', 'Arrived quickly', 'Good value for money', 'Stopped working after a month',
+                  'Exactly as described', 'Would buy again', 'Smaller than expected', 'Excellent build quality']
+TICKET_SUBJECTS = ['Where is my order?', 'Refund request', 'Wrong item received', 'How do affiliate links work?',
+                   'Cannot reset password', 'Shipping to Canada', 'Price changed after checkout', 'Coupon not applied']
+BATCH_SIZE = 10000
+
+
+def _insert(db, table, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(table.insert(), rows[start:start + BATCH_SIZE])
+
+
+def generate_catalog(db, size, seed=7, reviews_per_product=2, images_per_product=1, ticket_ratio=0.1):
+    """Insert ``size`` products plus their images and reviews, and ``size * ticket_ratio`` tickets.
+
+    Returns the row counts inserted per table. Runs inside the caller's app context.
+    """
+    from app.models import Product, ProductImage, Review, SupportTicket
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    counts = {'products': 0, 'product_images': 0, 'reviews': 0, 'support_tickets': 0}
+
+    for start in range(0, size, BATCH_SIZE):
+        products, images, reviews = [], [], []
+        for index in range(start, min(start + BATCH_SIZE, size)):
+            product_id = index + 1
+            category = rng.choice(CATEGORIES)
+            price = round(rng.uniform(1, 500), 2)
+            is_deal = rng.random() < 0.2
+            name = f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS[category])} {index:07d}'
+            products.append({
+                'id': product_id,
+                'name': name,
+                'description': f'{name} for everyday use. Durable, well reviewed and ready to ship.',
+                'price': price,
+                'image_url': f'/static/images/product-{index % 50}.svg',
+                'stock': rng.randint(0, 100),
+                'category': category,
+                'affiliate_url': f'https://example.com/products/{product_id}',
+                'merchant': rng.choice(MERCHANTS),
+                'rating': round(rng.uniform(1, 5), 1) if rng.random() < 0.9 else None,
+                'review_count': rng.randint(0, 5000),
+                'is_deal': is_deal,
+                'deal_price': round(price * 0.8, 2) if is_deal else None,
+                'original_price': price,
+                'created_at': now - timedelta(minutes=index),
+                'updated_at': now,
+            })
+            for position in range(images_per_product):
+                images.append({
+                    'product_id': product_id,
+                    'image_url': f'/static/images/gallery-{(index + position) % 200}.jpg',
+                    'sort_order': position,
+                    'created_at': now,
+                })
+            for position in range(reviews_per_product):
+                reviews.append({
+                    'product_id': product_id,
+                    'reviewer_name': f'Shopper {rng.randint(1, 50000)}',
+                    'reviewer_email': f'shopper{rng.randint(1, 50000)}@example.com',
+                    'rating': rng.randint(1, 5),
+                    'title': rng.choice(REVIEW_PHRASES),
+                    'body': ' '.join(rng.sample(REVIEW_PHRASES, 3)),
+                    'helpful_count': rng.randint(0, 40),
+                    'verified_purchase': rng.random() < 0.5,
+                    'moderation_status': 'approved' if rng.random() < 0.9 else 'pending',
+                    'created_at': now - timedelta(minutes=index + position),
+                    'updated_at': now,
+                })
+        _insert(db, Product.__table__, products)
+        _insert(db, ProductImage.__table__, images)
+        _insert(db, Review.__table__, reviews)
+        counts['products'] += len(products)
+        counts['product_images'] += len(images)
+        counts['reviews'] += len(reviews)
+
+    tickets = []
+    for index in range(int(size * ticket_ratio)):
+        subject = rng.choice(TICKET_SUBJECTS)
+        tickets.append({
+            'ticket_number': f'BENCH-{index:08d}',
+            'customer_name': f'Customer {index}',
+            'customer_email': f'customer{index}@example.com',
+            'subject': subject,
+            'message': f'{subject} Order reference {rng.randint(100000, 999999)}. Please help.',
+            'channel': 'contact_form',
+            'status': rng.choice(['open', 'in_progress', 'resolved', 'closed']),
+            'created_at': now - timedelta(minutes=index),
+            'updated_at': now,
+        })
+    _insert(db, SupportTicket.__table__, tickets)
+    counts['support_tickets'] = len(tickets)
+    db.session.commit()
+    return counts
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+Catalog snapshot benchmark.
+Compares get_products-style filter/sort/limit queries answered by SQL against
+the in-memory columnar CatalogSnapshot, at several catalog sizes.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+QUERIES = [
+    {'sort': 'newest', 'limit': 24},
+    {'category': 'Electronics', 'sort': 'price_asc', 'limit': 24},
+    {'merchant': 'Amazon', 'deals': True, 'sort': 'deals_desc', 'limit': 24},
+    {'min_price': 20, 'max_price': 80, 'min_rating': 4, 'sort': 'rating_desc', 'limit': 24},
+    {'sort': 'popular_desc', 'limit': 100},
+]
+CATEGORIES = ['Electronics', 'Fashion', 'Home', 'Books', 'Garden', 'Toys', 'Sports', 'Beauty']
+MERCHANTS = ['Amazon', 'Walmart', 'Target', 'BestBuy', 'Etsy']
+
+
+def populate(db, Product, size, seed=7):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    rows = []
+    for index in range(size):
+        price = round(rng.uniform(1, 500), 2)
+        is_deal = rng.random() < 0.2
+        rows.append({
+            'name': f'Product {index:07d}',
+            'description': 'Synthetic benchmark product',
+            'price': price,
+            'stock': rng.randint(0, 100),
+            'category': rng.choice(CATEGORIES),
+            'merchant': rng.choice(MERCHANTS),
+            'rating': round(rng.uniform(1, 5), 1) if rng.random() < 0.9 else None,
+            'review_count': rng.randint(0, 5000),
+            'is_deal': is_deal,
+            'deal_price': round(price * 0.8, 2) if is_deal else None,
+            'original_price': price,
+            'created_at': now - timedelta(minutes=index),
+        })
+        if len(rows) == 10000:
+            db.session.execute(Product.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(Product.__table__.insert(), rows)
+    db.session.commit()
+
+
+def sql_query(Product, params):
+    query = Product.query.with_entities(Product.id)
+    if params.get('category'):
+        query = query.filter_by(category=params['category'])
+    if params.get('merchant'):
+        query = query.filter_by(merchant=params['merchant'])
+    if params.get('deals'):
+        query = query.filter_by(is_deal=True)
+    if params.get('min_price') is not None:
+        query = query.filter(Product.price >= params['min_price'])
+    if params.get('max_price') is not None:
+        query = query.filter(Product.price <= params['max_price'])
+    if params.get('min_rating') is not None:
+        query = query.filter(Product.rating >= params['min_rating'])
+    order = {
+        'price_asc': Product.price.asc(),
+        'rating_desc': Product.rating.desc(),
+        'popular_desc': Product.review_count.desc(),
+        'deals_desc': (Product.original_price - Product.deal_price).desc(),
+    }.get(params.get('sort'), Product.created_at.desc())
+    return [row[0] for row in query.order_by(order).limit(params.get('limit')).all()]
+
+
+def timed(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def bench_size(size, repeat):
+    handle, path = tempfile.mkstemp(suffix='.db')
+    os.close(handle)
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    try:
+        from app import create_app, db
+        from app.models import Product
+        from app.services.catalog_snapshot import build_catalog_snapshot, load_numpy
+
+        app = create_app()
+        with app.app_context():
+            populate(db, Product, size)
+            started = time.perf_counter()
+            snapshot = build_catalog_snapshot()
+            build_ms = (time.perf_counter() - started) * 1000
+
+            results = []
+            for params in QUERIES:
+                results.append({
+                    'query': params,
+                    'sql_ms': round(timed(lambda: sql_query(Product, params), repeat), 3),
+                    'snapshot_ms': round(timed(lambda: snapshot.query(**params), repeat), 3),
+                })
+            db.session.remove()
+            db.engine.dispose()
+        return {'size': size, 'numpy': load_numpy() is not None, 'snapshot_build_ms': round(build_ms, 1), 'queries': results}
+    finally:
+        os.unlink(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma-separated catalog sizes')
+    parser.add_argument('--repeat', type=int, default=5, help='Repetitions per query')
+    args = parser.parse_args()
+
+    report = [bench_size(int(size), args.repeat) for size in args.sizes.split(',')]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
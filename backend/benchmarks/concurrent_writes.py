@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+"""
+Concurrent write benchmark for the SQLite engine profiles.
+Writer threads post reviews (insert + counter update per transaction) while
+reader threads page through them, once with the untuned engine and once with
+the tuned profile, and reports throughput and "database is locked" failures.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.services.database import configure_engine, engine_options
+
+PROFILE_CONFIG = {
+    'SQLITE_BUSY_TIMEOUT_MS': 5000,
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_CACHE_SIZE_KB': 20000,
+    'SQLITE_MMAP_SIZE': 256 * 1024 * 1024,
+}
+
+
+def build_engine(path, profile, threads):
+    options = engine_options(profile, PROFILE_CONFIG)
+    if profile == 'default':
+        # The historical setup: driver defaults, rollback journal
+        options = {}
+    engine = create_engine(f'sqlite:///{path}', pool_size=threads, max_overflow=0, **options)
+    return configure_engine(engine, profile, PROFILE_CONFIG)
+
+
+def prepare(engine, products):
+    with engine.begin() as connection:
+        connection.execute(text('CREATE TABLE products (id INTEGER PRIMARY KEY, review_count INTEGER NOT NULL)'))
+        connection.execute(text(
+            'CREATE TABLE reviews (id INTEGER PRIMARY KEY, product_id INTEGER NOT NULL, '
+            'rating INTEGER NOT NULL, body TEXT NOT NULL)'
+        ))
+        connection.execute(text('CREATE INDEX ix_reviews_product ON reviews (product_id)'))
+        connection.execute(
+            text('INSERT INTO products (id, review_count) VALUES (:id, 0)'),
+            [{'id': product_id} for product_id in range(1, products + 1)]
+        )
+
+
+def run_profile(profile, writers, readers, duration, products):
+    directory = tempfile.mkdtemp(prefix='shophub-bench-')
+    path = os.path.join(directory, 'bench.db')
+    engine = build_engine(path, profile, writers + readers)
+    prepare(engine, products)
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    totals = {'writes': 0, 'reads': 0, 'locked': 0}
+
+    def count(key):
+        with lock:
+            totals[key] += 1
+
+    def writer(worker):
+        sequence = 0
+        while not stop.is_set():
+            sequence += 1
+            product_id = (worker * 7919 + sequence) % products + 1
+            try:
+                with engine.begin() as connection:
+                    connection.execute(
+                        text('INSERT INTO reviews (product_id, rating, body) VALUES (:product_id, 5, :body)'),
+                        {'product_id': product_id, 'body': f'review {worker}-{sequence}'}
+                    )
+                    connection.execute(
+                        text('UPDATE products SET review_count = review_count + 1 WHERE id = :product_id'),
+                        {'product_id': product_id}
+                    )
+                count('writes')
+            except OperationalError:
+                count('locked')
+
+    def reader(worker):
+        sequence = 0
+        while not stop.is_set():
+            sequence += 1
+            try:
+                with engine.connect() as connection:
+                    connection.execute(
+                        text('SELECT id, rating, body FROM reviews WHERE product_id = :product_id '
+                             'ORDER BY id DESC LIMIT 20'),
+                        {'product_id': (worker + sequence) % products + 1}
+                    ).all()
+                count('reads')
+            except OperationalError:
+                count('locked')
+
+    threads = [threading.Thread(target=writer, args=(index,)) for index in range(writers)]
+    threads += [threading.Thread(target=reader, args=(index,)) for index in range(readers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    os.rmdir(directory)
+
+    return {
+        'profile': profile,
+        'writes_per_sec': round(totals['writes'] / elapsed, 1),
+        'reads_per_sec': round(totals['reads'] / elapsed, 1),
+        'locked_errors': totals['locked'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--writers', type=int, default=8, help='Concurrent writer threads')
+    parser.add_argument('--readers', type=int, default=8, help='Concurrent reader threads')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds to run each profile')
+    parser.add_argument('--products', type=int, default=1000, help='Products to spread writes over')
+    parser.add_argument('--json', action='store_true', help='Emit results as JSON')
+    args = parser.parse_args()
+
+    results = [
+        run_profile(profile, args.writers, args.readers, args.duration, args.products)
+        for profile in ('default', 'sqlite')
+    ]
+    if args.json:
+        print(json.dumps({'writers': args.writers, 'readers': args.readers, 'results': results}, indent=2))
+        return
+
+    print(f"{'profile':<10} {'writes/s':>10} {'reads/s':>10} {'locked':>8}")
+    for row in results:
+        print(f"{row['profile']:<10} {row['writes_per_sec']:>10} {row['reads_per_sec']:>10} {row['locked_errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
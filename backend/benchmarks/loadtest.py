@@ -0,0 +1,451 @@
+#!/usr/bin/env python
+"""
+Load-testing harness.
+Starts the app on a seeded throwaway database (or targets --url), drives it
+with concurrent virtual users following a weighted traffic mix, and reports
+throughput, p50/p95/p99 latency and error rates per endpoint.
+
+    python -m benchmarks.loadtest --scenario storefront --users 32 --duration 30
+    python -m benchmarks.loadtest --scenario write-contention --server werkzeug
+    python -m benchmarks.loadtest --scenario flash-sale --users 200 --hot-stock 500
+    python -m benchmarks.loadtest --replay captured.jsonl --url http://127.0.0.1:5000
+
+Replay files hold one request per line:
+    {"method": "GET", "path": "/api/products/?category=Home", "offset_ms": 120}
+    {"method": "POST", "path": "/api/products/compare", "json": {"product_ids": [1, 2]}}
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+
+from benchmarks.catalog import CATEGORIES, MERCHANTS, generate_catalog
+
+NUMERIC_SEGMENT = re.compile(r'/\d+(?=/|$)')
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SEARCH_TERMS = ['wireless', 'lamp', 'yoga', 'python', 'headphnes', 'organic serum', 'drone', 'kettle']
+TYPED_WORDS = ['wireless', 'portable', 'coffee', 'sneakers', 'planner', 'dumbbells']
+SORTS = ['newest', 'price_asc', 'price_desc', 'rating_desc', 'popular_desc', 'deals_desc']
+
+SCENARIOS = {
+    # Shaped after production traffic: mostly browsing, a trickle of writes
+    'storefront': {
+        'browse': 30, 'search': 12, 'suggest': 15, 'product': 15, 'reviews': 8,
+        'compare': 5, 'page': 7, 'review_submit': 3, 'vote': 3, 'ticket': 2,
+    },
+    # Write-heavy mix that makes concurrent transactions queue on the SQLite write lock
+    'write-contention': {
+        'review_submit': 35, 'vote': 30, 'ticket': 20, 'browse': 10, 'product': 5,
+    },
+    # Every buyer races for the same SKU; the run checks afterwards that nothing was oversold
+    'flash-sale': {
+        'checkout': 70, 'hot_product': 30,
+    },
+}
+HOT_PRODUCT_ID = 1
+
+
+class TrafficContext:
+    def __init__(self, size):
+        self.size = size
+        self.review_count = size * 2
+        self.sequence = 0
+        self.lock = threading.Lock()
+
+    def next_sequence(self):
+        with self.lock:
+            self.sequence += 1
+            return self.sequence
+
+
+def action_requests(action, context, rng):
+    """Requests (label, method, path, kwargs) one virtual user issues for ``action``."""
+    product_id = rng.randint(1, context.size)
+    if action == 'browse':
+        query = f'?category={rng.choice(CATEGORIES)}&sort={rng.choice(SORTS)}'
+        if rng.random() < 0.3:
+            query += f'&merchant={rng.choice(MERCHANTS)}'
+        return [('GET /api/products/', 'GET', f'/api/products/{query}', {})]
+    if action == 'search':
+        return [('GET /api/products/?q', 'GET', f'/api/products/?q={rng.choice(SEARCH_TERMS)}', {})]
+    if action == 'suggest':
+        word = rng.choice(TYPED_WORDS)
+        # One request per keystroke after the second character, like the search box
+        return [('GET /api/products/suggestions', 'GET', f'/api/products/suggestions?q={word[:length]}', {})
+                for length in range(2, len(word) + 1)]
+    if action == 'product':
+        return [('GET /api/products/<id>', 'GET', f'/api/products/{product_id}', {})]
+    if action == 'hot_product':
+        return [('GET /api/products/<id>', 'GET', f'/api/products/{HOT_PRODUCT_ID}', {})]
+    if action == 'checkout':
+        sequence = context.next_sequence()
+        return [('POST /api/orders/', 'POST', '/api/orders/', {'json': {
+            'customer_name': f'Load Buyer {sequence}',
+            'customer_email': f'buyer{sequence}@example.com',
+            'customer_phone': '+15550100',
+            'items': [{'product_id': HOT_PRODUCT_ID, 'quantity': 1}],
+        }})]
+    if action == 'reviews':
+        return [('GET /api/products/<id>/reviews', 'GET', f'/api/products/{product_id}/reviews', {})]
+    if action == 'compare':
+        ids = rng.sample(range(1, context.size + 1), min(3, context.size))
+        return [('POST /api/products/compare', 'POST', '/api/products/compare', {'json': {'product_ids': ids}})]
+    if action == 'page':
+        path = rng.choice(['/', '/deals', f'/category/{rng.choice(CATEGORIES)}', f'/product/{product_id}'])
+        label = 'GET /category/<name>' if path.startswith('/category/') else (
+            'GET /product/<id>' if path.startswith('/product/') else f'GET {path}')
+        return [(label, 'GET', path, {})]
+    if action == 'review_submit':
+        sequence = context.next_sequence()
+        return [('POST /api/products/<id>/reviews', 'POST', f'/api/products/{product_id}/reviews', {'json': {
+            'reviewer_name': f'Load User {sequence}',
+            'reviewer_email': f'load{sequence}@example.com',
+            'rating': rng.randint(1, 5),
+            'title': 'Load test review',
+            'body': 'Generated by the load-testing harness.',
+        }})]
+    if action == 'vote':
+        review_id = rng.randint(1, context.review_count)
+        headers = {'X-Voter-Token': f'load-voter-{context.next_sequence()}'}
+        return [('POST /api/products/reviews/<id>/helpful', 'POST',
+                 f'/api/products/reviews/{review_id}/helpful', {'headers': headers})]
+    if action == 'ticket':
+        sequence = context.next_sequence()
+        return [('POST /api/support/contact', 'POST', '/api/support/contact', {'json': {
+            'name': f'Load User {sequence}',
+            'email': f'load{sequence}@example.com',
+            'subject': 'Where is my order?',
+            'message': f'Load test ticket {sequence}, please ignore.',
+        }})]
+    raise ValueError(f'Unknown action {action!r}')
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.exceptions = defaultdict(int)
+
+    def record(self, label, elapsed, status):
+        with self.lock:
+            self.latencies[label].append(elapsed)
+            self.statuses[label][status] += 1
+
+    def record_exception(self, label):
+        with self.lock:
+            self.exceptions[label] += 1
+
+    def report(self, elapsed):
+        rows = []
+        for label in sorted(set(self.latencies) | set(self.exceptions)):
+            samples = sorted(self.latencies[label])
+            statuses = self.statuses[label]
+            errors = sum(count for status, count in statuses.items() if status >= 500) + self.exceptions[label]
+            total = len(samples) + self.exceptions[label]
+            rows.append({
+                'endpoint': label,
+                'requests': total,
+                'rps': round(total / elapsed, 1),
+                'p50_ms': percentile(samples, 50),
+                'p95_ms': percentile(samples, 95),
+                'p99_ms': percentile(samples, 99),
+                'error_rate': round(errors / total, 4) if total else 0.0,
+                'statuses': {str(status): count for status, count in sorted(statuses.items())},
+                'exceptions': self.exceptions[label],
+            })
+        total = sum(row['requests'] for row in rows)
+        all_samples = sorted(sample for samples in self.latencies.values() for sample in samples)
+        return {
+            'duration_s': round(elapsed, 2),
+            'requests': total,
+            'rps': round(total / elapsed, 1) if elapsed else 0.0,
+            'p50_ms': percentile(all_samples, 50),
+            'p95_ms': percentile(all_samples, 95),
+            'p99_ms': percentile(all_samples, 99),
+            'endpoints': rows,
+        }
+
+
+def percentile(samples, rank):
+    if not samples:
+        return None
+    index = min(len(samples) - 1, max(0, int(round(rank / 100 * len(samples))) - 1))
+    return round(samples[index] * 1000, 2)
+
+
+def send(session, recorder, base_url, label, method, path, kwargs, timeout):
+    started = time.perf_counter()
+    try:
+        response = session.request(method, base_url + path, timeout=timeout, **kwargs)
+        response.content  # read the body so latency includes transfer
+    except requests.RequestException:
+        recorder.record_exception(label)
+        return
+    recorder.record(label, time.perf_counter() - started, response.status_code)
+
+
+def run_mix(base_url, mix, users, duration, size, timeout, seed):
+    actions = list(mix)
+    weights = [mix[action] for action in actions]
+    context = TrafficContext(size)
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+
+    def user(index):
+        rng = random.Random(seed * 1000 + index)
+        session = requests.Session()
+        while time.perf_counter() < deadline:
+            action = rng.choices(actions, weights)[0]
+            for label, method, path, kwargs in action_requests(action, context, rng):
+                send(session, recorder, base_url, label, method, path, kwargs, timeout)
+        session.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(index,), daemon=True) for index in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.report(time.perf_counter() - started)
+
+
+def load_replay(path):
+    entries = []
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    return entries
+
+
+def run_replay(base_url, entries, users, timeout, respect_timing):
+    recorder = Recorder()
+    position = iter(enumerate(entries))
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def user():
+        session = requests.Session()
+        while True:
+            with lock:
+                item = next(position, None)
+            if item is None:
+                break
+            _, entry = item
+            if respect_timing and entry.get('offset_ms') is not None:
+                delay = started + entry['offset_ms'] / 1000 - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            method = entry.get('method', 'GET').upper()
+            path = entry['path']
+            kwargs = {key: entry[key] for key in ('json', 'data', 'headers') if key in entry}
+            label = entry.get('label') or f"{method} {NUMERIC_SEGMENT.sub('/<id>', path.split('?', 1)[0])}"
+            send(session, recorder, base_url, label, method, path, kwargs, timeout)
+        session.close()
+
+    threads = [threading.Thread(target=user, daemon=True) for _ in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.report(time.perf_counter() - started)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def seed_database(path, size, hot_stock=None):
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    from app import create_app, db
+    from app.models import Product
+
+    app = create_app()
+    with app.app_context():
+        counts = generate_catalog(db, size)
+        if hot_stock is not None:
+            db.session.get(Product, HOT_PRODUCT_ID).stock = hot_stock
+            db.session.commit()
+        db.session.remove()
+        db.engine.dispose()
+    return counts
+
+
+def check_inventory(path, hot_stock):
+    """Compare the hot SKU's remaining stock with what was actually ordered."""
+    import sqlite3
+
+    with sqlite3.connect(path) as connection:
+        stock = connection.execute('SELECT stock FROM products WHERE id = ?', (HOT_PRODUCT_ID,)).fetchone()[0]
+        ordered = connection.execute(
+            'SELECT COALESCE(SUM(quantity), 0) FROM order_items WHERE product_id = ?', (HOT_PRODUCT_ID,)
+        ).fetchone()[0]
+    return {
+        'initial_stock': hot_stock,
+        'remaining_stock': stock,
+        'units_ordered': ordered,
+        'consistent': stock >= 0 and stock + ordered == hot_stock,
+    }
+
+
+def pick_server(requested):
+    if requested != 'auto':
+        return requested
+    if shutil.which('gunicorn') or _importable('gunicorn'):
+        return 'gunicorn'
+    if _importable('waitress'):
+        return 'waitress'
+    return 'werkzeug'
+
+
+def _importable(module):
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+def start_server(server, port, database_path, workers):
+    env = dict(
+        os.environ,
+        DATABASE_URL=f'sqlite:///{database_path}',
+        RATE_LIMIT_ENABLED='False',
+        SUGGESTION_DISPATCH='inline',
+        PORT=str(port),
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        GUNICORN_ACCESS_LOG='/dev/null' if os.name != 'nt' else '-',
+        HOST='127.0.0.1',
+    )
+    if workers:
+        env['WEB_CONCURRENCY'] = str(workers)
+    commands = {
+        'gunicorn': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+        'waitress': [sys.executable, 'wsgi.py'],
+        'werkzeug': [sys.executable, '-c', f'from wsgi import app; app.run(host="127.0.0.1", port={port}, threaded=True)'],
+    }
+    return subprocess.Popen(commands[server], cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(base_url, process, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f'Server exited with code {process.returncode}')
+        try:
+            if requests.get(f'{base_url}/readyz', timeout=5).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f'Server at {base_url} was not ready after {timeout}s')
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        action, _, weight = part.partition('=')
+        mix[action.strip()] = float(weight or 1)
+    return mix
+
+
+def print_report(report, title):
+    print(f"\n{title}: {report['requests']} requests in {report['duration_s']}s, "
+          f"{report['rps']} req/s, p50 {report['p50_ms']}ms, p95 {report['p95_ms']}ms, p99 {report['p99_ms']}ms")
+    print(f"{'endpoint':<42} {'reqs':>7} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7}")
+    for row in report['endpoints']:
+        print(f"{row['endpoint']:<42} {row['requests']:>7} {row['rps']:>8} {row['p50_ms'] or '-':>8} "
+              f"{row['p95_ms'] or '-':>8} {row['p99_ms'] or '-':>8} {row['error_rate']:>7.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='storefront', help='Traffic mix to run')
+    parser.add_argument('--mix', help='Custom weights, e.g. browse=50,search=20,vote=5 (overrides --scenario)')
+    parser.add_argument('--replay', help='JSONL file of captured requests to replay instead of a mix')
+    parser.add_argument('--respect-timing', action='store_true', help='Honor offset_ms when replaying')
+    parser.add_argument('--users', type=int, default=16, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds to run a mix')
+    parser.add_argument('--size', type=int, default=10000, help='Products in the seeded catalog')
+    parser.add_argument('--url', help='Target an already running server instead of starting one')
+    parser.add_argument('--server', choices=['auto', 'gunicorn', 'waitress', 'werkzeug'], default='auto')
+    parser.add_argument('--workers', type=int, help='Server worker processes (gunicorn)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--hot-stock', type=int, default=500, help='Stock of the flash-sale SKU in the seeded catalog')
+    parser.add_argument('--json', action='store_true', help='Emit the report as JSON')
+    args = parser.parse_args()
+
+    process = None
+    directory = None
+    inventory = None
+    flash_sale = not args.replay and not args.mix and args.scenario == 'flash-sale'
+    base_url = (args.url or '').rstrip('/')
+    try:
+        if not base_url:
+            directory = tempfile.mkdtemp(prefix='shophub-load-')
+            database_path = os.path.join(directory, 'load.db')
+            seed_database(database_path, args.size, args.hot_stock if flash_sale else None)
+            server = pick_server(args.server)
+            port = free_port()
+            process = start_server(server, port, database_path, args.workers)
+            base_url = f'http://127.0.0.1:{port}'
+            wait_ready(base_url, process)
+        else:
+            wait_ready(base_url, None)
+
+        if args.replay:
+            title = f'replay {os.path.basename(args.replay)}'
+            report = run_replay(base_url, load_replay(args.replay), args.users, args.timeout, args.respect_timing)
+        else:
+            mix = parse_mix(args.mix) if args.mix else SCENARIOS[args.scenario]
+            title = 'custom mix' if args.mix else args.scenario
+            report = run_mix(base_url, mix, args.users, args.duration, args.size, args.timeout, args.seed)
+        if flash_sale and directory:
+            inventory = check_inventory(database_path, args.hot_stock)
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    report['users'] = args.users
+    report['target'] = args.url or 'local'
+    if inventory:
+        report['inventory'] = inventory
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, title)
+        if inventory:
+            print(f"\nInventory: {inventory['units_ordered']} of {inventory['initial_stock']} units ordered, "
+                  f"{inventory['remaining_stock']} left, {'consistent' if inventory['consistent'] else 'OVERSOLD'}")
+    if inventory and not inventory['consistent']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
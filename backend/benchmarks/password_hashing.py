@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Password hashing benchmark.
+Reports verifications (logins) per second per core for each hashing setting,
+to pick PASSWORD_HASH_METHOD for the worker hardware.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.passwords import PasswordHasher
+
+SETTINGS = [
+    'pbkdf2:sha256:260000',
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:1000000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+    'scrypt:65536:8:1',
+]
+
+
+def bench_setting(method, duration):
+    hasher = PasswordHasher(method=method)
+    stored = hasher.hash('correct horse battery staple')
+    iterations = 0
+    started = time.perf_counter()
+    while True:
+        hasher.verify(stored, 'correct horse battery staple')
+        iterations += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= duration:
+            break
+    return {
+        'method': method,
+        'iterations': iterations,
+        'ms_per_login': round(elapsed / iterations * 1000, 2),
+        'logins_per_sec_per_core': round(iterations / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--duration', type=float, default=2.0, help='Seconds to spend per setting')
+    parser.add_argument('--method', action='append', help='Hash method to benchmark (repeatable)')
+    parser.add_argument('--json', action='store_true', help='Emit results as JSON')
+    args = parser.parse_args()
+
+    results = [bench_setting(method, args.duration) for method in (args.method or SETTINGS)]
+    if args.json:
+        print(json.dumps({'cores': os.cpu_count(), 'results': results}, indent=2))
+        return
+
+    print(f"{'method':<24} {'ms/login':>10} {'logins/s/core':>15}")
+    for row in results:
+        print(f"{row['method']:<24} {row['ms_per_login']:>10} {row['logins_per_sec_per_core']:>15}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""
+Startup benchmark.
+Reports cold-start time (fresh interpreter: import + create_app), the
+create_app() cost inside a warm process (what every test pays), and the
+slowest imports according to ``python -X importtime``.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+COLD_START = 'from app import create_app; create_app()'
+# Needed only by features that are off by default or rarely used; must not load at startup
+LAZY_MODULES = ('requests', 'numpy')
+
+
+def run_python(arguments, database_url):
+    env = dict(os.environ, DATABASE_URL=database_url)
+    return subprocess.run(
+        [sys.executable, *arguments], capture_output=True, text=True, check=True, cwd=BACKEND_DIR, env=env
+    )
+
+
+def parse_importtime(stderr):
+    """``(module, self_us, cumulative_us, depth)`` rows from ``-X importtime`` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def import_profile(database_url, top):
+    rows = parse_importtime(run_python(['-X', 'importtime', '-c', COLD_START], database_url).stderr)
+    first_party = [row for row in rows if row[0] == 'app' or row[0].startswith('app.')]
+    # Top-level third-party packages, charged with everything they pulled in
+    packages = {}
+    for name, _, cumulative_us, _ in rows:
+        if name.split('.')[0] != 'app' and '.' not in name:
+            packages[name] = max(packages.get(name, 0), cumulative_us)
+    return {
+        'total_import_ms': round(sum(row[1] for row in rows) / 1000, 1),
+        'first_party_self_ms': {
+            name: round(self_us / 1000, 1)
+            for name, self_us, _, _ in sorted(first_party, key=lambda row: -row[1])[:top]
+        },
+        'packages_ms': {
+            name: round(cumulative_us / 1000, 1)
+            for name, cumulative_us in sorted(packages.items(), key=lambda item: -item[1])[:top]
+        },
+    }
+
+
+def cold_start(database_url, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        run_python(['-c', COLD_START], database_url)
+        timings.append((time.perf_counter() - started) * 1000)
+    check = run_python(['-c', f'import sys; {COLD_START}; print(",".join(m for m in {LAZY_MODULES!r} if m in sys.modules))'],
+                       database_url)
+    return {
+        'cold_start_ms': round(statistics.median(timings), 1),
+        'eager_lazy_modules': [name for name in check.stdout.strip().split(',') if name],
+    }
+
+
+def warm_create_app(database_url, runs):
+    os.environ['DATABASE_URL'] = database_url
+    from app import create_app
+
+    create_app()
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        create_app()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {'create_app_ms': round(statistics.median(timings), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Interpreter starts to time (median is reported)')
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports to list')
+    parser.add_argument('--json', action='store_true', help='Emit results as JSON')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='shophub-startup-')
+    database_url = f"sqlite:///{os.path.join(directory, 'startup.db')}"
+    try:
+        # Migrate once so every measured start sees an up-to-date schema, as in production
+        run_python(['-c', COLD_START], database_url)
+        report = {
+            **cold_start(database_url, args.runs),
+            **warm_create_app(database_url, args.runs * 4),
+            **import_profile(database_url, args.top),
+        }
+    finally:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"cold start (import + create_app): {report['cold_start_ms']} ms")
+    print(f"create_app() in a warm process:   {report['create_app_ms']} ms")
+    print(f"imports (sum of self times):      {report['total_import_ms']} ms")
+    if report['eager_lazy_modules']:
+        print(f"WARNING: loaded at startup: {', '.join(report['eager_lazy_modules'])}")
+    print(f"\n{'package':<32} {'cumulative ms':>14}")
+    for name, ms in report['packages_ms'].items():
+        print(f'{name:<32} {ms:>14}')
+    print(f"\n{'app module':<32} {'self ms':>14}")
+    for name, ms in report['first_party_self_ms'].items():
+        print(f'{name:<32} {ms:>14}')
+
+
+if __name__ == '__main__':
+    main()
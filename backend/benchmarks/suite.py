@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+"""
+Backend benchmark suite.
+Builds a synthetic catalog per size, microbenchmarks the hot helpers and
+macrobenchmarks the main endpoints through the Flask test client. Results are
+JSON so runs from two commits can be compared:
+
+    python -m benchmarks.suite --sizes 1000,10000 --output before.json
+    python -m benchmarks.suite --sizes 1000,10000 --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.catalog import generate_catalog
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+SORT_KEYS = ['newest', 'price_asc', 'price_desc', 'name_asc', 'rating_desc', 'popular_desc', 'deals_desc']
+ASSISTANT_MESSAGES = [
+    'How long does shipping take to California?',
+    'I want a refund for a broken item',
+    'Do you ship internationally?',
+    'How do affiliate links work on this site?',
+    'My coupon code did not apply at checkout',
+]
+
+
+def measure(function, min_time, max_iterations=10000):
+    """Run ``function`` until ``min_time`` seconds have passed; return timing stats in ms."""
+    function()  # warm-up, not recorded
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < max_iterations and (not samples or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'iterations': len(samples),
+        'mean_ms': round(statistics.fmean(samples), 4),
+        'median_ms': round(statistics.median(samples), 4),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        'min_ms': round(samples[0], 4),
+    }
+
+
+class FixtureResponse:
+    def __init__(self, url, html):
+        self.url = url
+        self.text = html
+        self.status_code = 200
+
+    def raise_for_status(self):
+        return None
+
+
+class FixtureSession:
+    """Stands in for requests.Session so scraping is timed without the network."""
+
+    def __init__(self, html):
+        self.html = html
+
+    def get(self, url, **kwargs):
+        return FixtureResponse(url, self.html)
+
+
+def micro_benchmarks(app, db, min_time):
+    from app.models import Product
+    from app import routes
+    from app.services import product_import
+
+    with open(os.path.join(FIXTURES_DIR, 'product_page.html'), encoding='utf-8') as handle:
+        product_page = handle.read()
+
+    results = {}
+    with app.app_context():
+        products = Product.query.order_by(Product.id).limit(1000).all()
+        page = products[:24]
+        for product in page:
+            product.to_dict()  # load image relationships once
+
+        results['fuzzy_score[1000 products]'] = measure(
+            lambda: [routes.fuzzy_score('wireles headphnes', product) for product in products], min_time)
+        for sort_key in SORT_KEYS:
+            results[f'sort_products_in_memory[{sort_key}]'] = measure(
+                lambda sort_key=sort_key: routes.sort_products_in_memory(products, sort_key), min_time)
+
+        counter = iter(range(10 ** 9))
+        results['assistant_reply[uncached]'] = measure(
+            lambda: routes.assistant_reply(f'{ASSISTANT_MESSAGES[next(counter) % len(ASSISTANT_MESSAGES)]} #{next(counter)}'),
+            min_time)
+        results['assistant_reply[cached]'] = measure(lambda: routes.assistant_reply(ASSISTANT_MESSAGES[0]), min_time)
+        results['Product.to_dict[24 products]'] = measure(lambda: [product.to_dict() for product in page], min_time)
+
+        with mock.patch.object(product_import.requests, 'Session', lambda: FixtureSession(product_page)):
+            results['scrape_product_details[fixture]'] = measure(
+                lambda: product_import.scrape_product_details('https://www.amazon.com/dp/B000BENCH'), min_time)
+            scraped = product_import.scrape_product_details('https://www.amazon.com/dp/B000BENCH')
+        results['run_ai_import_cleaner'] = measure(lambda: product_import.run_ai_import_cleaner(scraped), min_time)
+        db.session.remove()
+    return results
+
+
+def macro_benchmarks(app, size, min_time):
+    client = app.test_client()
+    product_id = max(1, size // 2)
+    compare_ids = list(range(1, min(size, 4) + 1))
+    endpoints = {
+        'GET /api/products/': lambda: client.get('/api/products/'),
+        'GET /api/products/?category&sort': lambda: client.get('/api/products/?category=Electronics&sort=price_asc'),
+        'GET /api/products/?facets=1': lambda: client.get('/api/products/?facets=1&category=Home'),
+        'GET /api/products/?q': lambda: client.get('/api/products/?q=wireless'),
+        'GET /api/products/suggestions': lambda: client.get('/api/products/suggestions?q=port'),
+        'GET /api/products/<id>': lambda: client.get(f'/api/products/{product_id}'),
+        'GET /api/products/<id>/reviews': lambda: client.get(f'/api/products/{product_id}/reviews'),
+        'POST /api/products/compare': lambda: client.post('/api/products/compare', json={'product_ids': compare_ids}),
+        'GET /api/products/best-value': lambda: client.get('/api/products/best-value?category=Books'),
+        'POST /api/support/assistant': lambda: client.post('/api/support/assistant', json={'message': 'refund please'}),
+    }
+    results = {}
+    for name, call in endpoints.items():
+        status = call().status_code
+        if status >= 400:
+            results[name] = {'error': f'HTTP {status}'}
+            continue
+        results[name] = measure(call, min_time)
+    return results
+
+
+def bench_size(size, min_time, micro=True, macro=True):
+    directory = tempfile.mkdtemp(prefix='shophub-suite-')
+    path = os.path.join(directory, 'bench.db')
+    previous_url = os.environ.get('DATABASE_URL')
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    try:
+        from app import create_app, db
+
+        app = create_app()
+        started = time.perf_counter()
+        with app.app_context():
+            counts = generate_catalog(db, size)
+            db.session.remove()
+        generate_seconds = time.perf_counter() - started
+
+        # A second app builds its in-memory indexes from the populated catalog
+        started = time.perf_counter()
+        app = create_app()
+        startup_seconds = time.perf_counter() - started
+        app.config['RATE_LIMIT_ENABLED'] = False
+
+        report = {
+            'size': size,
+            'rows': counts,
+            'generate_s': round(generate_seconds, 2),
+            'app_startup_ms': round(startup_seconds * 1000, 1),
+        }
+        if micro:
+            report['micro'] = micro_benchmarks(app, db, min_time)
+        if macro:
+            report['macro'] = macro_benchmarks(app, size, min_time)
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        return report
+    finally:
+        if previous_url is None:
+            os.environ.pop('DATABASE_URL', None)
+        else:
+            os.environ['DATABASE_URL'] = previous_url
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(__file__)
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_reports(baseline, current, threshold):
+    """Print mean-time ratios against ``baseline``; return the names that regressed past ``threshold``."""
+    regressions = []
+    baseline_sizes = {entry['size']: entry for entry in baseline['results']}
+    print(f"{'size':>8}  {'benchmark':<44} {'before ms':>10} {'after ms':>10} {'ratio':>7}")
+    for entry in current['results']:
+        before_entry = baseline_sizes.get(entry['size'])
+        if not before_entry:
+            continue
+        for group in ('micro', 'macro'):
+            for name, after in entry.get(group, {}).items():
+                before = before_entry.get(group, {}).get(name)
+                if not before or 'mean_ms' not in before or 'mean_ms' not in after:
+                    continue
+                ratio = after['mean_ms'] / before['mean_ms'] if before['mean_ms'] else 1.0
+                flag = ' !' if ratio > threshold else ''
+                print(f"{entry['size']:>8}  {name:<44} {before['mean_ms']:>10.3f} {after['mean_ms']:>10.3f} {ratio:>6.2f}x{flag}")
+                if ratio > threshold:
+                    regressions.append(f"{entry['size']}:{name}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000', help='Comma-separated catalog sizes (e.g. 1000,10000,100000,1000000)')
+    parser.add_argument('--min-time', type=float, default=0.5, help='Seconds to spend per benchmark')
+    parser.add_argument('--only', choices=['micro', 'macro'], help='Run one group only')
+    parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+    parser.add_argument('--compare', help='Baseline JSON report to compare against')
+    parser.add_argument('--threshold', type=float, default=1.2, help='Mean-time ratio that counts as a regression')
+    args = parser.parse_args()
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'min_time': args.min_time,
+        'results': [
+            bench_size(int(size), args.min_time, micro=args.only != 'macro', macro=args.only != 'micro')
+            for size in args.sizes.split(',')
+        ],
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    elif not args.compare:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        regressions = compare_reports(baseline, report, args.threshold)
+        if regressions:
+            print(f'{len(regressions)} regression(s) over {args.threshold}x')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -36,11 +36,14 @@ class ProductionConfig(Config):
     SESSION_COOKIE_SECURE = True
 
 class TestingConfig(Config):
-    """Testing configuration"""
+    """Testing configuration: every app gets its own in-memory database"""
     DEBUG = True
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    SESSION_COOKIE_SECURE = False
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    SUGGESTION_DISPATCH = 'inline'
 
 # Select configuration based on environment
 config_name = os.environ.get('FLASK_ENV', 'development').lower()
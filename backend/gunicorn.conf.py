@@ -0,0 +1,58 @@
+"""
+Gunicorn settings for ShopHub. Every value can be overridden from the environment.
+
+The app is preloaded in the master, so schema checks and index builds run once
+and workers share those pages copy-on-write. The catalog indexes remember the
+catalog version they were built at; a worker rebuilds its own copy during
+warm-up or on a later read once catalog writes have moved the shared version
+past it, so preloading saves the build only while the catalog is unchanged.
+Each worker drops the inherited primary and replica connections after fork
+and warms itself before taking requests.
+
+Reload without downtime:
+    kill -HUP <master pid>    restart workers gracefully (config changes)
+    kill -USR2 <master pid>   start a new master with new code, then QUIT the old one
+"""
+
+import multiprocessing
+import os
+
+wsgi_app = 'wsgi:app'
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}")
+
+cores = multiprocessing.cpu_count()
+workers = int(os.getenv('WEB_CONCURRENCY') or cores * 2 + 1)
+# Request handling mostly waits on SQLite/PostgreSQL and outbound HTTP, so a few threads per worker pay off.
+threads = int(os.getenv('WEB_THREADS') or 4)
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+preload_app = True
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+# Recycle workers periodically to bound memory growth from per-process caches.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.getenv('GUNICORN_ERROR_LOG', '-')
+
+
+def post_fork(server, worker):
+    """Connections opened by the master must not be shared across processes."""
+    from wsgi import app
+    from app import db
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+        for engine in app.extensions.get('replica_engines', []):
+            engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    """Warm caches and templates before the worker accepts its first request."""
+    from wsgi import app
+    from app.services.warmup import warm_app
+
+    state = warm_app(app)
+    worker.log.info('Worker %s warm in %sms (ready=%s)', worker.pid, state.get('warmup_ms'), state['ready'])
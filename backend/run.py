@@ -1,11 +1,14 @@
 import os
 from app import create_app, db, mail
 from app.models import Product, User
-from flask import render_template, abort, request, jsonify, url_for, current_app
+from app.read_replicas import replica_reads
+from app.services.html_cache import cached_fragment, cached_page
+from app.services.passwords import hash_password, verify_password
+from app.services.rate_limit import rate_limited
+from app.services.sessions import login_required, session_tokens
+from flask import render_template, abort, request, jsonify, url_for, current_app, g
 from flask_mail import Message
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
-from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import inspect, text
 import re
 
 app = create_app()
@@ -65,60 +68,78 @@ def is_valid_us_zip(zip_value):
     return bool(re.match(r'^\d{5}(?:-\d{4})?$', zip_value or ''))
 
 
-def ensure_user_schema():
-    """Apply lightweight SQLite-safe column additions for existing user tables."""
-    with app.app_context():
-        inspector = inspect(db.engine)
-        if 'users' not in inspector.get_table_names():
-            return
-
-        existing_columns = {column['name'] for column in inspector.get_columns('users')}
-        migrations = {
-            'address_line1': "ALTER TABLE users ADD COLUMN address_line1 VARCHAR(255)",
-            'address_line2': "ALTER TABLE users ADD COLUMN address_line2 VARCHAR(255)",
-            'city': "ALTER TABLE users ADD COLUMN city VARCHAR(100)",
-            'state': "ALTER TABLE users ADD COLUMN state VARCHAR(2)",
-            'zip_code': "ALTER TABLE users ADD COLUMN zip_code VARCHAR(10)"
-        }
-
-        for column_name, statement in migrations.items():
-            if column_name not in existing_columns:
-                db.session.execute(text(statement))
-        db.session.commit()
+def requested_page():
+    page = request.args.get('page', type=int) or 1
+    return max(page, 1)
+
+
+def render_product_cards(template_name, products):
+    """Render each product card once per product version and reuse it across pages."""
+    return [
+        cached_fragment(template_name, product.id,
+                        lambda product=product: render_template(template_name, product=product.to_dict()))
+        for product in products
+    ]
 
 
 @app.route('/', methods=['GET'])
+@replica_reads
 def home():
-    products = Product.query.order_by(Product.created_at.desc()).limit(12).all()
-    return render_template('index.html', products=[p.to_dict() for p in products])
+    def render():
+        products = Product.query.order_by(Product.created_at.desc()).limit(12).all()
+        return render_template('index.html', products=[p.to_dict() for p in products])
+    return cached_page(('home',), render)
 
 
 @app.route('/category/<string:category>', methods=['GET'])
+@replica_reads
 def category_page(category):
-    products = Product.query.filter_by(category=category).order_by(Product.created_at.desc()).all()
-    return render_template('category.html', category=category, products=[p.to_dict() for p in products])
+    page = requested_page()
+
+    def render():
+        pagination = Product.query.filter_by(category=category).order_by(Product.created_at.desc()).paginate(
+            page=page, per_page=current_app.config['PAGE_SIZE'], error_out=False
+        )
+        cards = render_product_cards('partials/category_card.html', pagination.items)
+        return render_template('category.html', category=category, cards=cards, pagination=pagination)
+    return cached_page(('category', category, page), render)
 
 
 @app.route('/product/<int:product_id>', methods=['GET'])
+@replica_reads
 def product_detail(product_id):
-    product = Product.query.get(product_id)
-    if not product:
-        abort(404)
     popup = request.args.get('popup') in {'1', 'true', 'yes'}
-    template_name = 'product_popup.html' if popup else 'product.html'
-    return render_template(template_name, product=product.to_dict())
+
+    def render():
+        product = db.session.get(Product, product_id)
+        if not product:
+            abort(404)
+        template_name = 'product_popup.html' if popup else 'product.html'
+        return render_template(template_name, product=product.to_dict())
+    return cached_page(('product', product_id, popup), render)
 
 
 @app.route('/reviews', methods=['GET'])
+@replica_reads
 def reviews_page():
-    products = Product.query.filter(Product.rating.isnot(None)).order_by(Product.rating.desc()).limit(12).all()
-    return render_template('reviews.html', products=[p.to_dict() for p in products])
+    def render():
+        products = Product.query.filter(Product.rating.isnot(None)).order_by(Product.rating.desc()).limit(12).all()
+        return render_template('reviews.html', products=[p.to_dict() for p in products])
+    return cached_page(('reviews',), render)
 
 
 @app.route('/deals', methods=['GET'])
+@replica_reads
 def deals_page():
-    products = Product.query.filter_by(is_deal=True).order_by(Product.created_at.desc()).all()
-    return render_template('deals.html', products=[p.to_dict() for p in products])
+    page = requested_page()
+
+    def render():
+        pagination = Product.query.filter_by(is_deal=True).order_by(Product.created_at.desc()).paginate(
+            page=page, per_page=current_app.config['PAGE_SIZE'], error_out=False
+        )
+        cards = render_product_cards('partials/deal_card.html', pagination.items)
+        return render_template('deals.html', cards=cards, pagination=pagination)
+    return cached_page(('deals', page), render)
 
 @app.route('/login', methods=['GET'])
 def login_page():
@@ -142,6 +163,7 @@ def reset_password_page():
 
 
 @app.route('/api/auth/forgot-password', methods=['POST'])
+@rate_limited('forgot_password', account_field='email')
 def forgot_password():
     data = request.get_json(silent=True) or {}
     email = (data.get('email') or '').strip().lower()
@@ -205,7 +227,7 @@ def register():
     user = User(
         name=name,
         email=email,
-        password_hash=generate_password_hash(password),
+        password_hash=hash_password(password),
         address_line1=address_line1,
         address_line2=address_line2,
         city=city,
@@ -219,6 +241,7 @@ def register():
 
 
 @app.route('/api/auth/login', methods=['POST'])
+@rate_limited('login', account_field='email')
 def login():
     data = request.get_json(silent=True) or {}
     email = (data.get('email') or '').strip().lower()
@@ -228,10 +251,46 @@ def login():
         return jsonify({'error': 'Email and password are required'}), 400
 
     user = User.query.filter_by(email=email).first()
-    if not user or not check_password_hash(user.password_hash, password):
+    if not user or not verify_password(user, password):
         return jsonify({'error': 'Invalid email or password'}), 401
+    if db.session.is_modified(user):
+        # Stored hash used an outdated method and was upgraded on this login.
+        db.session.commit()
+
+    return jsonify({
+        'ok': True,
+        'message': 'Login successful.',
+        'user': {'id': user.id, 'name': user.name, 'email': user.email},
+        **session_tokens().issue(user)
+    }), 200
 
-    return jsonify({'ok': True, 'message': 'Login successful.'}), 200
+
+@app.route('/api/auth/refresh', methods=['POST'])
+@rate_limited('login')
+def refresh_session():
+    data = request.get_json(silent=True) or {}
+    refresh_token = (data.get('refresh_token') or '').strip()
+    if not refresh_token:
+        return jsonify({'error': 'Refresh token is required'}), 400
+
+    tokens = session_tokens().rotate(refresh_token)
+    if tokens is None:
+        return jsonify({'error': 'Session expired. Please log in again.'}), 401
+    return jsonify({'ok': True, **tokens}), 200
+
+
+@app.route('/api/auth/logout', methods=['POST'])
+@login_required
+def logout():
+    session_tokens().revoke_session(g.current_user.session_id)
+    return jsonify({'ok': True, 'message': 'Logged out.'}), 200
+
+
+@app.route('/api/auth/me', methods=['GET'])
+@login_required
+def current_user_profile():
+    user = g.current_user
+    return jsonify({'id': user.id, 'name': user.name, 'email': user.email}), 200
 
 
 @app.route('/api/auth/reset-password', methods=['POST'])
@@ -259,12 +318,11 @@ def reset_password():
     if not user:
         return jsonify({'error': 'Account not found'}), 404
 
-    user.password_hash = generate_password_hash(new_password)
+    user.password_hash = hash_password(new_password)
     db.session.commit()
+    session_tokens().revoke_user(user.id)
     return jsonify({'ok': True, 'message': 'Password reset successful. You can now log in.'}), 200
 
-ensure_user_schema()
-
 
 if __name__ == '__main__':
     # Allow overriding port via environment (useful if port 5000 is occupied)
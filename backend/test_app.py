@@ -4,21 +4,107 @@ Testing Guide for ShopHub E-Commerce Platform
 Run tests to ensure everything works correctly
 """
 
+import os
+import sqlite3
+import threading
+import time
 import unittest
+from datetime import datetime, timedelta
+
+# Apps built without an explicit config (including run.app) must not touch the real database
+os.environ.setdefault('APP_CONFIG', 'config.TestingConfig')
+
 from app import create_app, db
-from app.models import Product, Cart, CartItem, Order, OrderItem
+from app.models import Product, Cart, CartItem, Order, OrderItem, SupportTicket
+from config import TestingConfig
+
+_schema_template = None
+_schema_template_lock = threading.Lock()
+
+
+def save_schema_template(engine):
+    """Keep a copy of ``engine``'s migrated in-memory database"""
+    global _schema_template
+    template = sqlite3.connect(':memory:', check_same_thread=False)
+    with engine.connect() as connection:
+        connection.connection.driver_connection.backup(template)
+    with _schema_template_lock:
+        _schema_template = template
+
+
+def copy_schema_template(target):
+    """Overwrite the sqlite3 connection ``target`` with the schema template"""
+    with _schema_template_lock:
+        _schema_template.backup(target)
+
+
+def memory_database():
+    """New in-memory SQLite database, pre-filled from the schema template"""
+    connection = sqlite3.connect(':memory:', check_same_thread=False)
+    if _schema_template is not None:
+        copy_schema_template(connection)
+    return connection
+
+
+def reset_database(app):
+    """Replace a long-lived app's in-memory database (e.g. run.app's) with a fresh copy of the template"""
+    with app.app_context():
+        db.session.remove()
+        with db.engine.connect() as connection:
+            copy_schema_template(connection.connection.driver_connection)
+
+
+class TemplateDatabaseConfig(TestingConfig):
+    """TestingConfig whose database starts as a copy of the schema template instead of being migrated"""
+    SQLALCHEMY_ENGINE_OPTIONS = {'creator': memory_database}
+
+
+def file_database_config(path):
+    """TestingConfig on a real SQLite file, for tests that need WAL or concurrent connections"""
+    class FileDatabaseConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+
+    return FileDatabaseConfig
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Base for tests that use the database.
+
+    The schema is migrated once per process. Every test then gets a new app
+    whose in-memory database is a copy of that schema, so nothing a test
+    writes is seen by the next one. Tests that use the module-level
+    ``run.app`` call ``reset_database()`` instead.
+    """
+
+    config = TemplateDatabaseConfig
+
+    @classmethod
+    def setUpClass(cls):
+        if _schema_template is None:
+            app = create_app(TestingConfig)
+            with app.app_context():
+                save_schema_template(db.engine)
+
+    def create_app(self):
+        return create_app(self.config)
+
+    def setUp(self):
+        self.app = self.create_app()
+        self.client = self.app.test_client()
 
-class TestProduct(unittest.TestCase):
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+
+
+class TestProduct(DatabaseTestCase):
     """Test Product functionality"""
     
     def setUp(self):
-        self.app = create_app()
-        self.app.config['TESTING'] = True
-        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-        self.client = self.app.test_client()
-        
+        super().setUp()
+
         with self.app.app_context():
-            db.create_all()
             # Add test product
             product = Product(
                 name="Test Product",
@@ -30,11 +116,6 @@ class TestProduct(unittest.TestCase):
             db.session.add(product)
             db.session.commit()
     
-    def tearDown(self):
-        with self.app.app_context():
-            db.session.remove()
-            db.drop_all()
-    
     def test_get_products(self):
         """Test getting all products"""
         response = self.client.get('/api/products/')
@@ -59,17 +140,13 @@ class TestProduct(unittest.TestCase):
         })
         self.assertEqual(response.status_code, 201)
 
-class TestCart(unittest.TestCase):
+class TestCart(DatabaseTestCase):
     """Test Cart functionality"""
     
     def setUp(self):
-        self.app = create_app()
-        self.app.config['TESTING'] = True
-        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-        self.client = self.app.test_client()
-        
+        super().setUp()
+
         with self.app.app_context():
-            db.create_all()
             # Add test product
             product = Product(
                 name="Test Product",
@@ -99,17 +176,13 @@ class TestCart(unittest.TestCase):
         self.assertEqual(len(data['items']), 1)
         self.assertEqual(data['items'][0]['quantity'], 2)
 
-class TestOrder(unittest.TestCase):
+class TestOrder(DatabaseTestCase):
     """Test Order functionality"""
     
     def setUp(self):
-        self.app = create_app()
-        self.app.config['TESTING'] = True
-        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-        self.client = self.app.test_client()
-        
+        super().setUp()
+
         with self.app.app_context():
-            db.create_all()
             # Add test product
             product = Product(
                 name="Test Product",
@@ -144,5 +217,1251 @@ class TestOrder(unittest.TestCase):
         self.assertEqual(data['customer_name'], 'John Doe')
         self.assertIn('ORD-', data['order_number'])
 
+class TestSupportAssistant(unittest.TestCase):
+    """Test support FAQ assistant matching"""
+
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+    def test_keyword_match(self):
+        """Test keyword hits pick the matching FAQ answer"""
+        response = self.client.post('/api/support/assistant', json={'message': 'I want a refund for my order'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('refunds are handled by the merchant', response.json['answer'])
+
+    def test_fallback_answer(self):
+        """Test unrelated messages get the generic answer"""
+        response = self.client.post('/api/support/assistant', json={'message': 'xyz'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['suggestions'], [])
+        self.assertIn('I can help with shipping', response.json['answer'])
+
+    def test_load_kb_from_file(self):
+        """Test the FAQ knowledge base can be loaded from a JSON file"""
+        import json
+        import os
+        import tempfile
+        from app.services.faq_matcher import init_faq_matcher
+
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as handle:
+            json.dump([{'id': 'gift', 'question': 'Do you sell gift cards?', 'answer': 'Gift cards are coming soon.', 'keywords': ['gift card']}], handle)
+        self.addCleanup(os.unlink, handle.name)
+        self.app.config['FAQ_KB_PATH'] = handle.name
+        init_faq_matcher(self.app, [])
+
+        response = self.client.post('/api/support/assistant', json={'message': 'Can I buy a gift card?'})
+        self.assertEqual(response.json['answer'], 'Gift cards are coming soon.')
+        self.assertEqual(len(self.client.get('/api/support/faqs').json), 1)
+
+class TestAdminSupportTickets(DatabaseTestCase):
+    """Test admin support ticket listing"""
+
+    def setUp(self):
+        super().setUp()
+        self.app.config['ADMIN_DASHBOARD_KEY'] = 'test-admin-key'
+
+        with self.app.app_context():
+            for index in range(5):
+                db.session.add(SupportTicket(
+                    customer_name='Jane Doe',
+                    customer_email=f'jane{index}@example.com',
+                    subject=f'Refund request {index}' if index % 2 else f'Shipping delay {index}',
+                    message='Where is my package?',
+                    status='open' if index < 3 else 'resolved'
+                ))
+            db.session.commit()
+
+    def list_tickets(self, **params):
+        return self.client.get('/api/admin/support/tickets', query_string=params, headers={'X-Admin-Key': 'test-admin-key'})
+
+    def test_keyset_pagination(self):
+        """Test cursors walk every ticket exactly once"""
+        first = self.list_tickets(limit=2)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(first.json['tickets']), 2)
+        self.assertEqual(first.json['status_counts']['open'], 3)
+        self.assertEqual(first.json['status_counts']['resolved'], 2)
+
+        seen = [ticket['id'] for ticket in first.json['tickets']]
+        cursor = first.json['next_cursor']
+        while cursor:
+            page = self.list_tickets(limit=2, cursor=cursor).json
+            seen.extend(ticket['id'] for ticket in page['tickets'])
+            cursor = page['next_cursor']
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_search(self):
+        """Test full-text search over subject and customer email"""
+        response = self.list_tickets(q='refund')
+        self.assertEqual(len(response.json['tickets']), 2)
+        self.assertEqual(sum(response.json['status_counts'].values()), 2)
+
+        response = self.list_tickets(q='jane4@example.com')
+        self.assertEqual([ticket['customer_email'] for ticket in response.json['tickets']], ['jane4@example.com'])
+
+class TestSupportTicketSuggestions(DatabaseTestCase):
+    """Test assistant suggestions on support tickets"""
+
+    def setUp(self):
+        super().setUp()
+        self.app.config['SUGGESTION_DISPATCH'] = 'inline'
+
+    def test_ticket_gets_suggestion(self):
+        """Test the suggestion engine fills the new ticket"""
+        response = self.client.post('/api/support/contact', json={
+            'name': 'Jane Doe',
+            'email': 'jane@example.com',
+            'subject': 'Refund',
+            'message': 'How do I get a refund?'
+        })
+        self.assertEqual(response.status_code, 201)
+
+        ticket_number = response.json['ticket']['ticket_number']
+        ticket = self.client.get(f'/api/support/tickets/{ticket_number}?email=jane@example.com').json
+        self.assertIn('refunds are handled by the merchant', ticket['assistant_suggestion'])
+
+    def test_backfill_command(self):
+        """Test the backfill command fills historical tickets"""
+        with self.app.app_context():
+            db.session.add(SupportTicket(
+                customer_name='Jane Doe',
+                customer_email='jane@example.com',
+                subject='Tracking',
+                message='How can I track my order?'
+            ))
+            db.session.commit()
+
+        result = self.app.test_cli_runner().invoke(args=['backfill-suggestions', '--batch-size', '1'])
+        self.assertIn('Backfilled suggestions for 1 tickets', result.output)
+        with self.app.app_context():
+            self.assertIsNotNone(SupportTicket.query.first().assistant_suggestion)
+
+class TestPasswordHashing(unittest.TestCase):
+    """Test configurable password hashing"""
+
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+
+    def test_rehash_outdated_hash(self):
+        """Test a successful login upgrades a hash made with an older method"""
+        from werkzeug.security import generate_password_hash
+        from app.models import User
+        from app.services.passwords import init_password_hasher, verify_password
+
+        init_password_hasher(self.app)
+        user = User(password_hash=generate_password_hash('secret-pass', method='pbkdf2:sha256:500'))
+        with self.app.app_context():
+            self.assertFalse(verify_password(user, 'wrong-pass'))
+            self.assertTrue(user.password_hash.startswith('pbkdf2:sha256:500$'))
+            self.assertTrue(verify_password(user, 'secret-pass'))
+            self.assertTrue(user.password_hash.startswith('pbkdf2:sha256:1000$'))
+
+    def test_bounded_concurrency(self):
+        """Test no more hashes run at once than PASSWORD_HASH_CONCURRENCY allows"""
+        from concurrent.futures import ThreadPoolExecutor
+        from app.services.passwords import PasswordHasher
+
+        hasher = PasswordHasher(method='pbkdf2:sha256:1000', concurrency=2)
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_hash(password):
+            with lock:
+                running.append(password)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.remove(password)
+            return password
+
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            list(pool.map(lambda index: hasher._call(slow_hash, f'p{index}'), range(6)))
+        self.assertEqual(max(peak), 2)
+        stored = hasher.hash('secret-pass')
+        self.assertTrue(hasher.verify(stored, 'secret-pass'))
+        self.assertFalse(hasher.needs_rehash(stored))
+
+class TestRateLimiting(unittest.TestCase):
+    """Test token bucket rate limiting"""
+
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+    def test_token_bucket_refills(self):
+        """Test buckets admit a burst, reject, then refill over time"""
+        from app.services.rate_limit import MemoryRateLimitStore, SharedRateLimitStore, LocalSharedClient
+
+        for store in (MemoryRateLimitStore(), SharedRateLimitStore(LocalSharedClient())):
+            results = [store.consume('key', 1.0, 3, now=100.0)[0] for _ in range(4)]
+            self.assertEqual(results, [True, True, True, False])
+            self.assertTrue(store.consume('key', 1.0, 3, now=101.5)[0])
+
+    def test_prune_keeps_buckets_of_slow_scopes(self):
+        """Test pruning drops only buckets that have refilled under their own rate"""
+        from app.services.rate_limit import MemoryRateLimitStore
+
+        store = MemoryRateLimitStore(max_keys=2, prune_every=3)
+        self.assertTrue(store.consume('reset:account:a', 3 / 3600, 3, now=100.0)[0])
+        self.assertTrue(store.consume('login:ip:b', 1.0, 5, now=100.0)[0])
+        store.consume('login:ip:c', 1.0, 5, now=110.0)
+        self.assertEqual(set(store.buckets), {'reset:account:a', 'login:ip:c'})
+
+    def test_key_cap_evicts_least_recently_used(self):
+        """Test max_keys holds between scans by evicting the least recently used buckets"""
+        from app.services.rate_limit import MemoryRateLimitStore
+
+        store = MemoryRateLimitStore(max_keys=2, prune_every=100)
+        for key in ('reset:account:a', 'reset:account:b', 'reset:account:a', 'reset:account:c'):
+            store.consume(key, 3 / 3600, 3, now=100.0)
+        self.assertEqual(set(store.buckets), {'reset:account:a', 'reset:account:c'})
+
+    def test_check_stops_at_first_denied_scope(self):
+        """Test requests refused per IP do not drain the account bucket"""
+        from app.services.rate_limit import MemoryRateLimitStore, RateLimiter
+
+        store = MemoryRateLimitStore()
+        limiter = RateLimiter(store, limits={'login': {'ip': (1 / 60, 1), 'account': (1 / 60, 5)}})
+        with self.app.test_request_context(environ_base={'REMOTE_ADDR': '203.0.113.7'}):
+            self.assertEqual(limiter.check('login', 'victim@example.com'), 0)
+            for _ in range(3):
+                self.assertGreater(limiter.check('login', 'victim@example.com'), 0)
+        self.assertAlmostEqual(store.buckets['login:account:victim@example.com'][0], 4, places=2)
+
+    def test_admin_login_returns_429(self):
+        """Test repeated admin logins are throttled per IP"""
+        self.app.config['ADMIN_DASHBOARD_KEY'] = 'test-admin-key'
+        statuses = [self.client.post('/api/admin/login', json={'key': 'wrong'}).status_code for _ in range(6)]
+        self.assertEqual(statuses[:5], [401] * 5)
+        self.assertEqual(statuses[5], 429)
+
+    def test_support_contact_account_bucket(self):
+        """Test the per-account bucket rejects before the ticket is validated"""
+        payloads = [{'email': 'spam@example.com'}] * 6
+        statuses = [self.client.post('/api/support/contact', json=payload).status_code for payload in payloads]
+        self.assertEqual(statuses[:5], [400] * 5)
+        self.assertEqual(statuses[5], 429)
+
+class TestProductSuggestions(DatabaseTestCase):
+    """Test product autocomplete suggestions"""
+
+    def setUp(self):
+        super().setUp()
+
+        with self.app.app_context():
+            db.session.add_all([
+                Product(name='Zephyr Headphones', description='Over-ear', price=99.0, category='Audio', merchant='Zenith', review_count=50),
+                Product(name='Zephyr Earbuds', description='In-ear', price=49.0, category='Audio', merchant='Zenith', review_count=500),
+            ])
+            db.session.commit()
+
+    def suggest(self, query):
+        return self.client.get('/api/products/suggestions', query_string={'q': query}).json
+
+    def test_prefix_ranked_by_popularity(self):
+        """Test prefix matches come back most popular first"""
+        self.assertEqual(self.suggest('zeph')[:2], ['Zephyr Earbuds', 'Zephyr Headphones'])
+        self.assertIn('Zephyr Headphones', self.suggest('headph'))
+
+    def test_typo_tolerance(self):
+        """Test a misspelled prefix still finds the product"""
+        self.assertIn('Zephyr Headphones', self.suggest('zephyr hedph'))
+
+    def test_incremental_update(self):
+        """Test catalog writes update the index after commit"""
+        with self.app.app_context():
+            product = Product.query.filter_by(name='Zephyr Earbuds').first()
+            product.name = 'Zephyr Buds Pro'
+            db.session.commit()
+        self.assertIn('Zephyr Buds Pro', self.suggest('zephyr b'))
+        self.assertNotIn('Zephyr Earbuds', self.suggest('zephyr'))
+
+    def test_rebuilt_after_write_from_another_worker(self):
+        """Test a worker's index catches up with products added through another worker"""
+        import tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            config = file_database_config(f'{directory}/shared.db')
+            config.CATALOG_VERSION_SYNC_SECONDS = 0
+            writer, reader = create_app(config), create_app(config)
+            with writer.app_context():
+                db.session.add(Product(name='Quokka Speaker', description='Speaker', price=40.0))
+                db.session.commit()
+                db.engine.dispose()
+            with reader.app_context():
+                self.assertEqual(reader.extensions['product_autocomplete'].get().suggest('quokka'), ['Quokka Speaker'])
+                db.engine.dispose()
+
+class TestProductFacets(DatabaseTestCase):
+    """Test facet counts on product listings"""
+
+    def setUp(self):
+        super().setUp()
+
+        with self.app.app_context():
+            db.session.add_all([
+                Product(name='Facet Lamp', description='Desk lamp', price=20.0, category='Home', merchant='Amazon', rating=4.5, is_deal=True),
+                Product(name='Facet Chair', description='Office chair', price=150.0, category='Home', merchant='Ikea', rating=3.2),
+                Product(name='Facet Phone', description='Smartphone', price=600.0, category='Electronics', merchant='Amazon'),
+            ])
+            db.session.commit()
+
+    def test_facet_counts(self):
+        """Test counts per category, merchant, price, rating and deals"""
+        response = self.client.get('/api/products/?facets=1&q=facet')
+        self.assertEqual(response.status_code, 200)
+        facets = response.json['facets']
+        self.assertEqual(len(response.json['products']), 3)
+        self.assertEqual(facets['category'], {'Home': 2, 'Electronics': 1})
+        self.assertEqual(facets['merchant'], {'Amazon': 2, 'Ikea': 1})
+        self.assertEqual(facets['price']['0-25'], 1)
+        self.assertEqual(facets['price']['200+'], 1)
+        self.assertEqual(facets['rating']['4+'], 1)
+        self.assertEqual(facets['rating']['3+'], 2)
+        self.assertEqual(facets['deals'], 1)
+
+    def test_facets_invalidated_on_write(self):
+        """Test catalog writes invalidate cached facet counts"""
+        self.assertEqual(self.client.get('/api/products/?facets=1&category=Home').json['facets']['total'], 2)
+        with self.app.app_context():
+            db.session.add(Product(name='Facet Rug', description='Rug', price=80.0, category='Home'))
+            db.session.commit()
+        self.assertEqual(self.client.get('/api/products/?facets=1&category=Home').json['facets']['total'], 3)
+
+class TestCatalogSnapshot(DatabaseTestCase):
+    """Test the columnar catalog snapshot answers like SQL"""
+
+    def setUp(self):
+        super().setUp()
+        self.app.config['CATALOG_SNAPSHOT_ENABLED'] = True
+
+        with self.app.app_context():
+            db.session.add_all([
+                Product(name='Snap A', description='A', price=10.0, category='Home', merchant='Amazon', rating=4.1, review_count=5, is_deal=True, deal_price=8.0, original_price=12.0),
+                Product(name='Snap B', description='B', price=30.0, category='Home', merchant='Ikea', rating=3.5, review_count=50),
+                Product(name='Snap C', description='C', price=20.0, category='Books', merchant='Amazon', review_count=7, is_deal=True, deal_price=15.0, original_price=25.0),
+                Product(name='Snap D', description='D', price=5.0, category='Books', rating=4.8),
+            ])
+            db.session.commit()
+
+    def names(self, query_string):
+        return [product['name'] for product in self.client.get(f'/api/products/?{query_string}').json]
+
+    def test_matches_sql_results(self):
+        """Test snapshot filter/sort/limit output equals the SQL path"""
+        from app.services.catalog_snapshot import init_catalog_snapshot
+
+        queries = [
+            'sort=price_asc', 'sort=price_desc', 'sort=name_asc', 'sort=rating_desc',
+            'sort=popular_desc', 'sort=deals_desc', 'category=Home&sort=price_desc',
+            'merchant=Amazon&deals=1', 'min_price=8&max_price=25&sort=price_asc',
+            'min_rating=4&sort=rating_desc&limit=1', 'category=Garden'
+        ]
+        expected = {query: self.names(query) for query in queries}
+        init_catalog_snapshot(self.app)
+        for query in queries:
+            self.assertEqual(self.names(query), expected[query], query)
+
+    def test_incremental_update(self):
+        """Test catalog writes are reflected without a rebuild"""
+        from app.services.catalog_snapshot import init_catalog_snapshot
+
+        index = init_catalog_snapshot(self.app)
+        snapshot = index.index
+        with self.app.app_context():
+            db.session.delete(Product.query.filter_by(name='Snap A').first())
+            Product.query.filter_by(name='Snap D').first().price = 500.0
+            db.session.commit()
+            self.assertIs(index.get(), snapshot)
+        self.assertEqual(len(snapshot), 3)
+        self.assertEqual(self.names('sort=price_desc&limit=1'), ['Snap D'])
+
+    def test_rebuilt_when_behind_shared_version(self):
+        """Test a snapshot built before another worker's write is rebuilt on read"""
+        from app.services.catalog_events import catalog_version
+        from app.services.catalog_snapshot import init_catalog_snapshot
+
+        index = init_catalog_snapshot(self.app)
+        stale = index.index
+        with self.app.app_context():
+            # Another worker's write only moves the shared version
+            db.session.execute(db.text('UPDATE catalog_versions SET version = version + 1'))
+            db.session.execute(db.text("UPDATE products SET price = 900 WHERE name = 'Snap B'"))
+            db.session.commit()
+            self.app.config['CATALOG_VERSION_SYNC_SECONDS'] = 0
+            catalog_version(self.app)
+        self.assertEqual(self.names('sort=price_desc&limit=1'), ['Snap B'])
+        self.assertIsNot(index.index, stale)
+
+class TestProductComparison(DatabaseTestCase):
+    """Test product comparison and best-value ranking"""
+
+    def setUp(self):
+        super().setUp()
+
+        with self.app.app_context():
+            products = [
+                Product(name='Value Kettle', description='Kettle', price=30.0, category='Kitchen', rating=4.6, review_count=300),
+                Product(name='Basic Kettle', description='Kettle', price=15.0, category='Kitchen', rating=3.1, review_count=20),
+                Product(name='Luxury Kettle', description='Kettle', price=200.0, category='Kitchen', rating=4.8, review_count=40),
+            ]
+            db.session.add_all(products)
+            db.session.commit()
+            self.ids = [product.id for product in products]
+
+    def test_compare_uses_cache_and_request_order(self):
+        """Test repeated comparisons are served from cache in the requested order"""
+        first = self.client.post('/api/products/compare', json={'product_ids': self.ids})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json['summary']['recommended_product_id'], self.ids[0])
+
+        reversed_ids = list(reversed(self.ids))
+        second = self.client.post('/api/products/compare', json={'product_ids': reversed_ids})
+        self.assertEqual([row['id'] for row in second.json['products']], reversed_ids)
+        self.assertEqual(self.app.extensions['comparison_cache'].hits, 1)
+
+    def test_best_value_ranking(self):
+        """Test best-value ranking follows score and tracks catalog writes"""
+        names = [product['name'] for product in self.client.get('/api/products/best-value?category=Kitchen').json]
+        self.assertEqual(names[0], 'Value Kettle')
+
+        with self.app.app_context():
+            db.session.get(Product, self.ids[1]).rating = 5.0
+            db.session.get(Product, self.ids[1]).review_count = 1000
+            db.session.commit()
+        names = [product['name'] for product in self.client.get('/api/products/best-value?category=Kitchen&limit=1').json]
+        self.assertEqual(names, ['Basic Kettle'])
+
+    def test_best_value_follows_other_workers(self):
+        """Test the score index is rebuilt after a write committed by another worker"""
+        from app.services.catalog_events import catalog_version
+        with self.app.app_context():
+            # Another worker's write only moves the shared version
+            db.session.execute(db.text('UPDATE catalog_versions SET version = version + 1'))
+            db.session.execute(db.text("UPDATE products SET rating = 5.0, review_count = 5000 WHERE name = 'Luxury Kettle'"))
+            db.session.commit()
+            self.app.config['CATALOG_VERSION_SYNC_SECONDS'] = 0
+            catalog_version(self.app)
+        names = [product['name'] for product in self.client.get('/api/products/best-value?category=Kitchen&limit=1').json]
+        self.assertEqual(names, ['Luxury Kettle'])
+
+class TestPageCache(DatabaseTestCase):
+    """Test cached server-rendered pages and pagination"""
+
+    def create_app(self):
+        from run import app
+        reset_database(app)
+        return app
+
+    def setUp(self):
+        super().setUp()
+        self.app.config['PAGE_SIZE'] = 2
+        self.app.extensions['html_cache'].clear()
+
+        with self.app.app_context():
+            products = [
+                Product(name=f'Lamp {index}', description='Desk lamp', price=20.0 + index,
+                        category='Lighting', is_deal=True, deal_price=15.0 + index)
+                for index in range(3)
+            ]
+            db.session.add_all(products)
+            db.session.commit()
+            self.ids = [product.id for product in products]
+
+    def tearDown(self):
+        self.app.config['PAGE_SIZE'] = 24
+        super().tearDown()
+
+    def test_category_page_is_paginated(self):
+        """Test category pages render one page of cards with pagination links"""
+        first = self.client.get('/category/Lighting').get_data(as_text=True)
+        self.assertEqual(first.count('class="product-card"'), 2)
+        self.assertIn('?page=2', first)
+
+        second = self.client.get('/category/Lighting?page=2').get_data(as_text=True)
+        self.assertEqual(second.count('class="product-card"'), 1)
+        self.assertIn('?page=1', second)
+
+    def test_pages_cached_until_catalog_write(self):
+        """Test repeated page views reuse cached HTML and writes invalidate it"""
+        self.client.get('/deals')
+        cache = self.app.extensions['html_cache']
+        cached_entries = len(cache.entries)
+        self.assertEqual(self.client.get('/deals').status_code, 200)
+        self.assertEqual(len(cache.entries), cached_entries)
+
+        with self.app.app_context():
+            db.session.get(Product, self.ids[0]).name = 'Renamed Lamp'
+            db.session.commit()
+        self.assertIn('Renamed Lamp', self.client.get('/deals?page=2').get_data(as_text=True))
+        self.assertIn('Renamed Lamp', self.client.get(f'/product/{self.ids[0]}').get_data(as_text=True))
+
+    def test_cache_respects_size_bound(self):
+        """Test the HTML cache evicts least recently used entries past its bound"""
+        from app.services.html_cache import HtmlCache
+        cache = HtmlCache(max_chars=10)
+        cache.set('a', 'x' * 6)
+        cache.set('b', 'y' * 6)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 'y' * 6)
+        self.assertEqual(cache.size, 6)
+
+    def test_cache_entries_expire(self):
+        """Test catalog caches drop entries after their TTL"""
+        from unittest import mock
+        from app.services.cache import LRUCache
+        from app.services.html_cache import HtmlCache
+        pages = HtmlCache(ttl=60)
+        results = LRUCache(ttl=60)
+        pages.set('home', '<html>')
+        results.set('facets', {'Lighting': 3})
+        later = time.monotonic() + 61
+        with mock.patch('time.monotonic', return_value=later):
+            self.assertIsNone(pages.get('home'))
+            self.assertIsNone(results.get('facets'))
+        self.assertEqual(pages.size, 0)
+
+    def test_catalog_version_shared_between_workers(self):
+        """Test a write through one worker invalidates another worker's caches"""
+        import tempfile
+        from app.services.catalog_events import catalog_version
+        with tempfile.TemporaryDirectory() as directory:
+            config = file_database_config(f'{directory}/shared.db')
+            config.CATALOG_VERSION_SYNC_SECONDS = 0
+            writer, reader = create_app(config), create_app(config)
+            with writer.app_context():
+                db.session.add(Product(name='Floor Lamp', description='Tall lamp', price=80.0))
+                db.session.commit()
+                written = catalog_version(writer)
+                db.engine.dispose()
+            with reader.app_context():
+                self.assertEqual(catalog_version(reader), written)
+                db.engine.dispose()
+            self.assertGreater(written, 0)
+
+    def test_catalog_version_commits_with_write(self):
+        """Test the shared catalog version only moves when the catalog write commits"""
+        from app.services.catalog_events import read_shared_catalog_version
+        with self.app.app_context():
+            before = read_shared_catalog_version()
+            db.session.add(Product(name='Rolled Back Lamp', description='Lamp', price=10.0))
+            db.session.flush()
+            db.session.rollback()
+            self.assertEqual(read_shared_catalog_version(), before)
+            db.session.add(Product(name='Committed Lamp', description='Lamp', price=10.0))
+            db.session.commit()
+            self.assertEqual(read_shared_catalog_version(), before + 1)
+
+
+class TestReadiness(unittest.TestCase):
+    """Test health and readiness endpoints"""
+
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+    def test_health_check(self):
+        """Test liveness endpoint"""
+        self.assertEqual(self.client.get('/healthz').json, {'status': 'ok'})
+
+    def test_readiness_warms_once(self):
+        """Test readiness runs warm-up steps once and reports them"""
+        response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['status'], 'ready')
+        self.assertTrue(all(check['ok'] for check in response.json['checks'].values()))
+        self.assertGreater(response.json['checks']['templates']['detail'], 0)
+
+        warmup_ms = response.json['warmup_ms']
+        self.assertEqual(self.client.get('/readyz').json['warmup_ms'], warmup_ms)
+
+
+class TestSchemaMigrations(unittest.TestCase):
+    """Test the versioned schema migration runner"""
+
+    def setUp(self):
+        import tempfile
+        from sqlalchemy import create_engine
+        self.app = create_app()
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f'sqlite:///{self.directory.name}/legacy.db')
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def test_migrates_legacy_database_once(self):
+        """Test a pre-migration database is upgraded and then left alone"""
+        from sqlalchemy import inspect, text
+        from app.services.migrations import current_schema_version, latest_schema_version, migrate
+        with self.engine.begin() as connection:
+            connection.execute(text(
+                'CREATE TABLE users (id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, '
+                'email VARCHAR(255) NOT NULL, password_hash VARCHAR(255) NOT NULL, '
+                'created_at DATETIME, updated_at DATETIME)'
+            ))
+
+        with self.app.app_context():
+            self.assertEqual(current_schema_version(self.engine), 0)
+            self.assertEqual(migrate(self.engine), list(range(1, latest_schema_version() + 1)))
+            self.assertEqual(migrate(self.engine), [])
+
+        inspector = inspect(self.engine)
+        self.assertIn('zip_code', {column['name'] for column in inspector.get_columns('users')})
+        self.assertIn('ix_products_category_created_at', {index['name'] for index in inspector.get_indexes('products')})
+        self.assertEqual(current_schema_version(self.engine), latest_schema_version())
+
+    def test_upgrades_baseline_schema(self):
+        """Test tables created before the migration series are upgraded column by column"""
+        from sqlalchemy import inspect, text
+        from app.services.migrations import latest_schema_version, migrate
+        with self.engine.begin() as connection:
+            connection.execute(text(
+                'CREATE TABLE orders (id INTEGER PRIMARY KEY, order_number VARCHAR(50) NOT NULL UNIQUE, '
+                'customer_name VARCHAR(255) NOT NULL, customer_email VARCHAR(255) NOT NULL, '
+                'customer_phone VARCHAR(20) NOT NULL, total_amount FLOAT NOT NULL, status VARCHAR(50), '
+                'payment_status VARCHAR(50), created_at DATETIME, updated_at DATETIME)'
+            ))
+            connection.execute(text(
+                'CREATE TABLE carts (id INTEGER PRIMARY KEY, session_id VARCHAR(255) NOT NULL UNIQUE, '
+                'created_at DATETIME, updated_at DATETIME)'
+            ))
+            connection.execute(text(
+                'CREATE TABLE cart_items (id INTEGER PRIMARY KEY, cart_id INTEGER NOT NULL, '
+                'product_id INTEGER NOT NULL, quantity INTEGER, created_at DATETIME)'
+            ))
+
+        with self.app.app_context():
+            self.assertEqual(migrate(self.engine), list(range(1, latest_schema_version() + 1)))
+
+        inspector = inspect(self.engine)
+        order_indexes = {index['name'] for index in inspector.get_indexes('orders')}
+        self.assertIn('ix_orders_reservation_expires_at', order_indexes)
+        self.assertIn('ix_orders_updated_at', order_indexes)
+        self.assertIn('ix_carts_updated_at', {index['name'] for index in inspector.get_indexes('carts')})
+        self.assertIn('unit_price', {column['name'] for column in inspector.get_columns('cart_items')})
+
+    def test_startup_records_schema_version(self):
+        """Test app startup leaves the schema at the latest version"""
+        from app.services.migrations import latest_schema_version
+        self.assertEqual(self.app.extensions['schema_version'], latest_schema_version())
+
+
+class TestDatabaseProfiles(unittest.TestCase):
+    """Test engine tuning profiles"""
+
+    def test_sqlite_connections_use_wal(self):
+        """Test SQLite connections get the tuned pragmas"""
+        import tempfile
+        from sqlalchemy import text
+        with tempfile.TemporaryDirectory() as directory:
+            app = create_app(file_database_config(f'{directory}/profile.db'))
+            self.assertEqual(app.extensions['database_profile'], 'sqlite')
+            with app.app_context():
+                with db.engine.connect() as connection:
+                    self.assertEqual(connection.execute(text('PRAGMA journal_mode')).scalar(), 'wal')
+                    self.assertEqual(connection.execute(text('PRAGMA busy_timeout')).scalar(), 5000)
+                    self.assertEqual(connection.execute(text('PRAGMA synchronous')).scalar(), 1)
+                db.engine.dispose()
+
+    def test_postgresql_pool_options(self):
+        """Test PostgreSQL URLs select pooled engine options"""
+        from app.services.database import engine_options, resolve_database_profile
+        profile = resolve_database_profile('postgresql://shop:secret@db/shophub')
+        self.assertEqual(profile, 'postgresql')
+        options = engine_options(profile, {'DB_POOL_SIZE': 4})
+        self.assertEqual(options['pool_size'], 4)
+        self.assertTrue(options['pool_pre_ping'])
+        self.assertEqual(resolve_database_profile('sqlite:///shop.db', 'default'), 'default')
+        with self.assertRaises(ValueError):
+            resolve_database_profile('sqlite:///shop.db', 'fast')
+
+
+class TestReadReplicas(DatabaseTestCase):
+    """Test catalog reads are routed to a replica"""
+
+    def create_app(self):
+        import tempfile
+        self.directory = tempfile.TemporaryDirectory()
+
+        class ReplicaConfig(TemplateDatabaseConfig):
+            DATABASE_REPLICA_URLS = [f'sqlite:///{self.directory.name}/replica.db']
+
+        return create_app(ReplicaConfig)
+
+    def setUp(self):
+        super().setUp()
+
+        with self.app.app_context():
+            self.replica = self.app.extensions['replica_engines'][0]
+            db.metadata.create_all(self.replica)
+            product = Product(name='Primary Lamp', description='Lamp', price=20.0, category='Lighting')
+            db.session.add(product)
+            db.session.commit()
+            self.product_id = product.id
+            with self.replica.begin() as connection:
+                connection.execute(Product.__table__.insert().values(
+                    id=self.product_id, name='Replica Lamp', description='Lamp', price=20.0, category='Lighting'
+                ))
+
+    def tearDown(self):
+        super().tearDown()
+        self.replica.dispose()
+        self.directory.cleanup()
+
+    def test_catalog_reads_use_replica(self):
+        """Test read-only catalog endpoints query the replica"""
+        response = self.client.get(f'/api/products/{self.product_id}')
+        self.assertEqual(response.json['name'], 'Replica Lamp')
+
+    def test_reads_after_write_stay_on_primary(self):
+        """Test a client that just wrote reads from the primary"""
+        response = self.client.post(f'/api/products/{self.product_id}/reviews', json={
+            'reviewer_name': 'Sam', 'reviewer_email': 'sam@example.com', 'rating': 5, 'body': 'Bright'
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('shophub_primary', response.headers.get('Set-Cookie', ''))
+
+        response = self.client.get(f'/api/products/{self.product_id}')
+        self.assertEqual(response.json['name'], 'Primary Lamp')
+
+    def test_replicas_are_not_binds(self):
+        """Test replica engines stay out of the binds but get the primary's tuning"""
+        from sqlalchemy import text
+        with self.app.app_context():
+            self.assertEqual(list(db.engines), [None])
+        with self.replica.connect() as connection:
+            self.assertEqual(connection.execute(text('PRAGMA busy_timeout')).scalar(), 5000)
+
+
+class TestInstrumentation(DatabaseTestCase):
+    """Test request timing, SQL counters and metrics"""
+
+    def setUp(self):
+        super().setUp()
+
+        with self.app.app_context():
+            db.session.add(Product(name='Timer', description='Kitchen timer', price=9.0, category='Kitchen'))
+            db.session.commit()
+
+    def test_server_timing_header(self):
+        """Test responses report app and database time"""
+        response = self.client.get('/api/products/?category=Kitchen')
+        timings = response.headers.getlist('Server-Timing')
+        self.assertTrue(timings[0].startswith('app;dur='))
+        self.assertRegex(timings[1], r'^db;dur=[0-9.]+;desc="[1-9][0-9]* queries, [1-9][0-9]* rows"$')
+
+    def test_metrics_endpoint(self):
+        """Test per-endpoint histograms are exposed for scraping with the admin key"""
+        self.app.config['ADMIN_DASHBOARD_KEY'] = 'metrics-key'
+        self.client.get('/api/products/')
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        body = self.client.get('/metrics', headers={'X-Admin-Key': 'metrics-key'}).get_data(as_text=True)
+        self.assertIn('shophub_requests_total{endpoint="products.get_products",method="GET",status="200"} 1', body)
+        self.assertIn('shophub_request_duration_seconds_bucket{endpoint="products.get_products",method="GET",le="+Inf"} 1', body)
+        self.assertIn('shophub_sql_statements_total{endpoint="products.get_products",method="GET"}', body)
+
+    def test_slow_query_logged(self):
+        """Test queries over the threshold are logged with their endpoint"""
+        self.app.config['SLOW_QUERY_MS'] = 0
+        with self.assertLogs(self.app.logger, level='WARNING') as logs:
+            self.client.get('/api/products/')
+        self.assertIn('products.get_products', logs.output[0])
+
+
+class TestCartTotals(DatabaseTestCase):
+    """Test cart running totals, single-query reads and purging"""
+
+    def setUp(self):
+        super().setUp()
+        self.session_id = 'cart-totals-session'
+
+        with self.app.app_context():
+            db.session.add(Product(name='Mug', description='Ceramic mug', price=12.5, stock=20, category='Home'))
+            db.session.add(Product(name='Tea', description='Loose leaf tea', price=8.0, stock=20, category='Home'))
+            db.session.commit()
+
+    def add(self, product_id, quantity):
+        return self.client.post(f'/api/cart/{self.session_id}/add', json={'product_id': product_id, 'quantity': quantity})
+
+    def test_totals_follow_changes(self):
+        """Test add, update and remove keep the running totals exact"""
+        self.add(1, 2)
+        cart = self.add(2, 3).json
+        self.assertEqual((cart['total'], cart['item_count']), (49.0, 5))
+        self.assertEqual(set(cart['items'][0]['product']), {'id', 'name', 'price', 'image_url', 'stock', 'category'})
+
+        mug_line = cart['items'][0]['id']
+        cart = self.client.patch(f'/api/cart/{self.session_id}/items/{mug_line}', json={'quantity': 1}).json
+        self.assertEqual((cart['total'], cart['item_count']), (36.5, 4))
+        cart = self.client.delete(f'/api/cart/{self.session_id}/remove/{mug_line}').json
+        self.assertEqual((cart['total'], cart['item_count'], len(cart['items'])), (24.0, 3, 1))
+
+    def test_get_is_one_query(self):
+        """Test reading a cart is a single joined query"""
+        self.add(1, 1)
+        self.add(2, 1)
+        response = self.client.get(f'/api/cart/{self.session_id}')
+        self.assertIn('desc="1 queries', response.headers.getlist('Server-Timing')[1])
+
+    def test_price_change_reprices_cart(self):
+        """Test reads show the current price without writing; the next change persists it"""
+        self.add(1, 2)
+        self.add(2, 1)
+        with self.app.app_context():
+            db.session.get(Product, 1).price = 10.0
+            db.session.commit()
+
+        response = self.client.get(f'/api/cart/{self.session_id}')
+        self.assertEqual(response.json['total'], 28.0)
+        self.assertEqual(response.json['items'][0]['subtotal'], 20.0)
+        self.assertIn('desc="1 queries', response.headers.getlist('Server-Timing')[1])
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Cart, 1).total_amount, 33.0)
+
+        tea_line = response.json['items'][1]['id']
+        cart = self.client.patch(f'/api/cart/{self.session_id}/items/{tea_line}', json={'quantity': 2}).json
+        self.assertEqual((cart['total'], cart['item_count']), (36.0, 4))
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Cart, 1).total_amount, 36.0)
+
+    def test_add_beyond_stock_rejected(self):
+        """Test a cart cannot hold more than the product's stock"""
+        self.add(1, 15)
+        self.assertEqual(self.add(1, 10).status_code, 409)
+
+    def test_purge_abandoned_carts(self):
+        """Test carts idle past the retention window are deleted in batches"""
+        from datetime import datetime, timedelta
+        from app.services.carts import purge_abandoned_carts
+
+        self.add(1, 1)
+        with self.app.app_context():
+            self.assertEqual(purge_abandoned_carts(), 0)
+            self.assertEqual(purge_abandoned_carts(now=datetime.utcnow() + timedelta(days=31), batch_size=1), 1)
+            self.assertEqual(Cart.query.count(), 0)
+            self.assertEqual(CartItem.query.count(), 0)
+
+
+class TestCheckout(DatabaseTestCase):
+    """Test checkout stock reservations, expiry and the email outbox"""
+
+    def setUp(self):
+        super().setUp()
+        self.app.extensions['rate_limiter'].enabled = False
+        self.customer = {
+            'customer_name': 'Flash Buyer',
+            'customer_email': 'buyer@example.com',
+            'customer_phone': '+15550100'
+        }
+
+        with self.app.app_context():
+            db.session.add(Product(name='Limited Sneaker', description='Drop', price=120.0, stock=5, category='Fashion'))
+            db.session.commit()
+
+    def checkout(self, quantity=1):
+        return self.client.post('/api/orders/', json={**self.customer, 'items': [{'product_id': 1, 'quantity': quantity}]})
+
+    def stock(self):
+        with self.app.app_context():
+            return db.session.get(Product, 1).stock
+
+    def test_checkout_reserves_stock(self):
+        """Test an order decrements stock and queues its confirmation email"""
+        from app.models import OutboxMessage
+
+        response = self.checkout(2)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['total_amount'], 240.0)
+        self.assertIsNotNone(response.json['reservation_expires_at'])
+        self.assertEqual(self.stock(), 3)
+        with self.app.app_context():
+            self.assertEqual(OutboxMessage.query.filter_by(kind='order_confirmation').count(), 1)
+
+    def test_checkout_rejects_oversell(self):
+        """Test ordering more than the stock fails without side effects"""
+        response = self.checkout(6)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json['product_id'], 1)
+        self.assertEqual(self.stock(), 5)
+        with self.app.app_context():
+            self.assertEqual(Order.query.count(), 0)
+
+    def test_expired_reservation_returns_stock(self):
+        """Test unpaid orders past their reservation give their stock back"""
+        from datetime import datetime, timedelta
+        from app.services.checkout import expire_reservations
+
+        order_id = self.checkout(2).json['id']
+        with self.app.app_context():
+            self.assertEqual(expire_reservations(), 0)
+            self.assertEqual(expire_reservations(now=datetime.utcnow() + timedelta(hours=1)), 1)
+            self.assertEqual(db.session.get(Order, order_id).status, 'expired')
+        self.assertEqual(self.stock(), 5)
+
+    def test_paid_order_keeps_stock(self):
+        """Test confirming payment clears the reservation so it never expires"""
+        from datetime import datetime, timedelta
+        from app.services.checkout import expire_reservations
+
+        self.app.config['ADMIN_DASHBOARD_KEY'] = 'orders-key'
+        order_id = self.checkout(2).json['id']
+        response = self.client.patch(f'/api/orders/{order_id}/status', json={'payment_status': 'completed'},
+                                     headers={'X-Admin-Key': 'orders-key'})
+        self.assertEqual(response.json['order']['status'], 'confirmed')
+        with self.app.app_context():
+            self.assertEqual(expire_reservations(now=datetime.utcnow() + timedelta(hours=1)), 0)
+        self.assertEqual(self.stock(), 3)
+
+    def test_outbox_delivery_retries(self):
+        """Test outbox messages are sent after commit and retried on failure"""
+        from unittest import mock
+        from app.models import OutboxMessage
+        from app.services import outbox
+
+        self.checkout()
+        with self.app.app_context():
+            with mock.patch.dict(outbox.SENDERS, {'order_confirmation': lambda order: False}):
+                self.assertEqual(outbox.deliver_outbox()['retried'], 1)
+            message = OutboxMessage.query.one()
+            self.assertEqual((message.status, message.attempts), ('pending', 1))
+
+            message.available_at = message.created_at
+            db.session.commit()
+            with mock.patch.dict(outbox.SENDERS, {'order_confirmation': lambda order: True}):
+                self.assertEqual(outbox.deliver_outbox()['sent'], 1)
+            self.assertEqual(OutboxMessage.query.one().status, 'sent')
+
+
+class TestCheckoutConcurrency(unittest.TestCase):
+    """Test checkout under concurrent buyers, on a real database file"""
+
+    def setUp(self):
+        import tempfile
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = create_app(file_database_config(f'{self.directory.name}/checkout.db'))
+        self.app.extensions['rate_limiter'].enabled = False
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.session.add(Product(name='Limited Sneaker', description='Drop', price=120.0, stock=5, category='Fashion'))
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        self.directory.cleanup()
+
+    def test_concurrent_buyers_never_oversell(self):
+        """Test concurrent checkouts on one SKU sell exactly the stock"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        def checkout(_):
+            return self.client.post('/api/orders/', json={
+                'customer_name': 'Flash Buyer', 'customer_email': 'buyer@example.com', 'customer_phone': '+15550100',
+                'items': [{'product_id': 1, 'quantity': 1}]
+            }).status_code
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            statuses = list(pool.map(checkout, range(20)))
+        self.assertEqual(statuses.count(201), 5)
+        self.assertEqual(statuses.count(409), 15)
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Product, 1).stock, 0)
+
+class TestAnalyticsRollups(DatabaseTestCase):
+    """Test daily analytics rollups and the admin summary"""
+
+    def setUp(self):
+        super().setUp()
+        self.app.config['ADMIN_DASHBOARD_KEY'] = 'analytics-key'
+        self.app.extensions['rate_limiter'].enabled = False
+
+        with self.app.app_context():
+            db.session.add(Product(name='Lamp', description='Desk lamp', price=40.0, stock=50, category='Home'))
+            db.session.add(Product(name='Novel', description='Paperback', price=10.0, stock=50, category='Books'))
+            db.session.add(SupportTicket(customer_name='Ann', customer_email='ann@example.com', subject='Hi', message='Help'))
+            db.session.commit()
+
+    def order(self, items):
+        return self.client.post('/api/orders/', json={
+            'customer_name': 'Ann', 'customer_email': 'ann@example.com', 'customer_phone': '+15550100',
+            'items': [{'product_id': product_id, 'quantity': quantity} for product_id, quantity in items]
+        }).json
+
+    def summary(self):
+        return self.client.get('/api/admin/analytics?days=7', headers={'X-Admin-Key': 'analytics-key'}).json
+
+    def test_rollups_feed_summary(self):
+        """Test the summary reports revenue, top products and ticket counts from rollups"""
+        from app.services.analytics import compact_rollups
+
+        self.order([(1, 2), (2, 1)])
+        self.order([(2, 3)])
+        with self.app.app_context():
+            compact_rollups()
+
+        summary = self.summary()
+        self.assertEqual(len(summary['daily']), 7)
+        self.assertEqual(summary['daily'][-1], {'date': summary['to'], 'orders': 2, 'revenue': 120.0, 'units': 6})
+        self.assertEqual(summary['top_products'][0], {'product_id': 1, 'name': 'Lamp', 'units': 2, 'revenue': 80.0})
+        self.assertEqual([entry['category'] for entry in summary['top_categories']], ['Home', 'Books'])
+        self.assertEqual(summary['tickets_by_status'], {'open': 1})
+
+    def test_compaction_is_incremental(self):
+        """Test only changed days are rebuilt and cancellations leave the sales figures"""
+        from app.services.analytics import compact_rollups
+        from app.services.checkout import release_reservation
+
+        order_id = self.order([(1, 1)])['id']
+        with self.app.app_context():
+            self.assertEqual(len(compact_rollups()), 1)
+            for model in (Order, SupportTicket):
+                model.query.update({'updated_at': datetime.utcnow() - timedelta(hours=1)})
+            db.session.commit()
+            self.assertEqual(compact_rollups(), [])
+            release_reservation(order_id, 'cancelled')
+            self.assertEqual(len(compact_rollups()), 1)
+
+        summary = self.summary()
+        self.assertEqual(summary['daily'][-1]['orders'], 0)
+        self.assertEqual(summary['orders_by_status']['cancelled']['orders'], 1)
+        self.assertEqual(summary['top_products'], [])
+
+
+class TestSessionTokens(DatabaseTestCase):
+    """Test signed session tokens, refresh rotation and revocation"""
+
+    def create_app(self):
+        from run import app
+        reset_database(app)
+        return app
+
+    def setUp(self):
+        from app.models import User
+        from app.services.passwords import hash_password
+
+        super().setUp()
+        self.app.extensions['rate_limiter'].enabled = False
+
+        with self.app.app_context():
+            db.session.add(User(name='Sam', email='sam@example.com', password_hash=hash_password('correct horse'),
+                                address_line1='1 Main St', city='Austin', state='TX', zip_code='78701'))
+            db.session.commit()
+        self.tokens = self.client.post('/api/auth/login', json={'email': 'sam@example.com', 'password': 'correct horse'}).json
+
+    def tearDown(self):
+        self.app.extensions['rate_limiter'].enabled = self.app.config.get('RATE_LIMIT_ENABLED', True)
+        super().tearDown()
+
+    def me(self, access_token):
+        return self.client.get('/api/auth/me', headers={'Authorization': f'Bearer {access_token}'})
+
+    def test_authenticated_request_skips_database(self):
+        """Test a repeat request resolves the user from the token alone"""
+        self.assertEqual(self.me(self.tokens['access_token']).json['email'], 'sam@example.com')
+        response = self.me(self.tokens['access_token'])
+        self.assertIn('desc="0 queries', response.headers.getlist('Server-Timing')[1])
+        self.assertEqual(self.me('not-a-token').status_code, 401)
+
+    def test_refresh_rotation_detects_reuse(self):
+        """Test refresh tokens work once and reuse revokes the session"""
+        refreshed = self.client.post('/api/auth/refresh', json={'refresh_token': self.tokens['refresh_token']})
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertEqual(self.me(refreshed.json['access_token']).status_code, 200)
+
+        reused = self.client.post('/api/auth/refresh', json={'refresh_token': self.tokens['refresh_token']})
+        self.assertEqual(reused.status_code, 401)
+        self.assertEqual(self.me(refreshed.json['access_token']).status_code, 401)
+
+    def test_logout_revokes_session(self):
+        """Test logging out invalidates the session's tokens"""
+        headers = {'Authorization': f"Bearer {self.tokens['access_token']}"}
+        self.assertEqual(self.client.post('/api/auth/logout', headers=headers).status_code, 200)
+        self.assertEqual(self.me(self.tokens['access_token']).status_code, 401)
+        self.assertEqual(self.client.post('/api/auth/refresh', json={'refresh_token': self.tokens['refresh_token']}).status_code, 401)
+
+    def test_password_reset_revokes_existing_tokens(self):
+        """Test a password reset invalidates earlier tokens but not a login right after it"""
+        from run import generate_reset_token
+        self.assertEqual(self.me(self.tokens['access_token']).status_code, 200)
+        with self.app.test_request_context():
+            reset_token = generate_reset_token('sam@example.com')
+        response = self.client.post('/api/auth/reset-password', json={
+            'token': reset_token, 'new_password': 'battery staple', 'verify_password': 'battery staple'
+        })
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.me(self.tokens['access_token']).status_code, 401)
+        self.assertEqual(self.client.post('/api/auth/refresh', json={'refresh_token': self.tokens['refresh_token']}).status_code, 401)
+        fresh = self.client.post('/api/auth/login', json={'email': 'sam@example.com', 'password': 'battery staple'}).json
+        self.assertEqual(self.me(fresh['access_token']).status_code, 200)
+
+    def test_expired_revocations_are_pruned(self):
+        """Test revocations are forgotten once the tokens they cover have expired"""
+        from unittest import mock
+        tokens = self.app.extensions['session_tokens']
+        headers = {'Authorization': f"Bearer {self.tokens['access_token']}"}
+        self.client.post('/api/auth/logout', headers=headers)
+        session_id = tokens.access_serializer.loads(self.tokens['access_token'])['sid']
+        self.assertIn(session_id, tokens.revoked_sessions)
+
+        later = time.time() + tokens.refresh_seconds + 1
+        with self.app.app_context(), mock.patch('time.time', return_value=later):
+            tokens.sync_revocations(force=True)
+        self.assertNotIn(session_id, tokens.revoked_sessions)
+
+
+class TestIdentifiers(unittest.TestCase):
+    """Test time-ordered order and ticket identifiers"""
+
+    def test_ids_are_unique_and_increasing(self):
+        """Test ids are unique across threads and sort in generation order"""
+        from concurrent.futures import ThreadPoolExecutor
+        from app.identifiers import IdGenerator
+
+        generator = IdGenerator(node=7)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            ids = list(pool.map(lambda _: generator.next_int(), range(20000)))
+        self.assertEqual(len(set(ids)), len(ids))
+        sequential = [generator.next_id() for _ in range(1000)]
+        self.assertEqual(sequential, sorted(sequential))
+
+    def test_identifier_encodes_creation_time(self):
+        """Test the timestamp can be read back from an order number"""
+        import time
+        from app.identifiers import identifier_timestamp
+        from app.services import generate_order_number
+
+        order_number = generate_order_number()
+        self.assertRegex(order_number, r'^ORD-[0-9A-HJKMNP-TV-Z]{26}$')
+        self.assertAlmostEqual(identifier_timestamp(order_number), time.time(), delta=5)
+
+    def test_tickets_use_identifiers(self):
+        """Test new support tickets get time-ordered numbers"""
+        app = create_app()
+        with app.app_context():
+            first = SupportTicket(customer_name='A', customer_email='a@example.com', subject='S', message='M')
+            second = SupportTicket(customer_name='B', customer_email='b@example.com', subject='S', message='M')
+            db.session.add(first)
+            db.session.flush()
+            db.session.add(second)
+            db.session.flush()
+            self.assertLess(first.ticket_number, second.ticket_number)
+            self.assertTrue(first.ticket_number.startswith('TKT-'))
+            db.session.rollback()
+            db.session.remove()
+
+
+class ProfilingConfig(TemplateDatabaseConfig):
+    PROFILING_ENABLED = True
+    ADMIN_DASHBOARD_KEY = 'profile-key'
+
+
+class TestProfiling(DatabaseTestCase):
+    """Test on-demand request profiling and stack sampling"""
+
+    config = ProfilingConfig
+
+    def setUp(self):
+        super().setUp()
+        self.admin = {'X-Admin-Key': 'profile-key'}
+
+        with self.app.app_context():
+            db.session.add(Product(name='Stopwatch', description='Sports stopwatch', price=15.0, category='Sports'))
+            db.session.commit()
+
+    def test_disabled_by_default(self):
+        """Test profiling installs nothing unless enabled"""
+        app = create_app()
+        app.config['ADMIN_DASHBOARD_KEY'] = 'profile-key'
+        self.assertNotIn('request_profiles', app.extensions)
+        response = app.test_client().get('/api/admin/profiling/requests', headers=self.admin)
+        self.assertEqual(response.status_code, 404)
+
+    def test_profile_header_requires_admin_key(self):
+        """Test the profile header is ignored without the admin key"""
+        response = self.client.get('/api/products/', headers={'X-Profile': '1'})
+        self.assertNotIn('X-Profile-Id', response.headers)
+
+    def test_request_profile_collapsed_stacks(self):
+        """Test a profiled request can be fetched as collapsed stacks"""
+        response = self.client.get('/api/products/?category=Sports', headers={'X-Profile': '1', **self.admin})
+        profile_id = response.headers['X-Profile-Id']
+
+        listing = self.client.get('/api/admin/profiling/requests', headers=self.admin).get_json()
+        self.assertEqual(listing[0]['id'], profile_id)
+        self.assertEqual(listing[0]['endpoint'], 'products.get_products')
+
+        collapsed = self.client.get(f'/api/admin/profiling/requests/{profile_id}?format=collapsed', headers=self.admin)
+        self.assertIn('get_products', collapsed.get_data(as_text=True))
+        self.assertRegex(collapsed.get_data(as_text=True).splitlines()[0], r' [0-9]+$')
+
+    def test_stack_sampling(self):
+        """Test a sampling run aggregates stacks across requests"""
+        started = self.client.post('/api/admin/profiling/sample', json={'seconds': 0.3, 'interval_ms': 1}, headers=self.admin)
+        self.assertEqual(started.status_code, 202)
+        self.assertEqual(self.client.post('/api/admin/profiling/sample', json={'seconds': 1}, headers=self.admin).status_code, 409)
+
+        self.app.extensions['stack_sampler'].thread.join()
+        status = self.client.get('/api/admin/profiling/sample', headers=self.admin).get_json()
+        self.assertFalse(status['running'])
+        self.assertGreater(status['ticks'], 0)
+
+    def test_collapse_wide_deep_call_graph(self):
+        """Test collapsing a call graph with billions of paths stays fast and keeps the total time"""
+        from app.services.profiling import collapse_pstats
+        width, depth = 6, 12
+        root = ('app.py', 1, 'main')
+        layers = [[('app.py', 100 * level + index, f'step_{level}_{index}') for index in range(width)]
+                  for level in range(depth)]
+        # Every function calls every function of the next layer; each spends 1s of its own
+        stats = {root: (1, 1, 1.0, 1.0 + depth, {})}
+        for level, layer in enumerate(layers):
+            callers = [root] if level == 0 else layers[level - 1]
+            cumulative = depth - level
+            for function in layer:
+                stats[function] = (len(callers), len(callers), 1.0, cumulative, {
+                    caller: (1, 1, 1.0 / len(callers), cumulative / len(callers)) for caller in callers
+                })
+
+        started = time.perf_counter()
+        collapsed = collapse_pstats(stats)
+        self.assertLess(time.perf_counter() - started, 5)
+        total = sum(int(line.rsplit(' ', 1)[1]) for line in collapsed.splitlines())
+        self.assertAlmostEqual(total / 1e6, 1 + width * depth, delta=0.01 * (1 + width * depth))
+
+
+
+class TestStartupImports(unittest.TestCase):
+    """Test app startup leaves rarely used heavy modules unloaded"""
+
+    def test_lazy_modules_not_loaded(self):
+        """Test create_app in a fresh interpreter does not import requests or numpy"""
+        import subprocess
+        import sys
+        import tempfile
+        from benchmarks.startup import COLD_START, LAZY_MODULES
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(os.environ, DATABASE_URL=f'sqlite:///{directory}/startup.db')
+            result = subprocess.run(
+                [sys.executable, '-c', f'import sys; {COLD_START}; print([m for m in {LAZY_MODULES!r} if m in sys.modules])'],
+                capture_output=True, text=True, check=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__))
+            )
+        self.assertEqual(result.stdout.strip(), '[]')
+
+    def test_import_helpers_load_on_demand(self):
+        """Test the URL import helpers still resolve through their own module"""
+        from app.services.product_import import infer_extension_from_url_or_type, infer_merchant_name
+        self.assertEqual(infer_merchant_name('https://www.amazon.com/dp/B000'), 'Amazon')
+        self.assertEqual(infer_extension_from_url_or_type('https://cdn.example.com/a', 'image/png'), '.png')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,36 @@
+"""
+Production WSGI entry point for ShopHub.
+
+Importing this module builds the app, applies schema checks and loads the
+in-memory catalog indexes. With gunicorn's ``preload_app`` (see
+gunicorn.conf.py) that happens once in the master before workers fork:
+
+    gunicorn -c gunicorn.conf.py
+
+On platforms without gunicorn (e.g. Windows) run ``python wsgi.py`` to serve
+the same app with waitress.
+"""
+
+import os
+from run import app
+
+
+def default_threads():
+    return int(os.getenv('WEB_THREADS') or max(4, (os.cpu_count() or 1) * 2))
+
+
+def main():
+    from waitress import serve
+    from app.services.warmup import warm_app
+
+    warm_app(app)
+    serve(
+        app,
+        host=os.getenv('HOST', '0.0.0.0'),
+        port=int(os.getenv('PORT', 5000)),
+        threads=default_threads()
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -14,6 +14,9 @@ const adminLoginBtn = document.getElementById('adminLoginBtn');
 const refreshBtn = document.getElementById('refreshBtn');
 const refreshReviewsBtn = document.getElementById('refreshReviewsBtn');
 const refreshTicketsBtn = document.getElementById('refreshTicketsBtn');
+const ticketSearchForm = document.getElementById('ticketSearchForm');
+const ticketSearchInput = document.getElementById('ticketSearchInput');
+const ticketStatusFilters = document.getElementById('ticketStatusFilters');
 const importUrlInput = document.getElementById('importUrlInput');
 const importUrlBtn = document.getElementById('importUrlBtn');
 const importMessage = document.getElementById('importMessage');
@@ -22,6 +25,14 @@ const productForm = document.getElementById('productForm');
 const formTitle = document.getElementById('formTitle');
 const productIdField = document.getElementById('productId');
 
+const TICKET_STATUS_LABELS = {
+    open: 'Open',
+    in_progress: 'In Progress',
+    resolved: 'Resolved',
+    closed: 'Closed'
+};
+const ticketFilters = { status: '', q: '' };
+
 const fields = {
     name: document.getElementById('name'),
     description: document.getElementById('description'),
@@ -104,7 +115,12 @@ adminLoginBtn?.addEventListener('click', async () => {
 
 refreshBtn?.addEventListener('click', loadProducts);
 refreshReviewsBtn?.addEventListener('click', loadPendingReviews);
-refreshTicketsBtn?.addEventListener('click', loadSupportTickets);
+refreshTicketsBtn?.addEventListener('click', () => loadSupportTickets());
+ticketSearchForm?.addEventListener('submit', (event) => {
+    event.preventDefault();
+    ticketFilters.q = ticketSearchInput.value.trim();
+    loadSupportTickets();
+});
 importUrlBtn?.addEventListener('click', importProductByUrl);
 
 productForm?.addEventListener('submit', async (event) => {
@@ -258,31 +274,82 @@ async function loadPendingReviews() {
     }
 }
 
-async function loadSupportTickets() {
+async function loadSupportTickets(cursor = null) {
     if (!supportTicketsList) return;
-    supportTicketsList.innerHTML = '<p class="admin-message">Loading support tickets...</p>';
+    if (!cursor) {
+        supportTicketsList.innerHTML = '<p class="admin-message">Loading support tickets...</p>';
+    }
     try {
-        const response = await fetch(`${API_BASE_URL}/admin/support/tickets`, {
+        const params = new URLSearchParams();
+        if (ticketFilters.status) params.set('status', ticketFilters.status);
+        if (ticketFilters.q) params.set('q', ticketFilters.q);
+        if (cursor) params.set('cursor', cursor);
+        const query = params.toString() ? `?${params}` : '';
+        const response = await fetch(`${API_BASE_URL}/admin/support/tickets${query}`, {
             headers: buildAdminHeaders()
         });
-        const tickets = await response.json();
+        const payload = await response.json();
         if (!response.ok) {
-            throw new Error(tickets.error || 'Failed to load tickets');
+            throw new Error(payload.error || 'Failed to load tickets');
+        }
+        if (!cursor) {
+            renderTicketStatusFilters(payload.status_counts || {});
         }
-        renderSupportTickets(tickets || []);
+        renderSupportTickets(payload.tickets || [], Boolean(cursor));
+        renderLoadMoreTickets(payload.next_cursor);
     } catch (error) {
-        supportTicketsList.innerHTML = `<p class="admin-message">${error.message || 'Failed to load support tickets.'}</p>`;
+        const message = `<p class="admin-message">${error.message || 'Failed to load support tickets.'}</p>`;
+        if (cursor) {
+            supportTicketsList.insertAdjacentHTML('beforeend', message);
+        } else {
+            supportTicketsList.innerHTML = message;
+        }
     }
 }
 
-function renderSupportTickets(tickets) {
+function renderTicketStatusFilters(statusCounts) {
+    if (!ticketStatusFilters) return;
+    // Counts cover every ticket matching the search, not just the loaded page
+    const total = Object.values(statusCounts).reduce((sum, count) => sum + count, 0);
+    const filters = [['', 'All', total]].concat(
+        Object.entries(TICKET_STATUS_LABELS).map(([status, label]) => [status, label, statusCounts[status] || 0])
+    );
+    ticketStatusFilters.innerHTML = '';
+    filters.forEach(([status, label, count]) => {
+        const button = document.createElement('button');
+        button.type = 'button';
+        button.className = status === ticketFilters.status ? '' : 'secondary';
+        button.textContent = `${label} (${count})`;
+        button.addEventListener('click', () => {
+            ticketFilters.status = status;
+            loadSupportTickets();
+        });
+        ticketStatusFilters.appendChild(button);
+    });
+}
+
+function renderLoadMoreTickets(nextCursor) {
+    if (!supportTicketsList || !nextCursor) return;
+    const button = document.createElement('button');
+    button.className = 'secondary';
+    button.textContent = 'Load more';
+    button.addEventListener('click', () => {
+        button.remove();
+        loadSupportTickets(nextCursor);
+    });
+    supportTicketsList.appendChild(button);
+}
+
+function renderSupportTickets(tickets, append = false) {
     if (!supportTicketsList) return;
-    if (!tickets.length) {
+    if (!tickets.length && !append) {
         supportTicketsList.innerHTML = '<p class="admin-message">No support tickets.</p>';
         return;
     }
 
-    supportTicketsList.innerHTML = '';
+    if (!append) {
+        supportTicketsList.innerHTML = '';
+    }
     tickets.forEach((ticket) => {
         const card = document.createElement('div');
         card.className = 'admin-item';